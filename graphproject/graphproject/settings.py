@@ -133,3 +133,180 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Test runner, disables the background flushes of the metric buffers
+
+TEST_RUNNER = 'tools.testing.TestRunner'
+
+
+# Pagination
+# Default and maximum number of rows a list endpoint returns per page.
+
+PAGINATION_PAGE_SIZE = 50
+
+PAGINATION_MAX_PAGE_SIZE = 1000
+
+
+# Export
+# Number of rows fetched per round-trip from the server-side cursor of an export.
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+# Bulk requests
+# Maximum number of items a bulk create, update or delete request accepts.
+
+BULK_MAX_SIZE = 1000
+
+
+# Catalogue import
+# `import_catalogue` and `/api/import/` validate and write IMPORT_CHUNK_SIZE records
+# per transaction. Artist names are resolved to ids through a cache of at most
+# IMPORT_NAME_CACHE_SIZE names, and at most IMPORT_MAX_REPORTED_ERRORS rejected
+# records are reported with their errors.
+
+IMPORT_CHUNK_SIZE = 5000
+
+IMPORT_NAME_CACHE_SIZE = 100000
+
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+
+# Async reads
+# Serve the movie and artist list and retrieve actions with async views and the
+# async ORM. Enable it when running under ASGI (graphproject/asgi.py), e.g.
+# `uvicorn graphproject.asgi:application`. Under WSGI every async view needs its
+# own event loop, so the sync views are faster there.
+
+ASYNC_READ_VIEWS = False
+
+
+# Artist graph
+# Artists are linked by the movies they acted in or directed together.
+# GRAPH_PATH_MAX_DEPTH is the default and maximum number of movies of a path.
+
+GRAPH_PATH_MAX_DEPTH = 6
+
+GRAPH_PATH_TIME_BUDGET = 1.0  # Seconds
+
+# The credits are kept in a per process index (`movies.graph.graph_index`).
+# Writes of the process are merged into it once GRAPH_INDEX_COMPACT_SIZE movies
+# changed or every GRAPH_INDEX_COMPACT_INTERVAL seconds, and it is reloaded every
+# GRAPH_INDEX_MAX_AGE seconds to see the writes of other processes.
+
+GRAPH_INDEX_COMPACT_SIZE = 1000
+
+GRAPH_INDEX_COMPACT_INTERVAL = 60  # Seconds
+
+GRAPH_INDEX_MAX_AGE = 600  # Seconds
+
+GRAPH_INDEX_LOAD_CHUNK_SIZE = 100000
+
+# Number of collaborators returned by `/api/artists/{id}/collaborators/`,
+# by default and at most.
+
+COLLABORATORS_DEFAULT_K = 10
+
+COLLABORATORS_MAX_K = 100
+
+# Neighborhood of an artist returned by `/api/artists/{id}/neighborhood/`: depth in
+# movies and number of nodes, by default and at most, and credits followed per node.
+
+NEIGHBORHOOD_DEFAULT_DEPTH = 2
+
+NEIGHBORHOOD_MAX_DEPTH = 4
+
+NEIGHBORHOOD_DEFAULT_LIMIT = 500
+
+NEIGHBORHOOD_MAX_LIMIT = 5000
+
+NEIGHBORHOOD_MAX_DEGREE = 50
+
+
+# Similar movies
+# Casts are compared by MinHash signatures of SIMILAR_MOVIES_BANDS bands of
+# SIMILAR_MOVIES_ROWS hashes, likely candidates are above a Jaccard similarity of
+# about (1 / bands) ** (1 / rows). Run `rebuild_cast_index` after changing them.
+
+SIMILAR_MOVIES_BANDS = 16
+
+SIMILAR_MOVIES_ROWS = 4
+
+SIMILAR_MOVIES_SEED = 1
+
+SIMILAR_MOVIES_MAX_CANDIDATES = 500
+
+SIMILAR_MOVIES_DEFAULT_K = 10
+
+SIMILAR_MOVIES_MAX_K = 100
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# `LocMemCache` is local to each process. When running several workers, use a shared
+# backend for the responses, e.g. 'django.core.cache.backends.filebased.FileBasedCache'
+# with a 'LOCATION' directory, so invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Read-through cache of the movie and artist list and retrieve responses
+
+RESPONSE_CACHE_ENABLED = True
+
+RESPONSE_CACHE_ALIAS = 'responses'
+
+RESPONSE_CACHE_TIMEOUT = 300  # Seconds
+
+
+# Endpoint call count
+# Calls are counted in memory and written in one batch once either threshold is reached.
+# At most ENDPOINT_CALL_COUNT_FLUSH_SIZE calls are lost if a worker dies abruptly, or kept while writes fail.
+# If ENDPOINT_CALL_COUNT_FLUSH_TIMER, a thread of each worker flushes idle buffers every interval.
+# Calls are counted per route, whose templates are cached for ENDPOINT_ROUTE_CACHE_SIZE routes.
+
+ENDPOINT_CALL_COUNT_FLUSH_SIZE = 100
+
+ENDPOINT_CALL_COUNT_FLUSH_INTERVAL = 10  # Seconds
+
+ENDPOINT_CALL_COUNT_FLUSH_TIMER = True
+
+ENDPOINT_ROUTE_CACHE_SIZE = 1024
+
+
+# Endpoint latency
+# Wall time, query count and database time of the requests are aggregated in memory
+# into histograms of ENDPOINT_LATENCY_BUCKETS upper bounds, and flushed with the call
+# counts into per minute rows. `rollup_endpoint_latency` rolls minute rows up into
+# hours and hours into days after their retention, and deletes days after theirs.
+# Changing the buckets requires emptying the `EndpointLatency` table.
+
+ENDPOINT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # Seconds
+
+ENDPOINT_LATENCY_MINUTE_RETENTION = 60 * 60 * 24  # Seconds
+
+ENDPOINT_LATENCY_HOUR_RETENTION = 60 * 60 * 24 * 30  # Seconds
+
+ENDPOINT_LATENCY_DAY_RETENTION = 60 * 60 * 24 * 365  # Seconds
+
+# Default window of the percentiles returned by `/tools/api/endpoints/`
+ENDPOINT_LATENCY_WINDOW = 60 * 60  # Seconds
+
+
+# Countries
+# Independent countries, loaded once per process by `movies.utils.Country`.
+# The list only changes with a deployment, so clients may cache it for long.
+
+COUNTRIES_FILE = BASE_DIR / 'assets' / 'country_data.csv'
+
+COUNTRIES_MAX_AGE = 60 * 60 * 24  # Seconds
@@ -0,0 +1,53 @@
+from asgiref.sync import sync_to_async
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+
+import movies.variables as variables
+
+
+class AsyncReadView(View):
+    """
+    Serve the list and retrieve actions of a viewset with the async ORM.
+
+    `GET` and `HEAD` requests are answered by the asynchronous version of the
+    action (`alist` or `aretrieve`, see `views.CachedReadMixin`) without leaving
+    the event loop, except for the queries themselves. The request goes through
+    the same steps as in `APIView.dispatch`: authentication, permissions and
+    throttling run in a worker thread, as they may query the database, errors
+    go through the exception handler of the viewset and the response is
+    rendered by the negotiated renderer. So the responses are those of the
+    viewset, including the response cache and the conditional GET validators.
+    Other methods are passed to the sync viewset view, which runs in a worker
+    thread.
+
+    Attributes
+    ----------
+    viewset_view : callable
+        The sync view of the viewset serving the same url, see `ViewSetMixin.as_view`.
+    """
+    viewset_view = None
+    # Every method is answered by the coroutine `dispatch`
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in (variables.GET, variables.HEAD):
+            return await sync_to_async(self.viewset_view)(request, *args, **kwargs)
+
+        view = self.viewset_view.cls(**self.viewset_view.initkwargs)
+        action = self.viewset_view.actions['get']
+        view.action_map = {'get': action, 'head': action}
+        view.args, view.kwargs = args, kwargs
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+        try:
+            await sync_to_async(view.initial)(request, *args, **kwargs)
+            response = await getattr(view, f'a{action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(request, response, *args, **kwargs)
+
+        # Other renderers, e.g. the browsable API, are run by the handler in a worker thread
+        if isinstance(getattr(response, 'accepted_renderer', None), JSONRenderer):
+            response.render()
+        return response
@@ -0,0 +1,137 @@
+import copy
+import json
+
+from django.db.models import Count
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+import movies.variables as variables
+from tools.benchmarks import measure, middleware_overhead
+
+from .filters import MoviesFilter
+from .models import Artists, Movies
+from .serializers import ArtistSerializer, MovieSerializer
+from .utils import Country
+from .validators import CountryValidator, InputDataValidator
+from .views import MOVIE_FIELDS, MOVIE_INPUT, NO_INPUT, MoviesViewSet
+
+# Numbers of rendered objects, of a small and a large page
+PAGE_SIZES = (10, 100)
+# Numbers of actor names the movies are filtered by
+FILTER_NAMES = (1, 5, 10)
+
+
+def parsed_request(method: str, data=None):
+    """
+    Build a DRF request whose body is already parsed, so only validation is timed.
+    """
+    factory = APIRequestFactory()
+    request = APIView().initialize_request(
+        getattr(factory, method)('/api/movies/', data, format='json'))
+    request.data  # Parse the body
+    return request
+
+
+def payloads():
+    actor_ids = list(range(1, 5))
+    # About 1 MB of JSON: roughly 7 bytes per id
+    many_actor_ids = list(range(1_000_000, 1_000_000 + 1024 * 1024 // 9))
+    movie = {variables.NAME: 'Movie', variables.PRODUCTION_YEAR: 2000,
+             variables.DIRECTOR: 1}
+    return [
+        ('empty', parsed_request('get'), NO_INPUT),
+        ('small', parsed_request('post', {**movie, variables.ACTORS: actor_ids}), MOVIE_INPUT),
+        ('1 MB', parsed_request('post', {**movie, variables.ACTORS: many_actor_ids}), MOVIE_INPUT),
+    ]
+
+
+def input_validation(number: int = None, repeat: int = 5) -> list:
+    """
+    Time the input data check of a request, for empty, small and 1 MB bodies.
+
+    The deep copy of the body, which the check used to make, is timed as reference.
+
+    Returns
+    -------
+    list
+        One row per payload, with its size and the timings of the check and of the copy.
+    """
+    rows = []
+    for name, request, schema in payloads():
+        rows.append({
+            'payload': name,
+            'bytes': len(json.dumps(request.data)),
+            'validate': measure(lambda: schema.validate(request), number, repeat),
+            'deepcopy': measure(lambda: copy.deepcopy(request.data), number, repeat),
+        })
+    return rows
+
+
+def validators(number: int = None, repeat: int = 5) -> list:
+    """
+    Time `InputDataValidator.validate` on a movie body, and `CountryValidator.is_valid`
+    on a valid and an invalid code.
+    """
+    request = parsed_request('post', {variables.NAME: 'Movie', variables.PRODUCTION_YEAR: 2000,
+                                      variables.DIRECTOR: 1, variables.ACTORS: [1, 2, 3]})
+    code = min(Country().codes)
+    validator = CountryValidator()
+    return [
+        {'validator': 'InputDataValidator', 'call': measure(
+            lambda: InputDataValidator(request, required_fields=MOVIE_FIELDS).validate(),
+            number, repeat)},
+        {'validator': 'CountryValidator', 'value': code,
+         'call': measure(lambda: validator.is_valid(code), number, repeat)},
+        {'validator': 'CountryValidator', 'value': '??',
+         'call': measure(lambda: validator.is_valid('??'), number, repeat)},
+    ]
+
+
+def serializers(number: int = None, repeat: int = 5) -> list:
+    """
+    Time the rendering of pages of movies and artists with `many=True`.
+
+    The objects are loaded once, as the list actions load them, so only the
+    serialization is timed.
+    """
+    rows = []
+    for size in PAGE_SIZES:
+        movies = list(Movies.objects.order_by('id').prefetch_related(
+            MoviesViewSet.actors_prefetch())[:size])
+        artists = list(Artists.objects.order_by('id')[:size])
+        rows.append({'serializer': 'MovieSerializer', 'page': size, 'render': measure(
+            lambda: MovieSerializer(movies, many=True).data, number, repeat)})
+        rows.append({'serializer': 'ArtistSerializer', 'page': size, 'render': measure(
+            lambda: ArtistSerializer(artists, many=True).data, number, repeat)})
+    return rows
+
+
+def movies_filter(number: int = None, repeat: int = 5) -> list:
+    """
+    Time the query of a page of movies filtered by 1, 5 and 10 actor names.
+
+    The names are those of the actors of the movie with the largest cast, so
+    every query matches at least one movie.
+    """
+    movie = Movies.objects.annotate(size=Count(variables.ACTORS)).order_by('-size', 'id').first()
+    names = list(movie.actors.order_by('id').values_list(variables.FULL_NAME, flat=True))
+    page_size = max(PAGE_SIZES)
+    rows = []
+    for count in FILTER_NAMES:
+        data = {variables.ACTORS: ','.join(names[:count])}
+        rows.append({'names': len(names[:count]), 'query': measure(lambda: list(
+            MoviesFilter(data, queryset=Movies.objects.order_by('id')).qs
+            .values_list('pk', flat=True)[:page_size]), number, repeat)})
+    return rows
+
+
+BENCHMARKS = {
+    'input_validation': input_validation,
+    'validators': validators,
+    'serializers': serializers,
+    'movies_filter': movies_filter,
+    'middleware': middleware_overhead,
+}
+
+# Benchmarks reading the movies and artists of the database, see `seed_graph`
+DATABASE_BENCHMARKS = {'serializers', 'movies_filter'}
@@ -0,0 +1,290 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
+
+import movies.variables as variables
+
+from .cache import response_cache
+from .collaborations import add_credits, subtract_credits
+from .models import Artists, Movies
+from .serializers import ArtistSerializer, MovieBulkSerializer
+from .signals import refresh_graph, touch_movies_of
+from .similarity import index_casts
+from .validators import CountryValidator
+
+
+class BulkOperation:
+    """
+    Validate and apply a bulk create, update or delete request.
+
+    All the items are validated before anything is written. Fields are checked
+    item by item without queries, then the ids referenced by the whole request are
+    resolved with one query per model. Writes run in a single transaction with
+    `bulk_create`/`bulk_update`.
+
+    Attributes
+    ----------
+    model : django.db.models.Model
+        The model of the items.
+    serializer_class : serializers.Serializer
+        The serializer validating the fields of one item.
+    fields : list
+        The fields every item must contain, as in the single object endpoints.
+    update_fields : list
+        The concrete fields written by `bulk_update`.
+    errors : dict
+        The errors of the invalid items, keyed by item index.
+
+    Methods
+    -------
+    is_valid(method) -> bool
+        Validates the request for the given HTTP method.
+    save() -> list
+        Applies the validated request, returns the primary keys of the written rows.
+    """
+    model = None
+    serializer_class = None
+    fields = []
+    update_fields = []
+
+    def __init__(self, data) -> None:
+        self.data = data
+        self.errors = {}
+        self.validated = {}
+        self.instances = {}
+        self.method = None
+
+    @property
+    def error_list(self) -> list:
+        return [{variables.INDEX: index, variables.ERRORS: errors}
+                for index, errors in sorted(self.errors.items())]
+
+    def check_size(self) -> bool:
+        """
+        Check the request is a non-empty list of at most `settings.BULK_MAX_SIZE` items.
+        """
+        return (isinstance(self.data, list) and
+                0 < len(self.data) <= settings.BULK_MAX_SIZE)
+
+    def is_valid(self, method: str) -> bool:
+        """
+        Validate every item of the request.
+
+        Parameters
+        ----------
+        method : str
+            `POST` to create, `PUT` to update and `DELETE` to delete the items.
+
+        Returns
+        -------
+        bool
+            Returns True if every item is valid, False otherwise.
+        """
+        self.method = method
+        if method == variables.DELETE:
+            self.validate_ids(self.data)
+            return not self.errors
+
+        required_fields = set(self.fields)
+        if method == variables.PUT:
+            required_fields.add(variables.ID)
+        for index, item in enumerate(self.data):
+            if not isinstance(item, dict) or item.keys() != required_fields:
+                self.errors[index] = variables.INVALID_INPUT_DATA
+                continue
+            serializer = self.serializer_class(data=item)
+            if not serializer.is_valid():
+                self.errors[index] = serializer.errors
+                continue
+            self.validated[index] = serializer.validated_data
+
+        if method == variables.PUT:
+            self.validate_ids([item.get(variables.ID) if isinstance(item, dict) else None
+                               for item in self.data])
+        self.validate_relations()
+        return not self.errors
+
+    def validate_ids(self, ids) -> None:
+        """
+        Resolve the primary keys of the items with one query.
+        """
+        pk_field = self.model._meta.pk
+        pks, seen = {}, set()
+        for index, value in enumerate(ids):
+            try:
+                pk = pk_field.to_python(value)
+            except (TypeError, DjangoValidationError):
+                self.errors.setdefault(index, variables.INVALID_INPUT_DATA)
+                continue
+            if pk is None or isinstance(value, bool):
+                self.errors.setdefault(index, variables.INVALID_INPUT_DATA)
+            elif pk in seen:
+                self.errors.setdefault(index, {variables.ID: [variables.DUPLICATE_ID]})
+            else:
+                pks[index] = pk
+                seen.add(pk)
+
+        found = self.model.objects.in_bulk(pks.values())
+        for index, pk in pks.items():
+            if pk not in found:
+                self.errors.setdefault(index, {variables.ID: [self.not_found]})
+            else:
+                self.instances[index] = found[pk]
+
+    def validate_relations(self) -> None:
+        """
+        Validate the values of the items which depend on other rows.
+        """
+
+    def add_error(self, index: int, field: str, message) -> None:
+        errors = self.errors.setdefault(index, {})
+        errors.setdefault(field, []).append(message)
+
+    def save(self) -> list:
+        """
+        Write the validated items in one transaction.
+
+        Returns
+        -------
+        list
+            The primary keys of the created, updated or deleted rows, in request order.
+        """
+        pks = [instance.pk for _, instance in sorted(self.instances.items())]
+        with transaction.atomic():
+            if self.method == variables.DELETE:
+                self.model.objects.filter(pk__in=pks).delete()
+            elif self.method == variables.PUT:
+                instances = [self.instances[index] for index in sorted(self.validated)]
+                now = timezone.now()
+                for index, instance in zip(sorted(self.validated), instances):
+                    self.assign(instance, self.validated[index])
+                    # `bulk_update` does not apply `auto_now`
+                    instance.updated_at = now
+                self.release_relations(instances)
+                self.model.objects.bulk_update(
+                    instances, self.update_fields + ['updated_at'])
+                self.save_relations(instances, replace=True)
+            else:
+                instances = [self.assign(self.model(), self.validated[index])
+                             for index in sorted(self.validated)]
+                self.model.objects.bulk_create(instances)
+                self.save_relations(instances, replace=False)
+                pks = [instance.pk for instance in instances]
+        # `bulk_create` and `bulk_update` do not send model signals
+        response_cache.invalidate(self.model)
+        return pks
+
+    def assign(self, instance, data):
+        for field in self.fields:
+            setattr(instance, field, data[field])
+        return instance
+
+    def release_relations(self, instances) -> None:
+        """
+        Update the rows derived from the relations of the instances, before they are updated.
+        """
+
+    def save_relations(self, instances, replace: bool) -> None:
+        """
+        Write the many to many relations of the saved instances.
+        """
+
+
+class MoviesBulkOperation(BulkOperation):
+    """
+    Bulk operation on movies.
+
+    Actors of all the items are written with one insert into the actors through table.
+    """
+    model = Movies
+    serializer_class = MovieBulkSerializer
+    fields = [variables.NAME, variables.PRODUCTION_YEAR,
+              variables.DIRECTOR, variables.ACTORS]
+    update_fields = [variables.NAME, variables.PRODUCTION_YEAR, variables.DIRECTOR]
+    not_found = variables.MOVIE_NOT_FOUND
+
+    def validate_relations(self) -> None:
+        artist_ids, director_ids = set(), set()
+        for data in self.validated.values():
+            artist_ids.update(data[variables.ACTORS])
+            if data[variables.DIRECTOR] is not None:
+                artist_ids.add(data[variables.DIRECTOR])
+                director_ids.add(data[variables.DIRECTOR])
+
+        existing = set(Artists.objects.filter(
+            pk__in=artist_ids).values_list('pk', flat=True))
+        # Directors of movies which are not part of the request
+        taken = set(
+            Movies.objects
+            .filter(director__in=director_ids)
+            .exclude(pk__in=[instance.pk for instance in self.instances.values()])
+            .values_list('director_id', flat=True)
+        )
+
+        for index, data in sorted(self.validated.items()):
+            for actor_id in data[variables.ACTORS]:
+                if actor_id not in existing:
+                    self.add_error(index, variables.ACTORS, variables.ARTIST_NOT_FOUND)
+                    break
+            director_id = data[variables.DIRECTOR]
+            if director_id is None:
+                continue
+            if director_id not in existing:
+                self.add_error(index, variables.DIRECTOR, variables.ARTIST_NOT_FOUND)
+            elif director_id in taken:
+                self.add_error(index, variables.DIRECTOR,
+                               variables.DIRECTOR_ALREADY_ASSIGNED)
+            taken.add(director_id)
+
+    def assign(self, instance, data):
+        instance.name = data[variables.NAME]
+        instance.production_year = data[variables.PRODUCTION_YEAR]
+        instance.director_id = data[variables.DIRECTOR]
+        return instance
+
+    def release_relations(self, instances) -> None:
+        subtract_credits(instance.pk for instance in instances)
+        # Directors are unique, unset them first so movies of the request can swap directors
+        Movies.objects.filter(pk__in=[instance.pk for instance in instances]).exclude(
+            director=None).update(director=None)
+
+    def save_relations(self, instances, replace: bool) -> None:
+        through = Movies.actors.through
+        if replace:
+            through.objects.filter(movies__in=instances).delete()
+        rows = [
+            through(movies_id=instance.pk, artists_id=actor_id)
+            for index, instance in zip(sorted(self.validated), instances)
+            # Keep the first occurrence of repeated ids
+            for actor_id in dict.fromkeys(self.validated[index][variables.ACTORS])
+        ]
+        through.objects.bulk_create(rows)
+        add_credits(instance.pk for instance in instances)
+        refresh_graph(instance.pk for instance in instances)
+        pks = [instance.pk for instance in instances]
+        transaction.on_commit(lambda: index_casts(pks))
+
+
+class ArtistsBulkOperation(BulkOperation):
+    """
+    Bulk operation on artists.
+
+    Country codes of all the items are checked against the set of valid codes.
+    """
+    model = Artists
+    serializer_class = ArtistSerializer
+    fields = [variables.FULL_NAME, variables.COUNTRY, variables.DOB]
+    update_fields = fields
+    not_found = variables.ARTIST_NOT_FOUND
+
+    def validate_relations(self) -> None:
+        codes = CountryValidator().codes()
+        for index, data in sorted(self.validated.items()):
+            if str(data[variables.COUNTRY]).strip() not in codes:
+                self.add_error(index, variables.COUNTRY, variables.INVALID_COUNTRY)
+
+    def save_relations(self, instances, replace: bool) -> None:
+        # Movies are filtered by artist names, see `signals.touch_artist_movies`
+        if replace:
+            touch_movies_of([instance.pk for instance in instances])
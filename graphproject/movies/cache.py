@@ -0,0 +1,195 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized list and retrieve responses.
+
+    Entries are keyed by the request host, path and normalized query params, and
+    by the current version of every model the response depends on. Writing a model
+    replaces its version, which makes every entry built from the previous version
+    unreachable; they expire after the cache timeout.
+
+    Versions live in the cache backend itself, so invalidations are shared by all
+    the processes using a shared backend (e.g. `FileBasedCache`). With the
+    `LocMemCache` backend both entries and versions are local to one process.
+
+    Attributes
+    ----------
+    hits : int
+        The number of responses served from the cache by this process.
+    misses : int
+        The number of cacheable responses built by this process.
+    invalidations : int
+        The number of model version changes made by this process.
+
+    Methods
+    -------
+    key(request, models) -> str
+        Returns the cache key of a request.
+    get(key) -> object
+        Returns the cached response data, or None.
+    set(key, data)
+        Stores the response data.
+    akey(request, models), aget(key), aset(key, data)
+        Asynchronous versions of `key`, `get` and `set`.
+    invalidate(*models)
+        Invalidates every entry depending on one of the models, now and at commit.
+    stats() -> dict
+        Returns the hit, miss and invalidation counters.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RESPONSE_CACHE_ENABLED
+
+    @staticmethod
+    def version_key(model) -> str:
+        return f'version:{model._meta.label_lower}'
+
+    @staticmethod
+    def new_version() -> int:
+        # A fresh value rather than a counter, so a version evicted from the cache
+        # can never come back with the value of older entries
+        return time.time_ns()
+
+    def versions(self, models) -> list:
+        keys = [self.version_key(model) for model in models]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                self.cache.add(key, self.new_version(), timeout=None)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def key(self, request, models):
+        """
+        Build the cache key of a request.
+
+        The key must be built before the response, so a write happening while the
+        response is built makes the stored entry unreachable instead of stale.
+        Query params are sorted by name, the order of repeated values is kept.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            The HTTP request object.
+        models : list
+            The models the response is built from.
+
+        Returns
+        -------
+        str
+            The cache key, or None when the cache is disabled.
+        """
+        if not self.enabled:
+            return None
+        return self.build_key(request, self.versions(models))
+
+    @staticmethod
+    def build_key(request, versions) -> str:
+        params = sorted(request.query_params.lists())
+        raw = repr((request.get_host(), request.path, params, versions))
+        return 'response:' + hashlib.sha1(raw.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Get the cached response data of a key, or None on a miss.
+        """
+        if key is None:
+            return None
+        data = self.cache.get(key)
+        self.count(data)
+        return data
+
+    def count(self, data) -> None:
+        with self.lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def set(self, key, data) -> None:
+        if key is not None:
+            self.cache.set(key, data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+    async def aversions(self, models) -> list:
+        keys = [self.version_key(model) for model in models]
+        versions = await self.cache.aget_many(keys)
+        for key in keys:
+            if key not in versions:
+                await self.cache.aadd(key, self.new_version(), timeout=None)
+                versions[key] = await self.cache.aget(key)
+        return [versions[key] for key in keys]
+
+    async def akey(self, request, models):
+        """
+        Asynchronous version of `key`.
+        """
+        if not self.enabled:
+            return None
+        return self.build_key(request, await self.aversions(models))
+
+    async def aget(self, key):
+        """
+        Asynchronous version of `get`.
+        """
+        if key is None:
+            return None
+        data = await self.cache.aget(key)
+        self.count(data)
+        return data
+
+    async def aset(self, key, data) -> None:
+        if key is not None:
+            await self.cache.aset(key, data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+    def invalidate(self, *models) -> None:
+        """
+        Invalidate every cached response built from one of the given models.
+
+        Inside a transaction the versions are replaced again once it commits: a
+        concurrent request may read the rows before the commit and cache them under
+        the version replaced at once, that entry must not outlive the commit.
+        """
+        self.replace_versions(models)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self.replace_versions(models))
+
+    def replace_versions(self, models) -> None:
+        self.cache.set_many(
+            {self.version_key(model): self.new_version() for model in models},
+            timeout=None
+        )
+        with self.lock:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,107 @@
+from django.db import connection, transaction
+
+from .graph import credits_query
+from .loading import bulk_load
+from .models import Collaborations
+
+
+def pairs_query(where: str = '') -> str:
+    """
+    Build the query counting the movies shared by every two credited artists.
+    """
+    return f"""
+        WITH credits AS ({credits_query(where)}),
+        pairs AS (
+            SELECT credit.artist, other.artist AS collaborator, COUNT(*) AS count
+            FROM credits credit
+            JOIN credits other ON other.movie = credit.movie AND other.artist <> credit.artist
+            GROUP BY credit.artist, other.artist
+        )
+    """
+
+
+def add_credits(movie_ids) -> None:
+    """
+    Count the collaborations of the current credits of the given movies.
+
+    Called after the credits of the movies were written, see `subtract_credits`.
+    """
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+    table = connection.ops.quote_name(Collaborations._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            {pairs_query('WHERE movie = ANY(%s)')}
+            INSERT INTO {table} AS collaborations (artist_id, collaborator_id, count)
+            SELECT artist, collaborator, count FROM pairs
+            ON CONFLICT (artist_id, collaborator_id)
+            DO UPDATE SET count = collaborations.count + EXCLUDED.count
+        """, [movie_ids])
+
+
+def subtract_credits(movie_ids) -> None:
+    """
+    Uncount the collaborations of the current credits of the given movies.
+
+    Called before the credits of the movies are changed, the pairs which are
+    left without a shared movie are deleted. The counts are decremented by a
+    single `UPDATE`, which recomputes them from the latest committed rows when
+    a concurrent transaction changed them, then the pairs decremented to zero
+    are deleted if they still are.
+    """
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+    table = connection.ops.quote_name(Collaborations._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            {pairs_query('WHERE movie = ANY(%s)')},
+            updated AS (
+                UPDATE {table} AS collaborations SET count = collaborations.count - pairs.count
+                FROM pairs
+                WHERE collaborations.artist_id = pairs.artist
+                AND collaborations.collaborator_id = pairs.collaborator
+                RETURNING collaborations.artist_id, collaborations.collaborator_id, collaborations.count
+            )
+            SELECT artist_id, collaborator_id FROM updated WHERE count <= 0
+        """, [movie_ids])
+        emptied = cursor.fetchall()
+        if not emptied:
+            return
+        artist_ids, collaborator_ids = zip(*emptied)
+        # The count is checked again, a concurrent transaction may have added a shared movie since
+        cursor.execute(f"""
+            DELETE FROM {table}
+            WHERE (artist_id, collaborator_id) IN (
+                SELECT * FROM unnest(%s::bigint[], %s::bigint[])
+            )
+            AND count <= 0
+        """, [list(artist_ids), list(collaborator_ids)])
+
+
+def rebuild() -> int:
+    """
+    Recount every collaboration with one set-based query.
+
+    The foreign keys and the top collaborators index are created again after
+    the insert, see `loading.bulk_load`.
+
+    Returns
+    -------
+    int
+        The number of stored pairs, twice the number of collaborating artist pairs.
+    """
+    table = connection.ops.quote_name(Collaborations._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Pending foreign key checks would prevent the truncation
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(f'TRUNCATE {table}')
+        with bulk_load(cursor, [Collaborations._meta.db_table]):
+            cursor.execute(f"""
+                {pairs_query()}
+                INSERT INTO {table} (artist_id, collaborator_id, count)
+                SELECT artist, collaborator, count FROM pairs
+            """)
+            rows = cursor.rowcount
+    return rows
@@ -0,0 +1,81 @@
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class Validators:
+    """
+    Validators of a representation, answering conditional GET requests.
+
+    The validators are derived from the `updated_at` columns instead of the
+    serialized body, so a request can be answered with `304 Not Modified` before
+    anything is serialized. They are weak, as the body itself is not hashed.
+
+    Attributes
+    ----------
+    etag : str
+        The quoted entity tag.
+    last_modified : datetime.datetime
+        The last modification time, or None for a collection.
+
+    Methods
+    -------
+    not_modified(request) -> HttpResponse
+        Returns a `304 Not Modified` response if the client copy is current, None otherwise.
+    apply(response) -> Response
+        Sets the `ETag` and `Last-Modified` headers of a response.
+    """
+
+    def __init__(self, etag: str, last_modified) -> None:
+        self.etag = 'W/' + quote_etag(etag)
+        self.last_modified = last_modified
+
+    @classmethod
+    def of_queryset(cls, queryset):
+        """
+        Build the validators of a collection with one aggregate query.
+
+        The number of rows catches deletions, which do not change the latest
+        `updated_at` of the remaining rows. For the same reason collections have
+        no `Last-Modified`, they are only validated by their `ETag`.
+        """
+        return cls.of_aggregate(queryset.order_by().aggregate(**cls.aggregates()))
+
+    @classmethod
+    async def aof_queryset(cls, queryset):
+        """
+        Asynchronous version of `of_queryset`.
+        """
+        return cls.of_aggregate(await queryset.order_by().aaggregate(**cls.aggregates()))
+
+    @staticmethod
+    def aggregates() -> dict:
+        return {'last_modified': Max('updated_at'), 'count': Count('pk')}
+
+    @classmethod
+    def of_aggregate(cls, aggregate):
+        last_modified = aggregate['last_modified']
+        stamp = int(last_modified.timestamp() * 1e6) if last_modified else 0
+        return cls(f"{aggregate['count']}-{stamp}", None)
+
+    @classmethod
+    def of_instance(cls, instance):
+        stamp = int(instance.updated_at.timestamp() * 1e6)
+        return cls(f'{instance.pk}-{stamp}', instance.updated_at)
+
+    @property
+    def timestamp(self):
+        if self.last_modified is None:
+            return None
+        return int(self.last_modified.timestamp())
+
+    def not_modified(self, request):
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.timestamp)
+        return None if response is None else self.apply(response)
+
+    def apply(self, response):
+        response.headers['ETag'] = self.etag
+        if self.last_modified is not None:
+            response.headers['Last-Modified'] = http_date(self.timestamp)
+        return response
@@ -1,20 +1,74 @@
 import django_filters
+from django import forms
+from django.db.models import Count, Exists, OuterRef
 
-from .models import Movies
+from .models import Artists, Movies
+
+
+class IntegerFilter(django_filters.NumberFilter):
+    field_class = forms.IntegerField
+
+
+class IntegerInFilter(django_filters.BaseInFilter, IntegerFilter):
+    pass
 
 
 class MoviesFilter(django_filters.FilterSet):
     director = django_filters.CharFilter(
-        field_name='director__full_name', lookup_expr='icontains')
+        field_name='director__full_name', method='filter_director')
     actors = django_filters.CharFilter(
         field_name='actors__full_name', method='filter_actors')
+    director_id = IntegerFilter(field_name='director')
+    actor_ids = IntegerInFilter(field_name='actors', method='filter_actor_ids')
 
     class Meta:
         model = Movies
-        fields = ['director', 'actors']
+        fields = ['director', 'actors', 'director_id', 'actor_ids']
+
+    @staticmethod
+    def artists_matching(name):
+        """
+        Ids of the artists whose name contains `name`, case-insensitively.
+
+        The `icontains` lookup is served by the trigram index on `UPPER(full_name)`,
+        so matching artists are found without scanning the whole table.
+        """
+        return Artists.objects.filter(full_name__icontains=name).values('pk')
+
+    def filter_director(self, queryset, name, value):
+        return queryset.filter(director__in=self.artists_matching(value))
 
     def filter_actors(self, queryset, name, value):
-        actor_names = value.split(',')
-        for actor_name in actor_names:
-            queryset = queryset.filter(actors__full_name__icontains=actor_name)
-        return queryset
+        """
+        Keep the movies with at least one actor matching each of the comma-separated names.
+
+        Every name becomes an `EXISTS` subquery on the actors through table, so the
+        movies table is never joined and no duplicate rows are returned however
+        many names are given.
+        """
+        through = Movies.actors.through.objects
+        conditions = [
+            Exists(through.filter(
+                movies_id=OuterRef('pk'),
+                artists_id__in=self.artists_matching(actor_name)))
+            for actor_name in value.split(',')
+        ]
+        return queryset.filter(*conditions)
+
+    def filter_actor_ids(self, queryset, name, value):
+        """
+        Keep the movies played by all the given actor ids.
+
+        The movie ids are found with one grouped query on the indexed `artists_id`
+        column of the through table.
+        """
+        actor_ids = set(value)
+        movie_ids = (
+            Movies.actors.through.objects
+            .filter(artists_id__in=actor_ids)
+            .values('movies_id')
+            .annotate(matches=Count('artists_id', distinct=True))
+            .filter(matches=len(actor_ids))
+            .values('movies_id')
+        )
+        return queryset.filter(pk__in=movie_ids)
@@ -0,0 +1,792 @@
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .models import Movies
+
+logger = logging.getLogger(__name__)
+
+
+def credits_query(where: str = '') -> str:
+    """
+    Build the query reading the (artist, movie) credits: the actors of the movies
+    and their directors.
+    """
+    through = connection.ops.quote_name(Movies.actors.through._meta.db_table)
+    movies = connection.ops.quote_name(Movies._meta.db_table)
+    return f"""
+        SELECT artist, movie FROM (
+            SELECT artists_id AS artist, movies_id AS movie FROM {through}
+            UNION
+            SELECT director_id, id FROM {movies} WHERE director_id IS NOT NULL
+        ) credits {where}
+    """
+
+
+def gather(offsets, targets, rows):
+    """
+    Read the CSR rows of the given row indices.
+
+    Returns
+    -------
+    tuple
+        The row index of every entry, and the entries.
+    """
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    ends = np.cumsum(lengths)
+    positions = np.arange(total) - np.repeat(ends - lengths, lengths) + np.repeat(starts, lengths)
+    return np.repeat(rows, lengths), targets[positions]
+
+
+class Bipartite:
+    """
+    Immutable compressed sparse row arrays of the artist-movie credits.
+
+    Artists and movies are numbered by their position in the sorted `artist_ids`
+    and `movie_ids` arrays. Credits are stored in both directions as int32 target
+    indices sliced by int64 offsets, so each credit takes 8 bytes.
+    """
+
+    def __init__(self, artists, movies) -> None:
+        """
+        Build the arrays from the artist and movie ids of every credit.
+        """
+        artists, movies = artists.astype(np.int64), movies.astype(np.int64)
+        # Sort by artist, then movie, and drop duplicate credits. Ids are not packed
+        # into one key, they may take the whole int64 range.
+        order = np.lexsort((movies, artists))
+        artists, movies = artists[order], movies[order]
+        unique = np.ones(len(artists), dtype=bool)
+        unique[1:] = (artists[1:] != artists[:-1]) | (movies[1:] != movies[:-1])
+        artists, movies = artists[unique], movies[unique]
+        self.artist_ids = np.unique(artists)
+        self.movie_ids = np.unique(movies)
+        artist_rows = np.searchsorted(self.artist_ids, artists)
+        movie_rows = np.searchsorted(self.movie_ids, movies)
+
+        # Keys are sorted by artist, then movie
+        self.artist_offsets = self.offsets(artist_rows, len(self.artist_ids))
+        self.artist_movies = movie_rows.astype(np.int32)
+        order = np.argsort(movie_rows, kind='stable')
+        self.movie_offsets = self.offsets(movie_rows, len(self.movie_ids))
+        self.movie_artists = artist_rows[order].astype(np.int32)
+
+    @staticmethod
+    def offsets(rows, size):
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=offsets[1:])
+        return offsets
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (
+            self.artist_ids, self.movie_ids, self.artist_offsets,
+            self.artist_movies, self.movie_offsets, self.movie_artists))
+
+    @staticmethod
+    def rows(ids, values):
+        """
+        Map ids to row indices, ids missing from `ids` are dropped.
+        """
+        rows = np.searchsorted(ids, values)
+        rows[rows == len(ids)] = 0
+        found = ids[rows] == values if len(ids) else np.zeros(len(values), dtype=bool)
+        return values[found], rows[found]
+
+    def movies_of(self, artists):
+        artists, rows = self.rows(self.artist_ids, artists)
+        sources, targets = gather(self.artist_offsets, self.artist_movies, rows)
+        return self.artist_ids[sources], self.movie_ids[targets]
+
+    def artists_of(self, movies):
+        movies, rows = self.rows(self.movie_ids, movies)
+        sources, targets = gather(self.movie_offsets, self.movie_artists, rows)
+        return self.movie_ids[sources], self.artist_ids[targets]
+
+    def edges(self):
+        """
+        Every credit as artist and movie id arrays.
+        """
+        lengths = np.diff(self.artist_offsets)
+        return np.repeat(self.artist_ids, lengths), self.movie_ids[self.artist_movies]
+
+
+class GraphIndex:
+    """
+    Process-local index of the artist-movie credits, for graph traversals.
+
+    The index is loaded on first use with one read of the credits. Writes replace
+    the credits of the changed movies in a small overlay on top of the CSR arrays
+    (see `refresh`), and the overlay is merged into new arrays (compacted) once it
+    holds `settings.GRAPH_INDEX_COMPACT_SIZE` movies or after
+    `settings.GRAPH_INDEX_COMPACT_INTERVAL` seconds. Writes made by other processes
+    are only seen after a reload, at most `settings.GRAPH_INDEX_MAX_AGE` seconds later.
+    Reloads run in a background thread, the previous arrays are used until the new
+    ones are swapped in, see `reload`.
+
+    Attributes
+    ----------
+    components : Components
+        The connected components of the artists, kept with the credits.
+
+    Methods
+    -------
+    movies_of(artists) -> tuple
+        Returns the (artist, movie) credits of the given artists as id arrays.
+    artists_of(movies) -> tuple
+        Returns the (movie, artist) credits of the given movies as id arrays.
+    refresh(movies)
+        Reads the current credits of the given movies.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.components = Components(self)
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Drop the index, it is loaded again on next use.
+        """
+        with self.lock:
+            self.graph = None
+            self.loaded_at = self.compacted_at = 0.0
+            # Movies refreshed during a background reload, see `reload`
+            self.reloading = None
+            self.reset_overlay()
+            self.components.clear()
+
+    def reset_overlay(self) -> None:
+        # Credits of the changed movies, they replace those of `graph`
+        self.overrides = {}
+        # Credits added to and removed from artists by the overrides
+        self.added, self.removed = {}, {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.graph is not None
+
+    def current(self):
+        """
+        Get the arrays, loading or compacting them first when due.
+
+        Only the first load blocks, a reload of outdated arrays is started in the
+        background and the current arrays are returned meanwhile.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.graph is None:
+                self.load()
+            elif now - self.loaded_at > settings.GRAPH_INDEX_MAX_AGE:
+                self.start_reload()
+            if self.overrides and (
+                    len(self.overrides) >= settings.GRAPH_INDEX_COMPACT_SIZE or
+                    now - self.compacted_at > settings.GRAPH_INDEX_COMPACT_INTERVAL):
+                self.compact()
+            return self.graph
+
+    def load(self) -> None:
+        """
+        Load the arrays, with the lock held.
+        """
+        self.swap(self.read())
+
+    @staticmethod
+    def read() -> Bipartite:
+        """
+        Read every credit with one query, through a server-side cursor.
+        """
+        artists, movies = [], []
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(credits_query())
+            while rows := cursor.fetchmany(settings.GRAPH_INDEX_LOAD_CHUNK_SIZE):
+                chunk = np.array(rows, dtype=np.int64)
+                artists.append(chunk[:, 0])
+                movies.append(chunk[:, 1])
+        empty = np.empty(0, dtype=np.int64)
+        return Bipartite(np.concatenate(artists or [empty]),
+                         np.concatenate(movies or [empty]))
+
+    def swap(self, graph: Bipartite) -> None:
+        # Must be called with the lock held
+        self.graph = graph
+        self.reloading = None
+        self.reset_overlay()
+        self.components.clear()
+        self.loaded_at = self.compacted_at = time.monotonic()
+
+    def start_reload(self) -> None:
+        # Must be called with the lock held
+        if self.reloading is None:
+            self.reloading = set()
+            threading.Thread(target=self.reload_thread, args=(self.reloading,), daemon=True).start()
+
+    def reload_thread(self, changed: set) -> None:
+        try:
+            self.reload(changed)
+        finally:
+            # The thread opened its own connection
+            connection.close()
+
+    def reload(self, changed: set) -> None:
+        """
+        Read the credits again and swap the new arrays in.
+
+        The credits are read without the lock, the current arrays are used
+        meanwhile. Movies refreshed during the read are added to `changed`: the
+        read may have missed their writes, they are refreshed again on the new
+        arrays. Nothing is swapped if the index was cleared or loaded meanwhile.
+
+        Parameters
+        ----------
+        changed : set
+            The movies refreshed since the reload started, `self.reloading`.
+        """
+        try:
+            graph = self.read()
+            # Labelled here as well, if they were in use
+            labels = self.components.propagate(graph) if self.components.labels is not None else None
+        except Exception:
+            logger.exception("Could not reload the graph index, the current arrays are kept.")
+            with self.lock:
+                if self.reloading is changed:
+                    # Try again after the maximum age
+                    self.reloading = None
+                    self.loaded_at = time.monotonic()
+            return
+        with self.lock:
+            if self.reloading is not changed:
+                return
+            self.swap(graph)
+            if labels is not None:
+                self.components.set(graph, labels)
+            movies = list(changed)
+        self.refresh(movies)
+
+    def compacted(self):
+        """
+        Get the arrays, with the overlay merged in.
+        """
+        with self.lock:
+            self.current()
+            if self.overrides:
+                self.compact()
+            return self.graph
+
+    def compact(self) -> None:
+        """
+        Merge the overlay into new arrays, without reading the database.
+        """
+        artists, movies = self.graph.edges()
+        keep = ~np.isin(movies, np.fromiter(self.overrides, dtype=np.int64))
+        added = [(artist, movie) for movie, cast in self.overrides.items() for artist in cast]
+        added = np.array(added, dtype=np.int64).reshape(-1, 2)
+        self.graph = Bipartite(np.concatenate([artists[keep], added[:, 0]]),
+                               np.concatenate([movies[keep], added[:, 1]]))
+        self.reset_overlay()
+        self.compacted_at = time.monotonic()
+
+    def refresh(self, movies) -> None:
+        """
+        Read the credits of the given movies, after they were written.
+
+        Does nothing if the index is not loaded, as it reads current data on load.
+
+        Parameters
+        ----------
+        movies : iterable
+            The primary keys of the created, changed or deleted movies.
+        """
+        movies = sorted(set(movies))
+        if not self.loaded or not movies:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(credits_query('WHERE movie = ANY(%s)'), [movies])
+            rows = cursor.fetchall()
+
+        casts = {movie: set() for movie in movies}
+        for artist, movie in rows:
+            casts[movie].add(artist)
+        with self.lock:
+            if self.reloading is not None:
+                self.reloading.update(movies)
+            for movie, cast in casts.items():
+                self.override(movie, frozenset(cast))
+
+    def override(self, movie: int, cast: frozenset) -> None:
+        # Must be called with the lock held
+        if movie in self.overrides:
+            previous = self.overrides[movie]
+        else:
+            _, artists = self.graph.artists_of(np.array([movie], dtype=np.int64))
+            previous = frozenset(artists.tolist())
+        for artist in previous - cast:
+            if movie in self.added.get(artist, ()):
+                self.added[artist].discard(movie)
+            else:
+                self.removed.setdefault(artist, set()).add(movie)
+        for artist in cast - previous:
+            if movie in self.removed.get(artist, ()):
+                self.removed[artist].discard(movie)
+            else:
+                self.added.setdefault(artist, set()).add(movie)
+        self.overrides[movie] = cast
+        self.components.update(previous, cast)
+
+    def movies_of(self, artists):
+        """
+        Get the movies credited to the given artists.
+
+        Parameters
+        ----------
+        artists : numpy.ndarray
+            Artist ids.
+
+        Returns
+        -------
+        tuple
+            Artist and movie id arrays, one entry per credit.
+        """
+        with self.lock:
+            sources, movies = self.current().movies_of(artists)
+            if any(self.removed.values()):
+                # Only the credits of the artists who lost some are looked up
+                keep = np.ones(len(sources), dtype=bool)
+                indices = np.flatnonzero(np.isin(sources, np.fromiter(self.removed, dtype=np.int64)))
+                for index, artist, movie in zip(indices.tolist(), sources[indices].tolist(),
+                                                movies[indices].tolist()):
+                    keep[index] = movie not in self.removed[artist]
+                sources, movies = sources[keep], movies[keep]
+            if self.added:
+                extra = [(artist, movie) for artist in artists.tolist()
+                         for movie in self.added.get(artist, ())]
+                sources, movies = self.append(sources, movies, extra)
+        return sources, movies
+
+    def artists_of(self, movies):
+        """
+        Get the artists credited in the given movies.
+
+        Parameters
+        ----------
+        movies : numpy.ndarray
+            Movie ids.
+
+        Returns
+        -------
+        tuple
+            Movie and artist id arrays, one entry per credit.
+        """
+        with self.lock:
+            graph = self.current()
+            if not self.overrides:
+                return graph.artists_of(movies)
+            overridden = np.isin(movies, np.fromiter(self.overrides, dtype=np.int64))
+            sources, artists = graph.artists_of(movies[~overridden])
+            extra = [(movie, artist) for movie in movies[overridden].tolist()
+                     for artist in self.overrides[movie]]
+            return self.append(sources, artists, extra)
+
+    @staticmethod
+    def append(sources, targets, pairs):
+        if not pairs:
+            return sources, targets
+        pairs = np.array(pairs, dtype=np.int64)
+        return np.concatenate([sources, pairs[:, 0]]), np.concatenate([targets, pairs[:, 1]])
+
+    def stats(self) -> dict:
+        graph = self.current()
+        return {
+            'artists': len(graph.artist_ids),
+            'movies': len(graph.movie_ids),
+            'credits': len(graph.artist_movies),
+            'bytes': graph.nbytes,
+            'pending_movies': len(self.overrides),
+        }
+
+
+class Components:
+    """
+    Connected components of the artists, to tell whether two artists are linked at all.
+
+    Components are labelled from the compacted credits by vectorized min-label
+    propagation: every artist takes the smallest label of the artists of its
+    movies, until nothing changes. Added credits then merge components through
+    a union-find over the labels. Removed credits may split a component: the
+    labels are marked stale and built again in a background thread. Stale labels
+    may tell artists of a split component connected, never the opposite, so they
+    still answer `connected` and the path search finds out.
+
+    The labels are built on first use, and with the credits on a reload.
+
+    Methods
+    -------
+    component(artist) -> int
+        Returns the id of the component of an artist, one of its artists, or None
+        while the labels are stale.
+    connected(source, target) -> bool
+        Returns False if the artists are in different components.
+    """
+
+    def __init__(self, index) -> None:
+        self.index = index
+        self.clear()
+
+    def clear(self) -> None:
+        self.artist_ids = self.labels = None
+        # Union-find links between labels, from the credits added after the build
+        self.parents = {}
+        self.stale = False
+        # Credit changes made during a background rebuild, see `rebuild`
+        self.rebuilding = None
+
+    @staticmethod
+    def propagate(graph):
+        """
+        Label the artists of the given arrays, by the smallest artist id of their component.
+        """
+        labels = np.arange(len(graph.artist_ids))
+        while len(labels):
+            lowest = np.minimum.reduceat(labels[graph.movie_artists], graph.movie_offsets[:-1])
+            updated = np.minimum(labels, np.minimum.reduceat(
+                lowest[graph.artist_movies], graph.artist_offsets[:-1]))
+            # Follow the labels of the labels, in the same component
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                break
+            labels = updated
+        return graph.artist_ids[labels]
+
+    def build(self) -> None:
+        graph = self.index.compacted()
+        self.set(graph, self.propagate(graph))
+
+    def set(self, graph, labels) -> None:
+        # Must be called with the index lock held
+        self.clear()
+        self.artist_ids, self.labels = graph.artist_ids, labels
+
+    def update(self, previous: frozenset, cast: frozenset) -> None:
+        """
+        Apply a change of the credits of a movie, with the index lock held.
+        """
+        if self.labels is None:
+            return
+        if self.rebuilding is not None:
+            self.rebuilding.append((previous, cast))
+        if previous - cast:
+            self.stale = True
+            self.start_rebuild()
+        artists = iter(cast)
+        first = next(artists, None)
+        for artist in artists:
+            self.union(first, artist)
+
+    def start_rebuild(self) -> None:
+        # Must be called with the index lock held
+        if self.rebuilding is None:
+            self.rebuilding = []
+            threading.Thread(target=self.rebuild, args=(self.rebuilding,), daemon=True).start()
+
+    def rebuild(self, changes: list) -> None:
+        """
+        Build the labels again, without the index lock, and swap them in.
+
+        Credit changes made meanwhile are added to `changes` and applied again
+        to the new labels. Nothing is swapped if the labels were cleared or
+        built meanwhile.
+
+        Parameters
+        ----------
+        changes : list
+            The (previous, cast) credit changes since the rebuild started, `self.rebuilding`.
+        """
+        with self.index.lock:
+            if self.rebuilding is not changes:
+                return
+            graph = self.index.compacted()
+            # The compacted arrays hold the changes made so far
+            changes.clear()
+        labels = self.propagate(graph)
+        with self.index.lock:
+            if self.rebuilding is not changes:
+                return
+            self.set(graph, labels)
+            for previous, cast in changes:
+                self.update(previous, cast)
+
+    def find(self, artist: int) -> int:
+        index = np.searchsorted(self.artist_ids, artist)
+        if index < len(self.artist_ids) and self.artist_ids[index] == artist:
+            label = int(self.labels[index])
+        else:
+            # Artists without credits when the labels were built
+            label = artist
+        root = label
+        while root in self.parents:
+            root = self.parents[root]
+        while label != root:
+            self.parents[label], label = root, self.parents[label]
+        return root
+
+    def union(self, source: int, target: int) -> None:
+        source, target = self.find(source), self.find(target)
+        if source != target:
+            self.parents[max(source, target)] = min(source, target)
+
+    def current(self) -> None:
+        # Must be called with the index lock held
+        # A first load of the credits clears the labels, a compaction keeps them
+        self.index.current()
+        if self.labels is None:
+            self.build()
+
+    def component(self, artist: int):
+        with self.index.lock:
+            self.current()
+            return None if self.stale else self.find(artist)
+
+    def connected(self, source: int, target: int) -> bool:
+        with self.index.lock:
+            self.current()
+            return self.find(source) == self.find(target)
+
+
+graph_index = GraphIndex()
+
+
+class PathSearchTimeout(Exception):
+    """
+    Raised when a path search exceeds its time budget.
+    """
+
+
+class PathSearch:
+    """
+    Shortest artist-movie-artist chain between two artists.
+
+    Two artists are linked by every movie they both acted in or directed. The
+    search is a bidirectional breadth-first search: it expands, one whole level
+    at a time, the smaller of the two frontiers growing from each end, and stops
+    at the first level where they meet. Expansions read the `graph_index` arrays,
+    so the search runs no query. Frontiers are expanded `chunk_size` artists at
+    a time and the time budget is checked before each chunk, so a level of hubs
+    cannot overrun it.
+
+    Attributes
+    ----------
+    max_depth : int
+        The maximum number of movies in the chain.
+    time_budget : float
+        The number of seconds after which the search gives up.
+    chunk_size : int
+        The number of frontier artists expanded at once.
+
+    Methods
+    -------
+    find(source, target) -> list
+        Returns the chain as alternating artist and movie ids, or None.
+    """
+
+    chunk_size = 1024
+
+    def __init__(self, max_depth: int, time_budget: float, index: GraphIndex = graph_index) -> None:
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.index = index
+
+    def find(self, source: int, target: int):
+        """
+        Find a shortest chain between two artists.
+
+        Parameters
+        ----------
+        source : int
+            The primary key of the first artist.
+        target : int
+            The primary key of the last artist.
+
+        Returns
+        -------
+        list
+            `[source, movie, artist, movie, ..., target]`, or None if the artists
+            are not linked within `max_depth` movies.
+
+        Raises
+        ------
+        PathSearchTimeout
+            If the search did not finish within `time_budget` seconds.
+        """
+        if source == target:
+            return [source]
+        self.deadline = time.monotonic() + self.time_budget
+
+        # Parent links of the visited artists: artist -> (previous artist, movie)
+        forward, backward = {source: None}, {target: None}
+        forward_frontier, backward_frontier = [source], [target]
+        for _ in range(self.max_depth):
+            if not forward_frontier or not backward_frontier:
+                return None
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand(forward_frontier, forward, backward)
+            else:
+                backward_frontier, meeting = self.expand(backward_frontier, backward, forward)
+            if meeting is not None:
+                return self.chain(meeting, forward)[::-1] + self.chain(meeting, backward)[1:]
+        return None
+
+    def expand(self, frontier, parents, others):
+        """
+        Visit the artists linked to the frontier.
+
+        Returns
+        -------
+        tuple
+            The next frontier, and an artist visited from both ends or None.
+        """
+        next_frontier = []
+        for start in range(0, len(frontier), self.chunk_size):
+            for artist, movie, previous in self.neighbors(frontier[start:start + self.chunk_size]):
+                if artist in parents:
+                    continue
+                parents[artist] = (previous, movie)
+                if artist in others:
+                    return next_frontier, artist
+                next_frontier.append(artist)
+        return next_frontier, None
+
+    @staticmethod
+    def chain(artist, parents) -> list:
+        chain = [artist]
+        while parents[artist] is not None:
+            artist, movie = parents[artist]
+            chain += [movie, artist]
+        return chain
+
+    def neighbors(self, frontier):
+        """
+        Get the artists sharing a movie with the frontier, once each.
+
+        Raises `PathSearchTimeout` if the time budget is spent.
+
+        Returns
+        -------
+        zip
+            `(artist, movie, frontier artist)` rows, by artist id.
+        """
+        if time.monotonic() >= self.deadline:
+            raise PathSearchTimeout
+        previous, movies = self.index.movies_of(np.array(frontier, dtype=np.int64))
+        # Reach every movie from one frontier artist
+        movies, first = np.unique(movies, return_index=True)
+        previous = previous[first]
+
+        sources, artists = self.index.artists_of(movies)
+        previous = previous[np.searchsorted(movies, sources)]
+        linked = artists != previous
+        artists, sources, previous = artists[linked], sources[linked], previous[linked]
+
+        artists, first = np.unique(artists, return_index=True)
+        return zip(artists.tolist(), sources[first].tolist(), previous[first].tolist())
+
+
+class Neighborhood:
+    """
+    The artists and movies within `depth` movies of an artist, for visualization.
+
+    Every level adds the movies of the last artists found, then the artists of
+    the new movies. Hubs are truncated: at most `max_degree` movies are followed
+    from an artist and at most `max_degree` artists from a movie, the lowest ids
+    first. The traversal stops adding nodes once there are `limit` of them.
+
+    Attributes
+    ----------
+    depth : int
+        The number of movies between the artist and the farthest artists.
+    limit : int
+        The maximum number of artists and movies.
+    max_degree : int
+        The maximum number of credits followed from one node.
+
+    Methods
+    -------
+    collect(artist) -> tuple
+        Returns the artists, the movies, the credits linking them and whether
+        anything was truncated.
+    """
+
+    def __init__(self, depth: int, limit: int, max_degree: int, index: GraphIndex = graph_index) -> None:
+        self.depth = depth
+        self.limit = limit
+        self.max_degree = max_degree
+        self.index = index
+
+    def collect(self, artist: int):
+        """
+        Collect the neighborhood of an artist.
+
+        Parameters
+        ----------
+        artist : int
+            The primary key of the artist.
+
+        Returns
+        -------
+        tuple
+            The artist ids, the movie ids, the sorted (artist, movie) credits and
+            True if nodes or credits were left out.
+        """
+        artists, movies, credits = {artist: None}, {}, set()
+        self.truncated = False
+        frontier = [artist]
+        for _ in range(self.depth):
+            found = self.follow(self.index.movies_of, frontier, movies, artists)
+            credits.update(found)
+            new_movies = list(dict.fromkeys(movie for _, movie in found if movies[movie]))
+            found = self.follow(self.index.artists_of, new_movies, artists, movies)
+            credits.update((artist, movie) for movie, artist in found)
+            frontier = list(dict.fromkeys(artist for _, artist in found if artists[artist]))
+            for nodes in (movies, artists):
+                nodes.update(dict.fromkeys(nodes, False))
+            if not frontier:
+                break
+        return list(artists), list(movies), sorted(credits), self.truncated
+
+    def follow(self, neighbors, nodes, found, others) -> list:
+        """
+        Follow the credits of the nodes, adding the new ends to `found`.
+
+        New ends are marked True in `found` until the level is over.
+        """
+        if not nodes:
+            return []
+        sources, targets = neighbors(np.array(nodes, dtype=np.int64))
+        sources, targets = self.truncate(sources, targets)
+        pairs = []
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            if target not in found:
+                if len(found) + len(others) >= self.limit:
+                    self.truncated = True
+                    continue
+                found[target] = True
+            pairs.append((source, target))
+        return pairs
+
+    def truncate(self, sources, targets):
+        """
+        Keep the `max_degree` lowest targets of every source.
+        """
+        order = np.lexsort((targets, sources))
+        sources, targets = sources[order], targets[order]
+        starts = np.flatnonzero(np.r_[True, sources[1:] != sources[:-1]])[:len(sources)]
+        ranks = np.arange(len(sources)) - np.repeat(starts, np.diff(np.r_[starts, len(sources)]))
+        keep = ranks < self.max_degree
+        if not keep.all():
+            self.truncated = True
+        return sources[keep], targets[keep]
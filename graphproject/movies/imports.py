@@ -0,0 +1,452 @@
+import abc
+import csv
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+import movies.variables as variables
+
+from .cache import response_cache
+from .collaborations import add_credits, subtract_credits
+from .loading import copy_rows
+from .models import Artists, Movies
+from .serializers import ArtistImportSerializer, MovieImportSerializer
+from .signals import refresh_graph, touch_movies_of
+from .similarity import index_casts
+from .validators import CountryValidator
+
+CSV = 'csv'
+JSONL = 'jsonl'
+# Formats by file extension
+FORMATS = {'.csv': CSV, '.jsonl': JSONL, '.ndjson': JSONL}
+# Separator of the actor names in a CSV cell
+LIST_SEPARATOR = '|'
+
+
+class UnreadableCatalogue(Exception):
+    """
+    Raised when a catalogue can not be decoded or parsed, the chunks before are imported.
+
+    Attributes
+    ----------
+    line : int
+        The line the reading stopped at. Text is decoded by blocks, so the
+        undecodable bytes may be a few lines further.
+    stats : dict
+        The statistics of the chunks imported before.
+    """
+
+    def __init__(self, error, line: int, stats: dict) -> None:
+        super().__init__(f'line {line}: {error}')
+        self.line = line
+        self.stats = stats
+
+
+class ArtistNames:
+    """
+    Resolve artist names to ids.
+
+    Resolved names are kept in a dictionary of at most `size` names, the least
+    recently used first. Other names are looked up with one query per batch.
+    A name shared by several artists resolves to the oldest one.
+
+    Methods
+    -------
+    resolve(names) -> dict
+        Returns the id of every known name.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.ids = OrderedDict()
+
+    def resolve(self, names) -> dict:
+        found, missing = {}, []
+        for name in set(names):
+            if name in self.ids:
+                self.ids.move_to_end(name)
+                found[name] = self.ids[name]
+            else:
+                missing.append(name)
+        if missing:
+            table = connection.ops.quote_name(Artists._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT full_name, MIN(id) FROM {table}
+                    WHERE full_name = ANY(%s) GROUP BY full_name
+                """, [missing])
+                for name, artist_id in cursor.fetchall():
+                    found[name] = self.ids[name] = artist_id
+            while len(self.ids) > self.size:
+                self.ids.popitem(last=False)
+        return found
+
+
+class CatalogueImport(abc.ABC):
+    """
+    Stream an external catalogue into the database.
+
+    Records are parsed from CSV or JSON lines `chunk_size` at a time, so memory
+    does not grow with the file. Every chunk is validated item by item with the
+    rules of the API serializers, then written in one transaction with set-based
+    `INSERT ... ON CONFLICT` statements keyed on the `id` of the catalogue, stored
+    as `external_id`. Importing a record again updates its row.
+
+    After every chunk the number of processed records is written to the checkpoint
+    file, if any, and `progress` is called with the statistics. A run started with
+    the same checkpoint skips the processed records, and a chunk committed before
+    an interruption but missing from the checkpoint is imported again as updates.
+
+    Attributes
+    ----------
+    model : django.db.models.Model
+        The model of the records.
+    serializer_class : serializers.Serializer
+        The serializer validating one record.
+    fields : list
+        The fields of a record, besides its `id`.
+    derived : bool
+        Whether the collaborations and the cast buckets of the imported movies are
+        updated. Without, run `rebuild_collaborations` and `rebuild_cast_index` after
+        the import.
+    stats : dict
+        The numbers of processed, created, updated and rejected records, and the
+        errors of the first rejected ones.
+
+    Methods
+    -------
+    run(file, file_format, checkpoint=None) -> dict
+        Imports the records of a text file, returns the statistics. Raises
+        `UnreadableCatalogue` if the file can not be decoded or parsed.
+    """
+    model = None
+    serializer_class = None
+    fields = []
+    # Fields holding lists, split on `LIST_SEPARATOR` in CSV files
+    list_fields = []
+
+    def __init__(self, chunk_size: int = None, progress=None, derived: bool = True) -> None:
+        self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        self.derived = derived
+        self.progress = progress or (lambda stats: None)
+        self.stats = {'processed': 0, 'created': 0, 'updated': 0, 'rejected': 0,
+                      variables.ERRORS: []}
+
+    def run(self, file, file_format: str, checkpoint: str = None) -> dict:
+        """
+        Import the records of a file.
+
+        Parameters
+        ----------
+        file : io.TextIOBase
+            The catalogue, opened in text mode.
+        file_format : str
+            `csv`, with a header row, or `jsonl`, one JSON object per line.
+        checkpoint : str, optional
+            The path of the checkpoint file, removed once the whole file is imported.
+
+        Returns
+        -------
+        dict
+            The statistics of the import.
+        """
+        skip = 0
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as state:
+                saved = json.load(state)
+            self.stats.update(saved['stats'])
+            skip = saved['stats']['processed']
+
+        start = time.perf_counter()
+        self.line = 0
+        records = itertools.islice(self.parse(file, file_format), skip, None)
+        while chunk := self.read_chunk(records):
+            self.import_chunk(chunk)
+            self.stats['processed'] += len(chunk)
+            if checkpoint:
+                self.save_checkpoint(checkpoint)
+            self.progress({**self.stats, 'seconds': time.perf_counter() - start})
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        return self.stats
+
+    def read_chunk(self, records) -> list:
+        try:
+            return list(itertools.islice(records, self.chunk_size))
+        except (UnicodeDecodeError, csv.Error) as error:
+            raise UnreadableCatalogue(error, self.line + 1, self.stats) from error
+
+    def save_checkpoint(self, path: str) -> None:
+        # Replaced atomically, an interrupted write leaves the previous checkpoint
+        with open(f'{path}.tmp', 'w') as state:
+            json.dump({'stats': self.stats}, state, default=str)
+        os.replace(f'{path}.tmp', path)
+
+    def parse(self, file, file_format: str):
+        """
+        Yield the line number and the fields of every record, or None for an unreadable one.
+        """
+        if file_format == CSV:
+            reader = csv.DictReader(file)
+            for record in reader:
+                for field in self.list_fields:
+                    if record.get(field) is not None:
+                        record[field] = [name.strip() for name in record[field].split(LIST_SEPARATOR)
+                                         if name.strip()]
+                self.line = reader.line_num
+                yield self.line, {field: value if value != '' else None
+                                  for field, value in record.items()}
+        else:
+            for line, text in enumerate(file, 1):
+                self.line = line
+                if not text.strip():
+                    continue
+                try:
+                    record = json.loads(text)
+                except ValueError:
+                    record = None
+                yield line, record if isinstance(record, dict) else None
+
+    def validate(self, chunk) -> dict:
+        """
+        Validate the fields of the records of a chunk, without queries.
+
+        Returns
+        -------
+        dict
+            The validated data of the valid records, keyed by line number.
+        """
+        validated, seen = {}, set()
+        for line, record in chunk:
+            if record is None:
+                self.reject(line, {api_settings.NON_FIELD_ERRORS_KEY: [variables.INVALID_INPUT_DATA]})
+                continue
+            data = {field: record.get(field) for field in self.fields}
+            data['external_id'] = record.get(variables.ID)
+            serializer = self.serializer_class(data=data)
+            if not serializer.is_valid():
+                errors = dict(serializer.errors)
+                if 'external_id' in errors:
+                    errors[variables.ID] = errors.pop('external_id')
+                self.reject(line, errors)
+            elif serializer.validated_data['external_id'] in seen:
+                self.reject(line, {variables.ID: [variables.DUPLICATE_ID]})
+            else:
+                seen.add(serializer.validated_data['external_id'])
+                validated[line] = serializer.validated_data
+        return validated
+
+    def reject(self, line: int, errors) -> None:
+        self.stats['rejected'] += 1
+        if len(self.stats[variables.ERRORS]) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.stats[variables.ERRORS].append({variables.LINE: line, variables.ERRORS: errors})
+
+    @abc.abstractmethod
+    def import_chunk(self, chunk) -> None:
+        """
+        Validate and write a chunk of (line number, record) pairs, in one transaction.
+        """
+
+    def upsert(self, cursor, columns: list, types: list, rows: list, updated: list) -> list:
+        """
+        Insert or update rows keyed on `external_id` with one statement.
+
+        Returns
+        -------
+        list
+            The id, external id and creation flag of every row.
+        """
+        if not rows:
+            return []
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        arrays = ', '.join(f'%s::{type}[]' for type in types)
+        assignments = ', '.join(f'{column} = EXCLUDED.{column}' for column in updated)
+        cursor.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            SELECT * FROM unnest({arrays})
+            ON CONFLICT (external_id) DO UPDATE SET {assignments}
+            RETURNING id, external_id, xmax = 0
+        """, [list(column) for column in zip(*rows)])
+        results = cursor.fetchall()
+        created = sum(1 for _, _, inserted in results if inserted)
+        self.stats['created'] += created
+        self.stats['updated'] += len(results) - created
+        return results
+
+
+class ArtistsImport(CatalogueImport):
+    """
+    Import of artists, with the columns `id`, `full_name`, `country` and `dob`.
+    """
+    model = Artists
+    serializer_class = ArtistImportSerializer
+    fields = [variables.FULL_NAME, variables.COUNTRY, variables.DOB]
+
+    def import_chunk(self, chunk) -> None:
+        codes = CountryValidator().codes()
+        rows = []
+        now = timezone.now()
+        for line, data in self.validate(chunk).items():
+            country = str(data[variables.COUNTRY]).strip()
+            if country not in codes:
+                self.reject(line, {variables.COUNTRY: [variables.INVALID_COUNTRY]})
+                continue
+            rows.append((data['external_id'], data[variables.FULL_NAME], country,
+                         data[variables.DOB], now, 0))
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            results = self.upsert(
+                cursor, ['external_id', 'full_name', 'country', 'dob', 'updated_at', 'influence'],
+                ['text', 'text', 'text', 'date', 'timestamptz', 'double precision'], rows,
+                ['full_name', 'country', 'dob', 'updated_at'])
+            # Movies are filtered by artist names, see `signals.touch_artist_movies`
+            touch_movies_of([artist_id for artist_id, _, created in results if not created])
+        response_cache.invalidate(Artists, Movies)
+
+
+class MoviesImport(CatalogueImport):
+    """
+    Import of movies, with the columns `id`, `name`, `production_year`, `director`
+    and `actors`.
+
+    The director and actors are artist names, resolved by `ArtistNames`, and actors
+    are separated by `LIST_SEPARATOR` in CSV files. The cast of an imported movie
+    replaces its current one: the credits are loaded with `COPY` into a staging
+    table and merged into the actors table with two set-based statements.
+    """
+    model = Movies
+    serializer_class = MovieImportSerializer
+    fields = [variables.NAME, variables.PRODUCTION_YEAR, variables.DIRECTOR, variables.ACTORS]
+    list_fields = [variables.ACTORS]
+
+    def __init__(self, chunk_size: int = None, progress=None, derived: bool = True) -> None:
+        super().__init__(chunk_size, progress, derived)
+        self.names = ArtistNames(settings.IMPORT_NAME_CACHE_SIZE)
+
+    def import_chunk(self, chunk) -> None:
+        validated = self.validate(chunk)
+        names = set()
+        for data in validated.values():
+            names.update(data[variables.ACTORS])
+            if data[variables.DIRECTOR] is not None:
+                names.add(data[variables.DIRECTOR])
+        artist_ids = self.names.resolve(names)
+
+        movies = {}
+        for line, data in validated.items():
+            missing = [field for field, values in (
+                (variables.DIRECTOR, [data[variables.DIRECTOR]] if data[variables.DIRECTOR] else []),
+                (variables.ACTORS, data[variables.ACTORS]),
+            ) if any(name not in artist_ids for name in values)]
+            if missing:
+                self.reject(line, {field: [variables.ARTIST_NOT_FOUND] for field in missing})
+                continue
+            movies[line] = data
+        movies = self.check_directors(movies, artist_ids)
+
+        now = timezone.now()
+        rows, credits = [], {}
+        for data in movies.values():
+            director = artist_ids.get(data[variables.DIRECTOR])
+            rows.append((data['external_id'], data[variables.NAME], data[variables.PRODUCTION_YEAR],
+                         director, now))
+            credits[data['external_id']] = (director, {artist_ids[name] for name in data[variables.ACTORS]})
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            current = self.current_credits(cursor, list(credits))
+            # Only the movies whose credits change are counted again, most of a
+            # catalogue imported again is unchanged
+            changed = [movie_id for external_id, (movie_id, *movie_credits) in current.items()
+                       if credits[external_id] != tuple(movie_credits)]
+            if self.derived:
+                subtract_credits(changed)
+            results = self.upsert(
+                cursor, ['external_id', 'name', 'production_year', 'director_id', 'updated_at'],
+                ['text', 'text', 'integer', 'bigint', 'timestamptz'], rows,
+                ['name', 'production_year', 'director_id', 'updated_at'])
+            movie_ids = {external_id: movie_id for movie_id, external_id, _ in results}
+            changed += [movie_id for external_id, movie_id in movie_ids.items() if external_id not in current]
+            self.merge_casts(cursor, movie_ids, [
+                (movie_ids[external_id], artist_id)
+                for external_id, (_, cast) in credits.items() for artist_id in cast
+            ])
+            if self.derived:
+                add_credits(changed)
+                transaction.on_commit(lambda: index_casts(changed))
+            refresh_graph(changed)
+        response_cache.invalidate(Movies)
+
+    def current_credits(self, cursor, external_ids: list) -> dict:
+        """
+        Get the id, director and actors of the existing movies, by external id.
+        """
+        table = connection.ops.quote_name(Movies._meta.db_table)
+        through = connection.ops.quote_name(Movies.actors.through._meta.db_table)
+        cursor.execute(f"""
+            SELECT external_id, id, director_id,
+                   ARRAY(SELECT artists_id FROM {through} WHERE movies_id = movies.id)
+            FROM {table} movies WHERE external_id = ANY(%s)
+        """, [external_ids])
+        return {external_id: (movie_id, director, set(cast))
+                for external_id, movie_id, director, cast in cursor.fetchall()}
+
+    def check_directors(self, movies: dict, artist_ids: dict) -> dict:
+        """
+        Reject the movies whose director directs another movie, with one query.
+        """
+        directors = {artist_ids[data[variables.DIRECTOR]]: data['external_id']
+                     for data in movies.values() if data[variables.DIRECTOR] is not None}
+        taken = dict(Movies.objects.filter(director__in=directors).values_list(
+            'director_id', 'external_id'))
+        accepted = {}
+        for line, data in movies.items():
+            director = artist_ids.get(data[variables.DIRECTOR])
+            if director is not None:
+                if taken.get(director, data['external_id']) != data['external_id']:
+                    self.reject(line, {variables.DIRECTOR: [variables.DIRECTOR_ALREADY_ASSIGNED]})
+                    continue
+                taken[director] = data['external_id']
+            accepted[line] = data
+        return accepted
+
+    def merge_casts(self, cursor, movie_ids: dict, credits: list) -> None:
+        """
+        Replace the actors of the movies with the given credits.
+        """
+        through = connection.ops.quote_name(Movies.actors.through._meta.db_table)
+        cursor.execute('CREATE TEMPORARY TABLE IF NOT EXISTS import_credits '
+                       '(movies_id bigint NOT NULL, artists_id bigint NOT NULL)')
+        copy_rows(cursor, 'import_credits', ['movies_id', 'artists_id'], credits)
+        cursor.execute(f"""
+            DELETE FROM {through} AS actors
+            WHERE actors.movies_id = ANY(%s) AND NOT EXISTS (
+                SELECT 1 FROM import_credits credits
+                WHERE credits.movies_id = actors.movies_id AND credits.artists_id = actors.artists_id
+            )
+        """, [list(movie_ids.values())])
+        cursor.execute(f"""
+            INSERT INTO {through} (movies_id, artists_id)
+            SELECT DISTINCT movies_id, artists_id FROM import_credits
+            ON CONFLICT (movies_id, artists_id) DO NOTHING
+        """)
+        cursor.execute('TRUNCATE import_credits')
+
+
+def file_format(name: str):
+    """
+    Get the format of a catalogue from its file name, or None if it is not supported.
+    """
+    return FORMATS.get(os.path.splitext(name)[1].lower())
+
+
+IMPORTS = {
+    'artists': ArtistsImport,
+    'movies': MoviesImport,
+}
@@ -0,0 +1,118 @@
+import io
+from contextlib import contextmanager
+
+from django.db import connection
+
+# Text format of `COPY`, see https://www.postgresql.org/docs/current/sql-copy.html
+COPY_NULL = '\\N'
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_value(value) -> str:
+    """
+    Format a value for the text format of `COPY`.
+    """
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, str):
+        return value.translate(COPY_ESCAPES)
+    return str(value)
+
+
+def copy_rows(cursor, table: str, columns: list, rows) -> int:
+    """
+    Load rows into a table with one `COPY ... FROM STDIN`.
+
+    Works with the psycopg2 (`copy_expert`) and psycopg 3 (`cursor.copy`) drivers.
+
+    Parameters
+    ----------
+    cursor : django.db.backends.utils.CursorWrapper
+        A cursor of the default connection.
+    table : str
+        The quoted name of the table.
+    columns : list
+        The names of the loaded columns.
+    rows : iterable
+        Tuples of values, or lines already in the text format of `COPY`.
+
+    Returns
+    -------
+    int
+        The number of loaded rows.
+    """
+    lines = [row if isinstance(row, str) else '\t'.join(map(copy_value, row)) for row in rows]
+    if not lines:
+        return 0
+    data = '\n'.join(lines) + '\n'
+    query = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(query, io.StringIO(data))
+    else:
+        with cursor.copy(query) as copy:
+            copy.write(data)
+    return len(lines)
+
+
+def reserve_ids(cursor, model, count: int) -> int:
+    """
+    Reserve `count` consecutive primary keys of a model, for rows loaded with `COPY`.
+
+    The table is locked against concurrent writes until the transaction ends.
+
+    Returns
+    -------
+    int
+        The first reserved id.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    cursor.execute(f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}')
+    first = cursor.fetchone()[0]
+    if count:
+        cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)",
+                       [model._meta.db_table, first + count - 1])
+    return first
+
+
+@contextmanager
+def bulk_load(cursor, tables: list):
+    """
+    Drop the foreign keys, unique constraints and secondary indexes of tables during a bulk load.
+
+    They are created again when the block exits, which checks and indexes the
+    loaded rows at once, by sorting them, instead of row by row. Primary keys are
+    kept. Must run inside a transaction, the tables are locked until it ends.
+
+    Parameters
+    ----------
+    cursor : django.db.backends.utils.CursorWrapper
+        A cursor of the default connection.
+    tables : list
+        The unquoted names of the tables.
+    """
+    # Foreign keys first, they may depend on the unique constraints
+    cursor.execute("""
+        SELECT conrelid::regclass::text, quote_ident(conname), pg_get_constraintdef(oid)
+        FROM pg_constraint WHERE contype IN ('f', 'u') AND conrelid = ANY(%s::regclass[])
+        ORDER BY contype, 1, 2
+    """, [tables])
+    constraints = cursor.fetchall()
+    cursor.execute("""
+        SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid)
+        FROM pg_index WHERE indrelid = ANY(%s::regclass[]) AND NOT EXISTS (
+            SELECT 1 FROM pg_constraint WHERE conindid = indexrelid
+        )
+        ORDER BY 1
+    """, [tables])
+    indexes = cursor.fetchall()
+
+    for table, name, _ in constraints:
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX {name}')
+    yield
+    for _, definition in indexes:
+        cursor.execute(definition)
+    for table, name, definition in reversed(constraints):
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
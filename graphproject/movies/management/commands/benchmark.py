@@ -0,0 +1,109 @@
+import json
+import platform
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from movies.benchmarks import BENCHMARKS, DATABASE_BENCHMARKS
+from movies.models import Artists, Movies
+from tools.benchmarks import compare, flatten
+
+from .seed_graph import count
+
+
+class Command(BaseCommand):
+    help = (
+        "Run microbenchmarks and print the time per call in microseconds, the calls per "
+        "second and the memory of one call. Results can be saved as JSON, and compared "
+        "with a saved baseline: the command fails if a measure regressed by more than "
+        "the threshold. For example: python manage.py benchmark --seed --save baseline.json, "
+        "then python manage.py benchmark --seed --compare baseline.json"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Benchmarks to run: {', '.join(BENCHMARKS)}. All by default.")
+        parser.add_argument('--number', type=int, help="Calls per run, chosen automatically by default.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per measure.")
+        parser.add_argument('--seed', action='store_true',
+                            help="Run against a throwaway test database loaded by seed_graph, instead "
+                                 "of the configured one. Compare results of the same dataset only.")
+        parser.add_argument('--artists', type=count, default=20000, help="Artists of the seeded database.")
+        parser.add_argument('--movies', type=count, default=10000, help="Movies of the seeded database.")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the seeded database between runs.")
+        parser.add_argument('--save', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="Compare the results with this JSON file.")
+        parser.add_argument('--threshold', type=float, default=10,
+                            help="Regression threshold of --compare, in percent.")
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Invalid baseline {options['compare']}: {error}")
+            if not isinstance(baseline, dict) or 'results' not in baseline:
+                raise CommandError(f"Invalid baseline {options['compare']}: no results.")
+
+        with self.database(options):
+            if DATABASE_BENCHMARKS & set(names) and not Movies.objects.exists():
+                raise CommandError("The database has no movies, load some with seed_graph or use --seed.")
+            dataset = {'artists': Artists.objects.count(), 'movies': Movies.objects.count()}
+            results = {}
+            for name in names:
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                rows = BENCHMARKS[name](number=options['number'], repeat=options['repeat'])
+                for row in rows:
+                    cells = []
+                    for key, value in row.items():
+                        if isinstance(value, dict):
+                            value = (f"{value['best'] * 1e6:.2f} us (median {value['median'] * 1e6:.2f}, "
+                                     f"{value['ops']:.0f} ops/s, {value['allocations']} blocks, "
+                                     f"{value['peak_bytes']} B peak)")
+                        cells.append(f'{key}={value}')
+                    self.stdout.write('  ' + '  '.join(cells))
+                results.update(flatten(name, rows))
+
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump({'python': platform.python_version(), 'dataset': dataset,
+                           'results': results}, file, indent=2, sort_keys=True)
+        if baseline is not None:
+            if DATABASE_BENCHMARKS & set(names) and baseline.get('dataset') != dataset:
+                self.stdout.write(self.style.WARNING(
+                    f"The baseline was measured on {baseline.get('dataset')}, not on {dataset}."))
+            self.report(compare(results, baseline['results'], options['threshold']), options['threshold'])
+
+    def report(self, regressions: list, threshold: float) -> None:
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No measure regressed by more than {threshold:g}%."))
+            return
+        for key, value, reference, increase in regressions:
+            self.stdout.write(self.style.ERROR(f"  {key}: {value:.6g} instead of {reference:.6g} (+{increase:.1f}%)"))
+        raise CommandError(f"{len(regressions)} measures regressed by more than {threshold:g}%.")
+
+    @contextmanager
+    def database(self, options):
+        """
+        Switch to a test database loaded by `seed_graph` with --seed, for the duration of the block.
+        """
+        if not options['seed']:
+            yield
+            return
+        name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False,
+                                           keepdb=options['keepdb'])
+        try:
+            if not Movies.objects.exists():
+                call_command('seed_graph', artists=options['artists'], movies=options['movies'],
+                             skip_derived=True, stdout=self.stdout)
+            yield
+        finally:
+            connection.creation.destroy_test_db(name, verbosity=0, keepdb=options['keepdb'])
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from movies.cache import response_cache
+from movies.influence import CollaborationGraph, write_scores
+from movies.models import Artists
+
+PAGERANK = 'pagerank'
+DEGREE = 'degree'
+
+
+class Command(BaseCommand):
+    help = "Compute the influence of every artist in the collaboration graph and store it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--method', choices=[PAGERANK, DEGREE], default=PAGERANK,
+                            help="PageRank, or the number of credits shared with other artists.")
+        parser.add_argument('--damping', type=float, default=0.85, help="PageRank damping factor.")
+        parser.add_argument('--tolerance', type=float, default=1e-6,
+                            help="PageRank stops when the scores change by less, in L1 norm.")
+        parser.add_argument('--max-iterations', type=int, default=100, help="PageRank iterations at most.")
+        parser.add_argument('--chunk-size', type=int, default=100000, help="Rows per read and per update.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        graph = CollaborationGraph.load(options['chunk_size'])
+        loaded = time.perf_counter()
+        self.stdout.write(f"Loaded {graph.size} artists and {len(graph.weights)} edges "
+                          f"in {loaded - start:.2f} s.")
+
+        if options['method'] == PAGERANK:
+            scores, iterations, change = graph.pagerank(
+                options['damping'], options['tolerance'], options['max_iterations'])
+            status = 'converged' if change < options['tolerance'] else 'did not converge'
+            self.stdout.write(f"PageRank {status} after {iterations} iterations "
+                              f"(last change {change:.3g}).")
+        else:
+            scores = graph.degree()
+        computed = time.perf_counter()
+        self.stdout.write(f"Computed the scores in {computed - loaded:.2f} s.")
+
+        changed = write_scores(graph.artist_ids, scores, options['chunk_size'])
+        # The update does not send model signals
+        response_cache.invalidate(Artists)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {changed} artists in {time.perf_counter() - computed:.2f} s."))
@@ -0,0 +1,64 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.imports import FORMATS, IMPORTS, UnreadableCatalogue, file_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Import artists or movies from a CSV or JSON lines catalogue, in chunks. Records "
+        "are matched on their `id` column, so importing a file again updates its rows. "
+        "For example: python manage.py import_catalogue artists artists.csv, then "
+        "python manage.py import_catalogue movies movies.jsonl --resume"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTS), help="The kind of records.")
+        parser.add_argument('path', help="The catalogue file.")
+        parser.add_argument('--format', choices=sorted(set(FORMATS.values())),
+                            help="The file format, by default inferred from the extension.")
+        parser.add_argument('--chunk-size', type=int, help="Records per transaction.")
+        parser.add_argument('--resume', action='store_true',
+                            help="Skip the records imported by an interrupted run, see --checkpoint.")
+        parser.add_argument('--checkpoint', help="The checkpoint file, by default PATH.checkpoint.")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not count the collaborations nor hash the casts of the imported movies, "
+                                 "run rebuild_collaborations and rebuild_cast_index afterwards.")
+        parser.add_argument('--errors', help="Write the reported errors to this JSON lines file.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        catalogue_format = options['format'] or file_format(path)
+        if catalogue_format is None:
+            raise CommandError(f"Unknown format of {path}, use --format.")
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        if os.path.exists(checkpoint) and not options['resume']:
+            raise CommandError(f"{checkpoint} exists, resume with --resume or delete it.")
+
+        def progress(stats):
+            self.stdout.write(f"  {stats['processed']} records, {stats['created']} created, "
+                              f"{stats['updated']} updated, {stats['rejected']} rejected "
+                              f"({stats['seconds']:.1f} s)")
+
+        catalogue = IMPORTS[options['kind']](options['chunk_size'], progress, not options['skip_derived'])
+        try:
+            with open(path, newline='', encoding='utf-8') as file:
+                stats = catalogue.run(file, catalogue_format, checkpoint)
+        except FileNotFoundError:
+            raise CommandError(f"File not found: {path}")
+        except UnreadableCatalogue as error:
+            stats = error.stats
+            raise CommandError(
+                f"Could not read {path}, {error}. "
+                f"{stats['processed']} records were processed, {stats['created']} created, "
+                f"{stats['updated']} updated and {stats['rejected']} rejected.")
+
+        if options['errors']:
+            with open(options['errors'], 'w') as errors:
+                for error in stats['errors']:
+                    errors.write(json.dumps(error, default=str) + '\n')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['created']} new and {stats['updated']} updated {options['kind']}, "
+            f"rejected {stats['rejected']} records."))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from movies.similarity import rebuild
+
+
+class Command(BaseCommand):
+    help = "Compute the MinHash buckets of the cast of every movie, for the similar movies."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=100000, help="Rows per read and per insert.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        movies = rebuild(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed the casts of {movies} movies in {time.perf_counter() - start:.2f} s."))
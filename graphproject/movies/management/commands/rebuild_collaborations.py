@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from movies.collaborations import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recount the collaborations of every artist from the movie credits."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {rows} collaborations in {time.perf_counter() - start:.2f} s."))
@@ -0,0 +1,103 @@
+import argparse
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from movies import collaborations, similarity
+from movies.cache import response_cache
+from movies.models import Artists, Movies
+from movies.seeding import BLOCK_SIZE, GraphSeed, seed
+from movies.utils import Country
+
+SUFFIXES = {'k': 10 ** 3, 'm': 10 ** 6}
+
+
+def count(value: str) -> int:
+    """
+    Parse a number of rows, with an optional k or M suffix, e.g. 500k or 1M.
+    """
+    multiplier = SUFFIXES.get(value[-1:].lower(), 1)
+    try:
+        number = float(value[:-1] if multiplier > 1 else value) * multiplier
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a number of rows, got {value!r}")
+    if number < 0 or number != int(number):
+        raise argparse.ArgumentTypeError(f"Expected a number of rows, got {value!r}")
+    return int(number)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset of artists, movies and casts, and load "
+        "it with COPY. For example: python manage.py seed_graph --artists 1M --movies 500k "
+        "--avg-cast 15 --seed 1 --flush"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--artists', type=count, default=10000, help="Number of artists, e.g. 1M.")
+        parser.add_argument('--movies', type=count, default=5000, help="Number of movies, e.g. 500k.")
+        parser.add_argument('--avg-cast', type=float, default=15, help="Mean number of actors per movie.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the random numbers.")
+        parser.add_argument('--flush', action='store_true',
+                            help="Delete every artist and movie first, so the ids are the same on every run.")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not count the collaborations nor hash the casts of the new movies.")
+
+    def handle(self, *args, **options):
+        try:
+            countries = Country().codes
+        except FileNotFoundError as error:
+            raise CommandError(f"Countries file not found: {error.filename}")
+        graph = GraphSeed(options['artists'], options['movies'], options['avg_cast'],
+                          options['seed'], countries)
+
+        if options['flush']:
+            tables = ', '.join(connection.ops.quote_name(model._meta.db_table)
+                               for model in (Artists, Movies))
+            with connection.cursor() as cursor:
+                cursor.execute(f'TRUNCATE {tables} RESTART IDENTITY CASCADE')
+
+        start = time.perf_counter()
+        reported = {}
+
+        def progress(table, rows):
+            if options['verbosity'] > 1 or rows - reported.get(table, 0) >= 10 * BLOCK_SIZE:
+                reported[table] = rows
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"  {table}: {rows} rows ({elapsed:.1f} s)")
+
+        result = seed(graph, progress)
+        loaded = time.perf_counter()
+        rows = sum(result['rows'].values())
+        self.stdout.write(', '.join(f"{rows} rows into {table}" for table, rows in result['rows'].items())
+                          + f" in {loaded - start:.1f} s ({rows / max(loaded - start, 1e-9):.0f} rows/s).")
+
+        with connection.cursor() as cursor:
+            for table in result['rows']:
+                cursor.execute(f'ANALYZE {table}')
+
+        if not options['skip_derived']:
+            self.derive(result['first_movie_id'], graph.movies, options['flush'])
+            self.stdout.write(f"Counted the collaborations and hashed the casts "
+                              f"in {time.perf_counter() - loaded:.1f} s.")
+        # The rows were loaded without sending model signals
+        response_cache.invalidate(Movies)
+        response_cache.invalidate(Artists)
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def derive(self, first_movie_id: int, movies: int, flushed: bool) -> None:
+        """
+        Update the collaborations and the cast buckets with the loaded movies.
+
+        Into emptied tables they are rebuilt with set-based queries, otherwise the
+        new movies are added block by block.
+        """
+        if flushed:
+            collaborations.rebuild()
+            similarity.rebuild(BLOCK_SIZE * 5)
+            return
+        for start in range(first_movie_id, first_movie_id + movies, BLOCK_SIZE):
+            movie_ids = list(range(start, min(start + BLOCK_SIZE, first_movie_id + movies)))
+            collaborations.add_credits(movie_ids)
+            similarity.index_casts(movie_ids)
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_alter_movies_production_year'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artists',
+            index=models.Index(fields=['full_name', 'id'], name='movies_arti_full_na_c5cc8b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movies',
+            index=models.Index(fields=['production_year', 'id'], name='movies_movi_product_6beb8b_idx'),
+        ),
+    ]
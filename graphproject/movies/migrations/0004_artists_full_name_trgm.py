@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:31
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='artists',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(
+                django.db.models.functions.text.Upper('full_name'), name='gin_trgm_ops'), name='artists_full_name_trgm'),
+        ),
+    ]
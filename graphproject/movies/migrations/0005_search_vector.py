@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:33
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+import movies.variables as variables
+
+
+def search_vector_trigger(table, column):
+    """
+    Keep `search_vector` of `table` current on every insert and update, including
+    bulk inserts and COPY, then fill it for the existing rows.
+    """
+    trigger = f'{table}_search_vector_update'
+    return migrations.RunSQL(
+        sql=[
+            f"""
+            CREATE TRIGGER {trigger}
+            BEFORE INSERT OR UPDATE OF {column}, search_vector ON {table}
+            FOR EACH ROW EXECUTE FUNCTION
+            tsvector_update_trigger(search_vector, 'pg_catalog.{variables.SEARCH_CONFIG}', {column});
+            """,
+            f"""
+            UPDATE {table}
+            SET search_vector = to_tsvector('pg_catalog.{variables.SEARCH_CONFIG}', {column});
+            """,
+        ],
+        reverse_sql=f'DROP TRIGGER IF EXISTS {trigger} ON {table};',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_artists_full_name_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artists',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='movies',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        search_vector_trigger('movies_artists', 'full_name'),
+        search_vector_trigger('movies_movies', 'name'),
+        migrations.AddIndex(
+            model_name='artists',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='artists_search_vector'),
+        ),
+        migrations.AddIndex(
+            model_name='movies',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='movies_search_vector'),
+        ),
+    ]
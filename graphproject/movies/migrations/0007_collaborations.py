@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Collaborations',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField()),
+                ('artist', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='collaborations', to='movies.artists')),
+                ('collaborator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='movies.artists')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['artist', '-count', 'collaborator'], name='collaborations_top')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='collaborations',
+            constraint=models.UniqueConstraint(fields=('artist', 'collaborator'), name='collaborations_pair'),
+        ),
+        # Count the collaborations of the existing credits
+        migrations.RunSQL(
+            sql="""
+                WITH credits AS (
+                    SELECT artists_id AS artist, movies_id AS movie FROM movies_movies_actors
+                    UNION
+                    SELECT director_id, id FROM movies_movies WHERE director_id IS NOT NULL
+                )
+                INSERT INTO movies_collaborations (artist_id, collaborator_id, count)
+                SELECT credit.artist, other.artist, COUNT(*)
+                FROM credits credit
+                JOIN credits other ON other.movie = credit.movie AND other.artist <> credit.artist
+                GROUP BY credit.artist, other.artist
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_collaborations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artists',
+            name='influence',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='artists',
+            index=models.Index(fields=['influence', 'id'], name='movies_arti_influen_db24ed_idx'),
+        ),
+    ]
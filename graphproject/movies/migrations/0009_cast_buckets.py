@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-16 23:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_artists_influence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CastBuckets',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(db_index=True)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='movies.movies')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-16 23:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_cast_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artists',
+            name='external_id',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='movies',
+            name='external_id',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
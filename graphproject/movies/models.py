@@ -1,5 +1,8 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 import movies.variables as variables
@@ -20,6 +23,27 @@ class Artists(models.Model):
         verbose_name=_(variables.DATE_OF_BIRTH_VERBOSE),
         # validators=[YearValidator.max_year_validator] # TODO uncomment this
     )
+    # Filled from `full_name` by a database trigger, see migration 0005
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Validator of the conditional GET requests
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Centrality in the collaboration graph, written by the `compute_influence` command
+    influence = models.FloatField(default=0, editable=False)
+    # Id in the catalogue the artist was imported from, see `movies.imports`
+    external_id = models.CharField(max_length=64, null=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination ordered by name
+            models.Index(fields=['full_name', 'id']),
+            # Keyset pagination ordered by influence
+            models.Index(fields=['influence', 'id']),
+            # Trigram index serving `icontains` lookups,
+            # which compile to `UPPER(full_name) LIKE UPPER('%...%')`
+            GinIndex(OpClass(Upper('full_name'), name='gin_trgm_ops'),
+                     name='artists_full_name_trgm'),
+            GinIndex(fields=['search_vector'], name='artists_search_vector'),
+        ]
 
 
 class Movies(models.Model):
@@ -44,3 +68,72 @@ class Movies(models.Model):
         related_name=variables.MOVIES_ACTORS_RELATED_NAME,
         verbose_name=_(variables.ACTORS_VERBOSE)
     )
+    # Filled from `name` by a database trigger, see migration 0005
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Validator of the conditional GET requests, also bumped by changes of `actors`
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Id in the catalogue the movie was imported from, see `movies.imports`
+    external_id = models.CharField(max_length=64, null=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination ordered by production year
+            models.Index(fields=['production_year', 'id']),
+            GinIndex(fields=['search_vector'], name='movies_search_vector'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The director collaborations are uncounted before the save and counted
+        # after it, see `signals.subtract_director_collaborations`
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class Collaborations(models.Model):
+    """
+    Number of movies two artists both acted in or directed.
+
+    Every pair is stored in both directions, so the collaborators of an artist
+    are one range of the (artist, -count) index. Kept up to date by the signals
+    of `movies.signals`, and rebuilt by the `rebuild_collaborations` command.
+    """
+    artist = models.ForeignKey(
+        Artists,
+        on_delete=models.CASCADE,
+        # Served by the indexes below
+        db_index=False,
+        related_name=variables.COLLABORATIONS_RELATED_NAME,
+    )
+    collaborator = models.ForeignKey(
+        Artists,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['artist', 'collaborator'],
+                                    name='collaborations_pair'),
+        ]
+        indexes = [
+            # Top collaborators of an artist
+            models.Index(fields=['artist', '-count', 'collaborator'],
+                         name='collaborations_top'),
+        ]
+
+
+class CastBuckets(models.Model):
+    """
+    Locality sensitive hashing buckets of the MinHash signature of a movie cast.
+
+    Movies sharing a bucket likely have similar casts, see `movies.similarity`.
+    Kept up to date when the actors change, and rebuilt by the `rebuild_cast_index`
+    command.
+    """
+    movie = models.ForeignKey(
+        Movies,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    bucket = models.BigIntegerField(db_index=True)
@@ -0,0 +1,283 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+import movies.variables as variables
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a stable, unique ordering.
+
+    Every page is fetched with a ``WHERE (key) > (position) ORDER BY key LIMIT n``
+    query, so the cost of a page does not depend on how deep the client pages.
+    The ordering always ends with the primary key, which makes the key unique and
+    the position of every row unambiguous.
+
+    Attributes
+    ----------
+    page_size : int
+        The default number of rows per page.
+    max_page_size : int
+        The upper bound for the ``page_size`` query param.
+    ordering : tuple
+        The default ordering, it must end with the primary key.
+    ordering_fields : tuple
+        Additional fields clients may order by using the ``ordering`` query param.
+
+    Methods
+    -------
+    paginate_queryset(queryset, request, view=None) -> list
+        Returns the rows of the requested page.
+    apaginate_queryset(queryset, request, view=None) -> list
+        Returns the rows of the requested page, using the async ORM.
+    get_paginated_response(data) -> Response
+        Wraps the page data with the next and previous links.
+    """
+    page_size = settings.PAGINATION_PAGE_SIZE
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    page_size_query_param = variables.PAGE_SIZE
+    cursor_query_param = variables.CURSOR
+    ordering_query_param = variables.ORDERING
+    ordering = ('pk',)
+    ordering_fields = ()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Fetch the page of rows following (or preceding) the requested cursor.
+
+        Parameters
+        ----------
+        queryset : django.db.models.query.QuerySet
+            The (filtered) queryset to paginate.
+        request : rest_framework.request.Request
+            The HTTP request object.
+
+        Returns
+        -------
+        list
+            The rows of the requested page.
+        """
+        page = self.get_page_queryset(queryset, request)
+        return self.set_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Asynchronous version of `paginate_queryset`, prefetches run asynchronously too.
+        """
+        page = self.get_page_queryset(queryset, request)
+        return self.set_page([row async for row in page.aiterator(chunk_size=self.limit + 1)])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Resolve the requested page and build the query fetching it, plus one row
+        telling whether there are more.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_page_size(request)
+        self.key = self.get_ordering(request)
+        position, self.reverse = self.decode_cursor(request)
+        self.position = self.clean_position(queryset, position)
+
+        ordering = self.key
+        if self.reverse:
+            ordering = [self.invert(field) for field in ordering]
+        queryset = self.filter_queryset(queryset, ordering, self.position)
+        return queryset[:self.limit + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        self.page = results
+        return self.page
+
+    def get_paginated_response(self, data):
+        """
+        Build the paginated response.
+
+        Parameters
+        ----------
+        data : list
+            The serialized rows of the page.
+
+        Returns
+        -------
+        Response
+            A response object containing the next and previous links and the results.
+        """
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request):
+        """
+        Resolve the ordering requested by the client.
+
+        Unknown values fall back to the default ordering. The primary key is always
+        appended as a tie-breaker, so the resulting key is unique.
+        """
+        value = request.query_params.get(self.ordering_query_param)
+        if value and value.lstrip('-') in self.ordering_fields:
+            return (value, '-pk' if value.startswith('-') else 'pk')
+        return tuple(self.ordering)
+
+    def filter_queryset(self, queryset, ordering, position):
+        """
+        Order the queryset by the key and keep the rows after the position.
+        """
+        if position is not None:
+            queryset = queryset.filter(self.build_filter(ordering, position))
+        return queryset.order_by(*ordering)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        """
+        Build the url pointing at the page after (or before) the given row.
+        """
+        position = [self.get_value(instance, field) for field in self.key]
+        payload = json.dumps({'p': position, 'r': int(reverse)},
+                             separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Decode the opaque cursor of the request.
+
+        Returns
+        -------
+        tuple
+            The position (or None for the first page) and the paging direction.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position, reverse = payload['p'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(variables.INVALID_CURSOR)
+        if not isinstance(position, list) or len(position) != len(self.key):
+            raise NotFound(variables.INVALID_CURSOR)
+        return position, reverse
+
+    def clean_position(self, queryset, position):
+        """
+        Convert the values of a decoded position with the fields of the key.
+
+        Cursors come from the client, a value of the wrong type would otherwise
+        fail when the page is queried.
+        """
+        if position is None:
+            return None
+        try:
+            return [self.clean_value(queryset, field.lstrip('-'), value)
+                    for field, value in zip(self.key, position)]
+        except (DjangoValidationError, TypeError, ValueError):
+            raise NotFound(variables.INVALID_CURSOR)
+
+    @staticmethod
+    def clean_value(queryset, name, value):
+        if value is None or isinstance(value, (list, dict)):
+            raise ValueError(value)
+        meta = queryset.model._meta
+        try:
+            field = meta.pk if name == 'pk' else meta.get_field(name)
+        except FieldDoesNotExist:
+            field = queryset.query.annotations[name].output_field
+        return field.to_python(value)
+
+    @staticmethod
+    def build_filter(ordering, position):
+        """
+        Build the row-value comparison ``(a, b, ...) > (x, y, ...)`` as a ``Q`` object.
+        """
+        condition = Q()
+        for index in reversed(range(len(ordering))):
+            field = ordering[index].lstrip('-')
+            lookup = 'lt' if ordering[index].startswith('-') else 'gt'
+            term = Q(**{f'{field}__{lookup}': position[index]})
+            if index < len(ordering) - 1:
+                term |= Q(**{field: position[index]}) & condition
+            condition = term
+        return condition
+
+    @staticmethod
+    def get_value(instance, field):
+        if isinstance(instance, dict):
+            return instance[field.lstrip('-')]
+        return getattr(instance, field.lstrip('-'))
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+
+class MoviesPagination(KeysetPagination):
+    ordering_fields = (variables.PRODUCTION_YEAR,)
+
+
+class ArtistsPagination(KeysetPagination):
+    ordering_fields = (variables.FULL_NAME, variables.INFLUENCE)
+
+
+class SearchPagination(KeysetPagination):
+    """
+    Keyset pagination of the mixed movie and artist search results.
+
+    The paginated "queryset" is the list of per-model search querysets. The
+    position is applied to each of them before they are combined with
+    `UNION ALL`, so every branch only reads the rows after the cursor.
+    """
+    ordering = ('-rank', 'kind', 'id')
+
+    def clean_position(self, queryset, position):
+        # The branches have the same columns
+        return super().clean_position(queryset[0], position)
+
+    def filter_queryset(self, queryset, ordering, position):
+        if position is not None:
+            condition = self.build_filter(ordering, position)
+            queryset = [branch.filter(condition) for branch in queryset]
+        first, *others = queryset
+        return first.union(*others, all=True).order_by(*ordering)
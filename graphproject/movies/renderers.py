@@ -0,0 +1,79 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """
+    File-like object returning what is written to it, used to stream `csv.writer` rows.
+    """
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renderer of newline delimited JSON, one object per line.
+
+    Methods
+    -------
+    stream(rows, fields) -> generator
+        Yields the encoded lines of the given rows one by one.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
+
+    def stream(self, rows, fields=None):
+        encoder = DjangoJSONEncoder(separators=(',', ':'))
+        for row in rows:
+            yield encoder.encode(row) + '\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renderer of comma separated values, with a header line.
+
+    List values (e.g. actor ids) are written as one `;` separated cell.
+
+    Methods
+    -------
+    stream(rows, fields) -> generator
+        Yields the header and the encoded lines of the given rows one by one.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    list_separator = ';'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not data:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        if not isinstance(rows[0], dict):
+            # Plain messages, e.g. errors
+            return ''.join(self.stream([[row] for row in rows])).encode(self.charset)
+        return ''.join(self.stream(rows, list(rows[0]))).encode(self.charset)
+
+    def stream(self, rows, fields=None):
+        writer = csv.writer(Echo())
+        if fields is None:
+            for row in rows:
+                yield writer.writerow(row)
+            return
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([self.encode(row[field]) for field in fields])
+
+    def encode(self, value):
+        if isinstance(value, (list, tuple)):
+            return self.list_separator.join(str(item) for item in value)
+        return value
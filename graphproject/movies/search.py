@@ -0,0 +1,46 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import CharField, F, FloatField, Value
+from django.db.models.functions import Cast
+
+import movies.variables as variables
+
+from .models import Artists, Movies
+
+
+def search_querysets(text: str) -> list:
+    """
+    Build the full-text search querysets of movies and artists.
+
+    Both querysets select the same columns (`kind`, `id`, `title`, `rank`), so they
+    can be combined with `UNION ALL`. Matching rows are found through the GIN index
+    of `search_vector` and only those are ranked.
+
+    Parameters
+    ----------
+    text : str
+        The search query, in web search syntax (`"quoted phrases"`, `or`, `-word`).
+
+    Returns
+    -------
+    list
+        The movies and the artists querysets.
+    """
+    query = SearchQuery(text, config=variables.SEARCH_CONFIG,
+                        search_type='websearch')
+    querysets = []
+    for model, kind, title in (
+        (Movies, variables.SEARCH_KIND_MOVIE, variables.NAME),
+        (Artists, variables.SEARCH_KIND_ARTIST, variables.FULL_NAME),
+    ):
+        querysets.append(
+            model.objects
+            .filter(search_vector=query)
+            .annotate(
+                kind=Value(kind, output_field=CharField()),
+                title=F(title),
+                # `ts_rank` is a real, cast it so the cursor value round-trips exactly
+                rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+            )
+            .values('kind', 'id', 'title', 'rank')
+        )
+    return querysets
@@ -0,0 +1,226 @@
+import datetime
+
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .loading import bulk_load, copy_rows, reserve_ids
+from .models import Artists, Movies
+
+# Rows generated and loaded per `COPY`. The random numbers of a block only depend
+# on the seed and the block number, so changing it changes the dataset.
+BLOCK_SIZE = 20000
+# Share of the movies with a director, every artist directs at most one movie
+DIRECTED_SHARE = 0.9
+# Tail of the cast sizes, P(size > s) decreases like s ** -CAST_SIZE_EXPONENT
+CAST_SIZE_EXPONENT = 3
+MAX_CAST_SIZE = 200
+# The actor of popularity rank r is picked with a weight of r ** -POPULARITY_EXPONENT
+POPULARITY_EXPONENT = 0.5
+# Movies get more frequent over time, tenfold every YEAR_GROWTH * ln(10) years
+FIRST_PRODUCTION_YEAR = 1888
+YEAR_GROWTH = 25
+# Artists are at least MIN_AGE years old
+FIRST_BIRTH_YEAR = 1900
+MIN_AGE = 18
+
+SYLLABLES = ['an', 'bel', 'cor', 'da', 'el', 'fa', 'gor', 'ha', 'is', 'jo', 'ka', 'lin',
+             'mar', 'no', 'or', 'pe', 'qui', 'ra', 'sa', 'ten', 'ul', 'vi', 'wen', 'xa',
+             'yo', 'zel', 'ber', 'cas', 'dor', 'mi']
+ADJECTIVES = ['Silent', 'Last', 'Golden', 'Broken', 'Hidden', 'Red', 'Lost', 'Endless',
+              'Dark', 'Wild', 'Distant', 'Final', 'Secret', 'Burning', 'Cold', 'Little',
+              'Eternal', 'Forgotten', 'Midnight', 'Blue']
+NOUNS = ['River', 'Night', 'City', 'Garden', 'Storm', 'Road', 'Kingdom', 'Mirror', 'Island',
+         'Summer', 'Shadow', 'Promise', 'Frontier', 'Station', 'Empire', 'Heart', 'Winter',
+         'Harbor', 'Machine', 'Voyage']
+
+# Streams of random numbers, see `GraphSeed.generator`
+NAMES, POPULARITY, DIRECTORS, ARTISTS, MOVIES, CASTS = range(6)
+
+
+class GraphSeed:
+    """
+    Deterministic synthetic dataset of artists, movies and casts.
+
+    Cast sizes have a power-law tail around `avg_cast` actors, and actors are
+    picked by a power-law popularity, so a few artists play in many movies and
+    most in a handful. Countries are valid codes with a skewed distribution,
+    production years get more frequent over time and artists are born between
+    1900 and 18 years ago. Rows are generated with numpy in blocks of `BLOCK_SIZE`,
+    each block from its own generator, so a seed always gives the same rows.
+
+    Attributes
+    ----------
+    artists, movies : int
+        The numbers of artists and movies.
+    avg_cast : float
+        The mean number of actors per movie, before removing duplicate picks.
+    seed : int
+        The seed of the random numbers.
+    countries : list
+        The ISO Alpha-2 codes of the countries.
+
+    Methods
+    -------
+    artist_rows(block, first_id) -> list
+        Returns the `COPY` lines of a block of artists.
+    movie_rows(block, first_id, first_artist_id) -> list
+        Returns the `COPY` lines of a block of movies.
+    cast_rows(block, first_id, first_artist_id) -> list
+        Returns the `COPY` lines of the actors of a block of movies.
+    """
+
+    def __init__(self, artists: int, movies: int, avg_cast: float, seed: int, countries) -> None:
+        self.artists = artists
+        self.movies = movies
+        self.avg_cast = avg_cast
+        self.seed = seed
+        self.countries = np.array(sorted(countries))
+        self.now = timezone.now()
+        self.updated_at = self.now.isoformat()
+
+        generator = self.generator(NAMES)
+        self.first_names = self.words(generator, 4000, 2, 3)
+        self.last_names = self.words(generator, 16000, 2, 4)
+        # Country weights follow Zipf's law, in a random order
+        weights = 1 / np.arange(1, len(self.countries) + 1)
+        self.country_weights = generator.permutation(weights / weights.sum())
+
+        # Actors by popularity rank, and the cumulative weights of the ranks
+        generator = self.generator(POPULARITY)
+        self.by_popularity = generator.permutation(artists)
+        weights = np.arange(1, artists + 1, dtype=np.float64) ** -POPULARITY_EXPONENT
+        self.popularity = np.cumsum(weights / weights.sum())
+        # Distinct directors, in movie order
+        self.directors = self.generator(DIRECTORS).permutation(artists)
+
+        last_year = self.now.year
+        years = np.arange(FIRST_PRODUCTION_YEAR, last_year + 1)
+        weights = np.exp((years - FIRST_PRODUCTION_YEAR) / YEAR_GROWTH)
+        self.years, self.year_weights = years, weights / weights.sum()
+        self.first_birth = datetime.date(FIRST_BIRTH_YEAR, 1, 1)
+        self.birth_days = (datetime.date(last_year - MIN_AGE, 1, 1) - self.first_birth).days
+
+    def generator(self, stream: int, block: int = 0):
+        return np.random.default_rng([self.seed, stream, block])
+
+    @staticmethod
+    def words(generator, count: int, min_syllables: int, max_syllables: int) -> list:
+        lengths = generator.integers(min_syllables, max_syllables + 1, count)
+        syllables = generator.integers(0, len(SYLLABLES), (count, max_syllables))
+        return [''.join(SYLLABLES[index] for index in row[:length]).capitalize()
+                for row, length in zip(syllables.tolist(), lengths.tolist())]
+
+    @staticmethod
+    def blocks(count: int) -> range:
+        return range((count + BLOCK_SIZE - 1) // BLOCK_SIZE)
+
+    @staticmethod
+    def bounds(block: int, count: int) -> tuple:
+        return block * BLOCK_SIZE, min((block + 1) * BLOCK_SIZE, count)
+
+    def artist_rows(self, block: int, first_id: int) -> list:
+        start, stop = self.bounds(block, self.artists)
+        size = stop - start
+        generator = self.generator(ARTISTS, block)
+        first = generator.integers(0, len(self.first_names), size).tolist()
+        last = generator.integers(0, len(self.last_names), size).tolist()
+        countries = generator.choice(self.countries, size, p=self.country_weights).tolist()
+        days = generator.integers(0, self.birth_days, size).tolist()
+        return [
+            f'{first_id + start + index}\t{self.first_names[first[index]]} {self.last_names[last[index]]}'
+            f'\t{countries[index]}\t{self.first_birth + datetime.timedelta(days=days[index])}'
+            f'\t{self.updated_at}\t0'
+            for index in range(size)
+        ]
+
+    def movie_rows(self, block: int, first_id: int, first_artist_id: int) -> list:
+        start, stop = self.bounds(block, self.movies)
+        size = stop - start
+        generator = self.generator(MOVIES, block)
+        adjectives = generator.integers(0, len(ADJECTIVES), size).tolist()
+        nouns = generator.integers(0, len(NOUNS), size).tolist()
+        names = generator.integers(0, len(self.last_names), size).tolist()
+        patterns = generator.integers(0, 3, size).tolist()
+        years = generator.choice(self.years, size, p=self.year_weights).tolist()
+        directed = (generator.random(size) < DIRECTED_SHARE).tolist()
+
+        rows = []
+        for index in range(size):
+            adjective, noun = ADJECTIVES[adjectives[index]], NOUNS[nouns[index]]
+            name = (f'The {adjective} {noun}', f'{noun} of {self.last_names[names[index]]}',
+                    f'{adjective} {self.last_names[names[index]]}')[patterns[index]]
+            movie = start + index
+            director = (str(first_artist_id + self.directors[movie])
+                        if directed[index] and movie < self.artists else '\\N')
+            rows.append(f'{first_id + movie}\t{name}\t{years[index]}\t{director}\t{self.updated_at}')
+        return rows
+
+    def cast_rows(self, block: int, first_id: int, first_artist_id: int) -> list:
+        start, stop = self.bounds(block, self.movies)
+        generator = self.generator(CASTS, block)
+        if not self.artists or self.avg_cast <= 0:
+            return []
+        # Lomax distributed sizes shifted to start at one actor, with a mean of `avg_cast`
+        scale = max(self.avg_cast - 0.5, 0) * (CAST_SIZE_EXPONENT - 1)
+        sizes = 1 + np.floor(scale * generator.pareto(CAST_SIZE_EXPONENT, stop - start))
+        sizes = np.minimum(sizes, min(MAX_CAST_SIZE, self.artists)).astype(np.int64)
+
+        movies = np.repeat(np.arange(start, stop, dtype=np.int64), sizes)
+        ranks = np.searchsorted(self.popularity, generator.random(len(movies)), side='right')
+        artists = self.by_popularity[np.minimum(ranks, self.artists - 1)]
+        # Popular actors may be picked twice for a movie
+        credits = np.unique(movies * self.artists + artists)
+        movies, artists = np.divmod(credits, self.artists)
+        return list(map('{}\t{}'.format, (movies + first_id).tolist(),
+                        (artists + first_artist_id).tolist()))
+
+
+def seed(graph: GraphSeed, progress=None) -> dict:
+    """
+    Load a generated dataset with `COPY`, in one transaction.
+
+    The ids are allocated after the existing rows, so a seed gives the same ids
+    when loaded into empty tables. The foreign keys and secondary indexes of the
+    tables are created again after the load, see `loading.bulk_load`. Loading
+    bypasses the model signals, the derived tables are left to the caller.
+
+    Parameters
+    ----------
+    graph : GraphSeed
+        The dataset.
+    progress : callable, optional
+        Called with the table name and the number of rows loaded so far, after every block.
+
+    Returns
+    -------
+    dict
+        The first artist id, the first movie id and the number of rows loaded per table.
+    """
+    artists = connection.ops.quote_name(Artists._meta.db_table)
+    movies = connection.ops.quote_name(Movies._meta.db_table)
+    through = Movies.actors.through
+    actors = connection.ops.quote_name(through._meta.db_table)
+    progress = progress or (lambda table, rows: None)
+
+    loaded = {artists: 0, movies: 0, actors: 0}
+    tables = [Artists._meta.db_table, Movies._meta.db_table, through._meta.db_table]
+    with transaction.atomic(), connection.cursor() as cursor, bulk_load(cursor, tables):
+        first_artist_id = reserve_ids(cursor, Artists, graph.artists)
+        first_movie_id = reserve_ids(cursor, Movies, graph.movies)
+        for block in graph.blocks(graph.artists):
+            loaded[artists] += copy_rows(
+                cursor, artists, ['id', 'full_name', 'country', 'dob', 'updated_at', 'influence'],
+                graph.artist_rows(block, first_artist_id))
+            progress(artists, loaded[artists])
+        for block in graph.blocks(graph.movies):
+            loaded[movies] += copy_rows(
+                cursor, movies, ['id', 'name', 'production_year', 'director_id', 'updated_at'],
+                graph.movie_rows(block, first_movie_id, first_artist_id))
+            progress(movies, loaded[movies])
+        for block in graph.blocks(graph.movies):
+            loaded[actors] += copy_rows(
+                cursor, actors, ['movies_id', 'artists_id'],
+                graph.cast_rows(block, first_movie_id, first_artist_id))
+            progress(actors, loaded[actors])
+    return {'first_artist_id': first_artist_id, 'first_movie_id': first_movie_id, 'rows': loaded}
@@ -1,23 +1,77 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import QuerySet
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+import movies.variables as variables
 
 from .models import Artists, Movies
 
 
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """
+    Many related field which resolves all the given primary keys with one query.
+
+    The default `ManyRelatedField` validates its items one by one, which runs one
+    `SELECT` per primary key. This field loads every referenced object with a
+    single `IN` query and keeps the error messages of the child relation.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pk_field = child.get_queryset().model._meta.pk
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(pk_field.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        objects = child.get_queryset().in_bulk(set(pks))
+        for item, pk in zip(data, pks):
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=item)
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key related field which uses `BulkManyRelatedField` when `many=True`.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
 class MovieSerializer(serializers.ModelSerializer):
     """
     Serializer for Movies model.
 
     Attributes:
     ----------
+    * `serializer_related_field`: ``class``
+        The field used for relations, it resolves the `actors` ids in one query.
     * `Meta`: ``class``
         Configuration class for the serializer.
 
         - `model`: ``Movie``
             The Movie model.
-        - `fields`: ``str`` or ``list``
-            The fields to include in the serialized representation.
+        - `exclude`: ``list``
+            The fields to leave out of the serialized representation.
     """
+    serializer_related_field = BulkPrimaryKeyRelatedField
 
     def get_queryset() -> QuerySet:
         return Movies.objects.all()
@@ -27,7 +81,7 @@ class MovieSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Movies
-        fields = '__all__'
+        exclude = ['search_vector', 'updated_at', 'external_id']
 
 
 class ArtistSerializer(serializers.ModelSerializer):
@@ -41,8 +95,8 @@ class ArtistSerializer(serializers.ModelSerializer):
 
         - `model`: ``Artists``
             The Artists model.
-        - `fields`: ``str`` or ``list``
-            The fields to include in the serialized representation.
+        - `exclude`: ``list``
+            The fields to leave out of the serialized representation.
     """
 
     def get_queryset(self) -> QuerySet:
@@ -50,8 +104,97 @@ class ArtistSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Artists
-        fields = '__all__'
+        exclude = ['search_vector', 'updated_at', 'influence', 'external_id']
+
+
+class MovieBulkSerializer(MovieSerializer):
+    """
+    Serializer validating the fields of one item of a movies bulk request.
+
+    Relations are validated as plain ids, so validating an item runs no query.
+    The bulk request resolves the ids of all its items at once.
+    """
+    director = serializers.IntegerField(allow_null=True)
+    actors = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False)
+
+
+class MovieImportSerializer(MovieSerializer):
+    """
+    Serializer validating one movie of an imported catalogue, see `movies.imports`.
+
+    The director and actors are artist names, resolved by the import, and the
+    movie is identified by its id in the catalogue.
+    """
+    external_id = serializers.CharField(max_length=64)
+    director = serializers.CharField(max_length=255, allow_null=True)
+    actors = serializers.ListField(
+        child=serializers.CharField(max_length=255), allow_empty=False)
+
+    class Meta(MovieSerializer.Meta):
+        exclude = ['search_vector', 'updated_at']
+
+
+class ArtistImportSerializer(ArtistSerializer):
+    """
+    Serializer validating one artist of an imported catalogue, see `movies.imports`.
+    """
+    external_id = serializers.CharField(max_length=64)
+
+    class Meta(ArtistSerializer.Meta):
+        exclude = ['search_vector', 'updated_at', 'influence']
 
 
 class EditActorsOfMovieSerializer(serializers.Serializer):
     actor_id = serializers.CharField(max_length=5)
+
+
+class EditActorSetOfMovieSerializer(serializers.Serializer):
+    """
+    Serializer for set-based changes of a movie's actors.
+
+    Attributes:
+    ----------
+    * `add`: ``list``
+        Ids of the actors to add to the movie.
+    * `remove`: ``list``
+        Ids of the actors to remove from the movie.
+    * `replace`: ``list``
+        Ids of the whole new cast, it excludes `add` and `remove`.
+    """
+    add = serializers.ListField(
+        child=serializers.IntegerField(), required=False)
+    remove = serializers.ListField(
+        child=serializers.IntegerField(), required=False)
+    replace = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(variables.INVALID_INPUT_DATA)
+        if variables.REPLACE in attrs and len(attrs) > 1:
+            raise serializers.ValidationError(variables.REPLACE_IS_EXCLUSIVE)
+        if set(attrs.get(variables.ADD, [])) & set(attrs.get(variables.REMOVE, [])):
+            raise serializers.ValidationError(variables.ADD_AND_REMOVE_OVERLAP)
+        return attrs
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """
+    Serializer for the rows of the full-text search.
+
+    Attributes:
+    ----------
+    * `kind`: ``str``
+        Either `movie` or `artist`.
+    * `id`: ``int``
+        The primary key of the movie or artist.
+    * `title`: ``str``
+        The movie name or the artist full name.
+    * `rank`: ``float``
+        The `ts_rank` of the row for the search query.
+    """
+    kind = serializers.CharField()
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    rank = serializers.FloatField()
@@ -0,0 +1,199 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+import movies.variables as variables
+
+from .cache import response_cache
+from .collaborations import add_credits, subtract_credits
+from .graph import graph_index
+from .models import Artists, Movies
+from .similarity import index_casts
+
+
+@receiver(post_save, sender=Movies)
+@receiver(post_delete, sender=Movies)
+def invalidate_movies(sender, **kwargs):
+    response_cache.invalidate(Movies)
+
+
+@receiver(post_save, sender=Artists)
+@receiver(post_delete, sender=Artists)
+def invalidate_artists(sender, **kwargs):
+    response_cache.invalidate(Artists)
+
+
+@receiver(m2m_changed, sender=Movies.actors.through)
+def invalidate_actors(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        response_cache.invalidate(Movies)
+
+
+@receiver(m2m_changed, sender=Movies.actors.through)
+def touch_actors_movies(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Bump `updated_at` of the movies whose actors changed.
+    """
+    if reverse:
+        # `instance` is an artist, a clear is only known before it happens
+        if action in ('post_add', 'post_remove') and pk_set:
+            movies = Movies.objects.filter(pk__in=pk_set)
+        elif action == 'pre_clear':
+            movies = Movies.objects.filter(actors=instance)
+        else:
+            return
+    else:
+        if action not in ('post_add', 'post_remove', 'post_clear') or (
+                action != 'post_clear' and not pk_set):
+            return
+        movies = Movies.objects.filter(pk=instance.pk)
+        instance.updated_at = timezone.now()
+    movies.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Artists)
+@receiver(pre_delete, sender=Artists)
+def touch_artist_movies(sender, instance, created=False, **kwargs):
+    """
+    Bump `updated_at` of the movies of a changed or deleted artist.
+
+    Movies are filtered by the names of their artists, and deleting an artist
+    updates its movies without sending signals.
+    """
+    if not created:
+        touch_movies_of([instance.pk])
+
+
+def touch_movies_of(artist_ids) -> None:
+    Movies.objects.filter(
+        Q(director__in=artist_ids) | Q(actors__in=artist_ids)
+    ).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Movies)
+@receiver(post_delete, sender=Movies)
+def refresh_movie_credits(sender, instance, **kwargs):
+    refresh_graph([instance.pk])
+
+
+@receiver(m2m_changed, sender=Movies.actors.through)
+def refresh_actors_credits(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        refresh_graph([instance.pk])
+    elif action == 'post_clear':
+        refresh_graph(artist_movies(instance.pk))
+    else:
+        refresh_graph(pk_set or ())
+
+
+@receiver(pre_delete, sender=Artists)
+def refresh_artist_credits(sender, instance, **kwargs):
+    # Credits are deleted or unset without sending signals
+    refresh_graph(artist_movies(instance.pk))
+
+
+def artist_movies(artist_id: int) -> list:
+    """
+    Get the movies credited to an artist in the graph index, if it is loaded.
+    """
+    if not graph_index.loaded:
+        return []
+    return graph_index.movies_of(np.array([artist_id], dtype=np.int64))[1].tolist()
+
+
+def refresh_graph(movie_ids) -> None:
+    """
+    Refresh the credits of the movies in the graph index, once the transaction commits.
+    """
+    movie_ids = list(movie_ids)
+    if graph_index.loaded and movie_ids:
+        transaction.on_commit(lambda: graph_index.refresh(movie_ids))
+
+
+@receiver(pre_save, sender=Movies)
+def subtract_director_collaborations(sender, instance, update_fields=None, **kwargs):
+    """
+    Uncount the collaborations of a movie whose director changes.
+
+    The saved director is read, and the row locked until `Movies.save` commits,
+    so the collaborations are only recounted when the director actually changes.
+    A new movie has no collaborations yet, its director is its only credit.
+    """
+    instance._director_changed = False
+    if instance._state.adding or (update_fields is not None and variables.DIRECTOR not in update_fields):
+        return
+    director_id = Movies.objects.select_for_update().filter(pk=instance.pk).values_list(
+        'director_id', flat=True).first()
+    if director_id != instance.director_id:
+        instance._director_changed = True
+        subtract_credits([instance.pk])
+
+
+@receiver(post_save, sender=Movies)
+def add_director_collaborations(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_director_changed', False):
+        add_credits([instance.pk])
+
+
+@receiver(pre_delete, sender=Movies)
+def subtract_movie_collaborations(sender, instance, **kwargs):
+    subtract_credits([instance.pk])
+
+
+@receiver(m2m_changed, sender=Movies.actors.through)
+def count_actors_collaborations(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Recount the collaborations of the movies whose actors change.
+
+    The collaborations of the movies are uncounted before the change and counted
+    again after it.
+    """
+    phase, change = action.split('_')
+    if change != 'clear' and not pk_set:
+        return
+    movie_ids = changed_movies(instance, phase, change, reverse, pk_set)
+    if phase == 'pre':
+        subtract_credits(movie_ids)
+    else:
+        add_credits(movie_ids)
+
+
+@receiver(m2m_changed, sender=Movies.actors.through)
+def index_actors_casts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Hash the new casts of the movies whose actors changed, once the transaction commits.
+    """
+    phase, change = action.split('_')
+    if phase != 'post' or (change != 'clear' and not pk_set):
+        return
+    movie_ids = list(changed_movies(instance, phase, change, reverse, pk_set))
+    transaction.on_commit(lambda: index_casts(movie_ids))
+
+
+@receiver(pre_delete, sender=Artists)
+def index_artist_casts(sender, instance, **kwargs):
+    # The actors of the artist are deleted without sending signals
+    movie_ids = list(Movies.objects.filter(actors=instance).values_list('pk', flat=True))
+    if movie_ids:
+        transaction.on_commit(lambda: index_casts(movie_ids))
+
+
+def changed_movies(instance, phase: str, change: str, reverse: bool, pk_set) -> list:
+    """
+    Get the movies whose actors a `m2m_changed` signal is about.
+    """
+    if not reverse:
+        return [instance.pk]
+    if change != 'clear':
+        return pk_set
+    if phase == 'pre':
+        # `instance` is an artist, its movies are only known before the clear
+        instance._cleared_movies = list(
+            Movies.objects.filter(actors=instance).values_list('pk', flat=True))
+    return getattr(instance, '_cleared_movies', [])
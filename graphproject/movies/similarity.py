@@ -0,0 +1,232 @@
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .influence import read_columns
+from .loading import bulk_load
+from .models import CastBuckets, Movies
+
+# Prime modulus of the hash functions, products of two values below it fit in int64
+PRIME = (1 << 31) - 1
+# Multiplier combining the rows of a band into one bucket
+BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class MinHash:
+    """
+    MinHash signatures of the casts and their locality sensitive hashing buckets.
+
+    A signature holds, for `bands * rows` random hash functions, the lowest hash
+    of the actors of a movie. Two casts agree on one hash with a probability
+    equal to their Jaccard similarity. Signatures are cut into `bands` bands of
+    `rows` hashes, and every band is hashed into a bucket: movies sharing a
+    bucket are candidates, which happens mostly above a similarity of about
+    `(1 / bands) ** (1 / rows)`.
+
+    Attributes
+    ----------
+    bands : int
+        The number of buckets per movie.
+    rows : int
+        The number of hashes per band.
+    seed : int
+        The seed of the hash functions, buckets built with other seeds do not match.
+
+    Methods
+    -------
+    signatures(offsets, artists) -> numpy.ndarray
+        Returns the signatures of casts stored as CSR rows.
+    buckets(signatures) -> numpy.ndarray
+        Returns the buckets of the signatures.
+    """
+
+    def __init__(self, bands: int, rows: int, seed: int) -> None:
+        self.bands = bands
+        self.rows = rows
+        generator = np.random.default_rng(seed)
+        self.multipliers = generator.integers(1, PRIME, bands * rows, dtype=np.int64)
+        self.increments = generator.integers(0, PRIME, bands * rows, dtype=np.int64)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.SIMILAR_MOVIES_BANDS, settings.SIMILAR_MOVIES_ROWS,
+                   settings.SIMILAR_MOVIES_SEED)
+
+    def signatures(self, offsets, artists):
+        """
+        Compute the signatures of non-empty casts.
+
+        Parameters
+        ----------
+        offsets : numpy.ndarray
+            The start of every cast in `artists`, followed by the length of `artists`.
+        artists : numpy.ndarray
+            The artist ids of the casts, one after the other.
+
+        Returns
+        -------
+        numpy.ndarray
+            One row of `bands * rows` hashes per cast.
+        """
+        artists = np.asarray(artists, dtype=np.int64) % PRIME
+        signatures = np.empty((len(offsets) - 1, len(self.multipliers)), dtype=np.int64)
+        if not len(signatures):
+            return signatures
+        for column, (multiplier, increment) in enumerate(zip(self.multipliers, self.increments)):
+            hashes = (multiplier * artists + increment) % PRIME
+            signatures[:, column] = np.minimum.reduceat(hashes, offsets[:-1])
+        return signatures
+
+    def buckets(self, signatures):
+        """
+        Hash every band of the signatures, with the band number, into a bucket.
+
+        Returns
+        -------
+        numpy.ndarray
+            One row of `bands` int64 buckets per signature.
+        """
+        rows = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        buckets = np.broadcast_to(np.arange(1, self.bands + 1, dtype=np.uint64),
+                                  rows.shape[:2]).copy()
+        for row in range(self.rows):
+            buckets = buckets * BAND_MULTIPLIER + rows[:, :, row]
+        return buckets.view(np.int64)
+
+    def cast_buckets(self, casts: dict) -> dict:
+        """
+        Get the buckets of a few casts.
+
+        Parameters
+        ----------
+        casts : dict
+            The artist ids of every movie.
+
+        Returns
+        -------
+        dict
+            The buckets of every movie with a non-empty cast.
+        """
+        casts = {movie: sorted(cast) for movie, cast in casts.items() if cast}
+        lengths = [len(cast) for cast in casts.values()]
+        offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+        artists = [artist for cast in casts.values() for artist in cast]
+        buckets = self.buckets(self.signatures(offsets, artists))
+        return dict(zip(casts, buckets.tolist()))
+
+
+def casts_of(movie_ids) -> dict:
+    """
+    Read the actors of the given movies with one query.
+    """
+    casts = {movie_id: set() for movie_id in movie_ids}
+    for movie_id, artist_id in Movies.actors.through.objects.filter(
+            movies_id__in=casts).values_list('movies_id', 'artists_id'):
+        casts[movie_id].add(artist_id)
+    return casts
+
+
+def write_buckets(movie_ids, buckets) -> None:
+    """
+    Insert the buckets of the movies, one row per bucket.
+    """
+    table = connection.ops.quote_name(CastBuckets._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {table} (movie_id, bucket)
+            SELECT * FROM unnest(%s::bigint[], %s::bigint[])
+        """, [movie_ids, buckets])
+
+
+def index_casts(movie_ids) -> None:
+    """
+    Replace the buckets of the given movies from their current actors.
+    """
+    casts = casts_of(set(movie_ids))
+    if not casts:
+        return
+    buckets = MinHash.from_settings().cast_buckets(casts)
+    with transaction.atomic():
+        CastBuckets.objects.filter(movie__in=casts).delete()
+        write_buckets([movie for movie, row in buckets.items() for _ in row],
+                      [bucket for row in buckets.values() for bucket in row])
+
+
+def rebuild(chunk_size: int) -> int:
+    """
+    Compute the buckets of every movie from scratch.
+
+    The actors are read through a server-side cursor and hashed with numpy, and
+    the buckets are written `chunk_size` rows per query, before the indexes are
+    created again, see `loading.bulk_load`.
+
+    Returns
+    -------
+    int
+        The number of movies with buckets.
+    """
+    through = connection.ops.quote_name(Movies.actors.through._meta.db_table)
+    movies, artists = read_columns(
+        f'SELECT movies_id, artists_id FROM {through} ORDER BY movies_id', chunk_size, width=2)
+    starts = np.flatnonzero(np.r_[True, movies[1:] != movies[:-1]])[:len(movies)]
+    offsets = np.append(starts, len(movies))
+
+    minhash = MinHash.from_settings()
+    buckets = minhash.buckets(minhash.signatures(offsets, artists))
+    movie_ids = np.repeat(movies[starts], minhash.bands)
+    buckets = buckets.ravel()
+
+    table = connection.ops.quote_name(CastBuckets._meta.db_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Pending foreign key checks would prevent the truncation
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(f'TRUNCATE {table}')
+            with bulk_load(cursor, [CastBuckets._meta.db_table]):
+                for start in range(0, len(buckets), chunk_size):
+                    write_buckets(movie_ids[start:start + chunk_size].tolist(),
+                                  buckets[start:start + chunk_size].tolist())
+    return len(starts)
+
+
+def similar_movies(movie_id: int, k: int) -> list:
+    """
+    Find the movies whose cast is the most similar to the cast of a movie.
+
+    Candidates share at least one bucket with the movie, at most
+    `settings.SIMILAR_MOVIES_MAX_CANDIDATES` of them, those sharing the most buckets
+    first. They are ranked by the exact Jaccard similarity of their casts.
+
+    Parameters
+    ----------
+    movie_id : int
+        The primary key of the movie.
+    k : int
+        The number of movies to return.
+
+    Returns
+    -------
+    list
+        `(movie id, similarity)` pairs, most similar first, or None if the movie has no actors.
+    """
+    cast = casts_of([movie_id])[movie_id]
+    if not cast:
+        return None
+    buckets = MinHash.from_settings().cast_buckets({movie_id: cast})[movie_id]
+    # The number of shared buckets estimates the similarity, keep the best candidates
+    candidates = CastBuckets.objects.filter(bucket__in=buckets).exclude(
+        movie=movie_id).values('movie').annotate(shared=Count('bucket')).order_by(
+        '-shared', 'movie').values_list('movie', flat=True)
+
+    # Casts of the candidates, in the same query
+    others = {}
+    for other, artist_id in Movies.actors.through.objects.filter(
+            movies_id__in=candidates[:settings.SIMILAR_MOVIES_MAX_CANDIDATES]
+    ).values_list('movies_id', 'artists_id'):
+        others.setdefault(other, set()).add(artist_id)
+
+    scores = [(other, len(cast & actors) / len(cast | actors))
+              for other, actors in others.items()]
+    scores.sort(key=lambda score: (-score[1], score[0]))
+    return [score for score in scores[:k] if score[1] > 0]
@@ -1,3 +1,1910 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count
+from django.test import (AsyncClient, TestCase, TransactionTestCase, modify_settings,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils.http import http_date
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.test import APIClient
+from rest_framework.throttling import AnonRateThrottle
+
+from tools.testing import CountriesFileMixin, QueryBudgetMixin
+
+from .cache import response_cache
+from .filters import MoviesFilter
+from .graph import Bipartite, Components, PathSearch, PathSearchTimeout, graph_index
+from .influence import CollaborationGraph
+from .collaborations import rebuild, subtract_credits
+from .models import Artists, CastBuckets, Collaborations, Movies
+from .pagination import MoviesPagination
+from .similarity import MinHash
+from .urls import async_read_urlpatterns
+from .utils import Country
+from .views import ArtistViewSet, MoviesViewSet
+from .validators import CountryValidator, InputSchema
+
+
+# URLconf of `AsyncReadTests`, serving the reads with the async views
+urlpatterns = [
+    path('', include(async_read_urlpatterns)),
+    path('', include('movies.urls')),
+]
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Tests for the cursor pagination of the movies and artists list endpoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index:02d}', country='US',
+                    dob=datetime.date(1970, 1, 1))
+            for index in range(12)
+        ])
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'Movie {index:02d}', production_year=2000 + index % 3)
+            for index in range(12)
+        ])
+        for movie in cls.movies[:6]:
+            movie.actors.add(cls.artists[0])
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache.clear()
+
+    def collect(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_walks_every_movie_once(self):
+        ids, pages = self.collect('/api/movies/?page_size=5')
+        self.assertEqual(ids, sorted(movie.pk for movie in self.movies))
+        self.assertEqual(pages, 3)
+
+    def test_orders_by_production_year_with_pk_tie_breaker(self):
+        ids, _ = self.collect('/api/movies/?page_size=4&ordering=-production_year')
+        expected = sorted(self.movies, key=lambda m: (-m.production_year, -m.pk))
+        self.assertEqual(ids, [movie.pk for movie in expected])
+
+    def test_previous_link_returns_the_previous_page(self):
+        first = self.client.get('/api/movies/?page_size=5')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(first.data['previous'])
+
+    def test_combines_with_filters(self):
+        ids, _ = self.collect(
+            '/api/movies/?page_size=4&actors=Artist 00')
+        self.assertEqual(ids, [movie.pk for movie in self.movies[:6]])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(MoviesPagination, 'max_page_size', 3):
+            response = self.client.get('/api/movies/?page_size=100')
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_artists_ordered_by_full_name(self):
+        ids, _ = self.collect('/api/artists/?page_size=5&ordering=full_name')
+        self.assertEqual(ids, [artist.pk for artist in self.artists])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/movies/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_crafted_cursors(self):
+        def cursor(position):
+            payload = json.dumps({'p': position, 'r': False}).encode()
+            return base64.urlsafe_b64encode(payload).decode()
+
+        for url, positions in [
+            ('/api/movies/?', [['abc'], [None], [{}], [[1, 2]]]),
+            ('/api/movies/?ordering=production_year&', [['abc', 1], [2000, 'abc']]),
+            ('/api/artists/?ordering=influence&', [['abc', 1], [{}, 1]]),
+            ('/api/search/?q=Movie&', [['abc', 'movie', 1], [1.0, 'movie', 'abc']]),
+        ]:
+            for position in positions:
+                with self.subTest(url=url, position=position):
+                    response = self.client.get(f'{url}cursor={cursor(position)}')
+                    self.assertEqual(response.status_code, 404)
+        # Values of the right type are accepted, as the cursors built by the server
+        response = self.client.get(f'/api/movies/?cursor={cursor(["3"])}')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Pin the number of queries of the movie and artist endpoints.
+
+    Every endpoint is exercised with a small and a larger dataset, and must stay
+    within the same budget for both.
+    """
+    sizes = (2, 20)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def seed(self, size):
+        Movies.objects.all().delete()
+        Artists.objects.all().delete()
+        artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index}', country='US',
+                    dob=datetime.date(1970, 1, 1))
+            for index in range(size + 1)
+        ])
+        movies = Movies.objects.bulk_create([
+            Movies(name=f'Movie {index}', production_year=2000,
+                   director=artists[index])
+            for index in range(size)
+        ])
+        for movie in movies:
+            movie.actors.set(artists)
+        return artists, movies
+
+    def test_movies_list(self):
+        for size in self.sizes:
+            self.seed(size)
+            # Page, actors and the aggregate of the conditional GET validators
+            with self.assertQueryBudget(3):
+                response = self.client.get('/api/movies/')
+            self.assertEqual(len(response.data['results']), size)
+
+    def test_movies_filter(self):
+        for size in self.sizes:
+            self.seed(size)
+            with self.assertQueryBudget(3):
+                response = self.client.get(
+                    '/api/movies/?director=Artist&actors=Artist 0,Artist 1')
+            self.assertEqual(response.status_code, 200)
+
+    def test_movies_retrieve(self):
+        for size in self.sizes:
+            _, movies = self.seed(size)
+            with self.assertQueryBudget(2):
+                response = self.client.get(f'/api/movies/{movies[0].pk}/')
+            self.assertEqual(len(response.data['actors']), size + 1)
+
+    def test_movies_update(self):
+        for size in self.sizes:
+            artists, movies = self.seed(size)
+            data = {
+                'name': 'Updated',
+                'production_year': 2001,
+                'director': artists[0].pk,
+                'actors': [artist.pk for artist in artists[1:]],
+            }
+            # Including the recount of the collaborations before and after each write,
+            # and the savepoint and director lock of the movie save
+            with self.assertQueryBudget(14):
+                response = self.client.put(
+                    f'/api/movies/{movies[0].pk}/', data, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['actors']), size)
+
+    def test_movies_update_unknown_actor(self):
+        artists, movies = self.seed(2)
+        data = {
+            'name': 'Updated',
+            'production_year': 2001,
+            'director': artists[0].pk,
+            'actors': [artists[1].pk, 0],
+        }
+        response = self.client.put(
+            f'/api/movies/{movies[0].pk}/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('actors', response.data['details'])
+
+    def test_artists_list(self):
+        for size in self.sizes:
+            self.seed(size)
+            with self.assertQueryBudget(2):
+                response = self.client.get('/api/artists/')
+            self.assertEqual(len(response.data['results']), size + 1)
+
+
+class TrigramIndexTests(TestCase):
+    """
+    Check the name filters of `MoviesFilter` can use the trigram index.
+
+    Sequential and plain index scans are disabled, so on the small seeded dataset
+    the planner picks the (bitmap only) GIN index whenever the query is able to use it.
+    """
+    index_name = 'artists_full_name_trgm'
+
+    @classmethod
+    def setUpTestData(cls):
+        artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index} Surname{index % 97}',
+                    country='US', dob=datetime.date(1970, 1, 1))
+            for index in range(2000)
+        ])
+        movies = Movies.objects.bulk_create([
+            Movies(name=f'Movie {index}', production_year=2000,
+                   director=artists[index])
+            for index in range(500)
+        ])
+        Movies.actors.through.objects.bulk_create([
+            Movies.actors.through(movies_id=movie.pk, artists_id=artist.pk)
+            for movie in movies
+            for artist in artists[movie.pk % 1500:movie.pk % 1500 + 5]
+        ])
+        with connection.cursor() as cursor:
+            # Move the rows out of the GIN pending list, as VACUUM would
+            cursor.execute('SELECT gin_clean_pending_list(%s::regclass)',
+                           [cls.index_name])
+            cursor.execute('ANALYZE')
+
+    def explain(self, params):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_indexscan = off')
+        queryset = MoviesFilter(params, queryset=Movies.objects.all()).qs
+        return queryset.explain()
+
+    def test_director_filter_uses_index(self):
+        self.assertIn(self.index_name, self.explain({'director': 'surname42'}))
+
+    def test_actors_filter_uses_index(self):
+        plan = self.explain({'actors': 'surname42,surname7'})
+        self.assertIn(self.index_name, plan)
+
+    def test_matching_is_case_insensitive_substring(self):
+        queryset = MoviesFilter(
+            {'director': 'RTIST 12 sUrNaMe'}, queryset=Movies.objects.all()).qs
+        self.assertEqual(
+            sorted(movie.director.full_name for movie in queryset),
+            sorted(artist.full_name for artist in Artists.objects.filter(
+                full_name__icontains='artist 12 surname', movies_director__isnull=False)))
+
+
+class MoviesFilterTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the actor and director filters of `MoviesFilter`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Actor {index:02d}', country='US',
+                    dob=datetime.date(1970, 1, 1))
+            for index in range(12)
+        ])
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'Movie {index}', production_year=2000,
+                   director=cls.artists[index])
+            for index in range(3)
+        ])
+        cls.movies[0].actors.set(cls.artists[:10])
+        cls.movies[1].actors.set(cls.artists[:5])
+        cls.movies[2].actors.set(cls.artists[10:])
+
+    def filter(self, params):
+        return list(MoviesFilter(params, queryset=Movies.objects.all()).qs)
+
+    def test_actors_requires_every_name(self):
+        names = ','.join(artist.full_name for artist in self.artists[:5])
+        self.assertEqual(
+            sorted(movie.pk for movie in self.filter({'actors': names})),
+            [self.movies[0].pk, self.movies[1].pk])
+
+    def test_actors_returns_no_duplicates(self):
+        # 'Actor 0' matches ten actors of the first movie
+        self.assertEqual(
+            sorted(movie.pk for movie in self.filter({'actors': 'Actor 0,Actor'})),
+            [self.movies[0].pk, self.movies[1].pk])
+
+    def test_actors_query_count_does_not_depend_on_names(self):
+        for count in (1, 5, 10):
+            names = ','.join(
+                artist.full_name for artist in self.artists[:count])
+            with self.assertQueryBudget(1):
+                movies = self.filter({'actors': names})
+            self.assertIn(self.movies[0], movies)
+
+    def test_actor_ids(self):
+        ids = ','.join(str(artist.pk) for artist in self.artists[3:7])
+        self.assertEqual(
+            [movie.pk for movie in self.filter({'actor_ids': ids})],
+            [self.movies[0].pk])
+
+    def test_director_id(self):
+        self.assertEqual(
+            self.filter({'director_id': self.artists[2].pk}), [self.movies[2]])
+
+    def test_ids_must_be_integers(self):
+        pk = self.artists[2].pk
+        for params in ({'director_id': f'{pk}.5'}, {'actor_ids': f'{pk},{pk}.5'}, {'actor_ids': '1e3'}):
+            self.assertFalse(MoviesFilter(params, queryset=Movies.objects.all()).is_valid())
+        response = self.client.get(f'/api/movies/?director_id={pk}.5')
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchTests(TestCase):
+    """
+    Tests for the full-text search endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artist = Artists.objects.create(
+            full_name='Stanley Kubrick', country='US', dob=datetime.date(1928, 7, 26))
+        Artists.objects.create(
+            full_name='Stanley Tucci', country='US', dob=datetime.date(1960, 11, 11))
+        cls.movie = Movies.objects.create(
+            name='Kubrick by Kubrick', production_year=2020)
+        Movies.objects.create(name='Space Odyssey', production_year=1968)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def search(self, text, **params):
+        return self.client.get('/api/search/', {'q': text, **params})
+
+    def test_mixed_results_ordered_by_rank(self):
+        response = self.search('kubrick')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['kind'], row['id']) for row in response.data['results']],
+            [('movie', self.movie.pk), ('artist', self.artist.pk)])
+
+    def test_paginates_results(self):
+        response = self.search('stanley or kubrick', page_size=2)
+        rows = response.data['results']
+        response = self.client.get(response.data['next'])
+        rows += response.data['results']
+        self.assertEqual(len(rows), 3)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(rows, sorted(rows, key=lambda row: -row['rank']))
+
+    def test_search_vector_follows_updates(self):
+        self.movie.name = 'Full Metal Jacket'
+        self.movie.save()
+        self.assertEqual(
+            [row['id'] for row in self.search('metal').data['results']],
+            [self.movie.pk])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.search('').status_code, 400)
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class ExportTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the streamed movie and artist exports.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index}', country='US',
+                    dob=datetime.date(1970, 1, index + 1))
+            for index in range(3)
+        ])
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'Movie, part {index}', production_year=2000 + index,
+                   director=cls.artists[index])
+            for index in range(3)
+        ])
+        cls.movies[0].actors.set(cls.artists[1:])
+        cls.movies[1].actors.set(cls.artists[:1])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode(), response
+
+    def test_movies_ndjson_in_one_query(self):
+        with self.assertQueryBudget(1):
+            content, response = self.export('/api/movies/export/')
+        self.assertEqual(response['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows[0], {
+            'id': self.movies[0].pk,
+            'name': 'Movie, part 0',
+            'production_year': 2000,
+            'director_id': self.artists[0].pk,
+            'actor_ids': sorted(artist.pk for artist in self.artists[1:]),
+        })
+        self.assertEqual(rows[2]['actor_ids'], [])
+
+    def test_movies_csv_with_filters(self):
+        content, _ = self.export(
+            f'/api/movies/export/?format=csv&actor_ids={self.artists[0].pk}')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows, [
+            ['id', 'name', 'production_year', 'director_id', 'actor_ids'],
+            [str(self.movies[1].pk), 'Movie, part 1', '2001',
+             str(self.artists[1].pk), str(self.artists[0].pk)],
+        ])
+
+    def test_artists_ndjson(self):
+        content, _ = self.export('/api/artists/export/?format=ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['dob'], '1970-01-01')
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class BulkTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the bulk create, update and delete endpoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index}', country='US',
+                    dob=datetime.date(1970, 1, 1))
+            for index in range(30)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def movie(self, index, **fields):
+        return {
+            'name': f'Movie {index}',
+            'production_year': 2000,
+            'director': self.artists[index].pk,
+            'actors': [artist.pk for artist in self.artists[index:index + 5]],
+            **fields,
+        }
+
+    def test_create_movies_in_constant_queries(self):
+        for count in (2, 20):
+            Movies.objects.all().delete()
+            items = [self.movie(index) for index in range(count)]
+            with self.assertQueryBudget(9):
+                response = self.client.post(
+                    '/api/movies/bulk/', items, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data), count)
+            self.assertEqual(response.data[1]['actors'], items[1]['actors'])
+        self.assertEqual(Movies.actors.through.objects.count(), 100)
+
+    def test_errors_are_reported_by_index(self):
+        items = [
+            self.movie(0),
+            self.movie(1, actors=[0]),
+            self.movie(2, production_year=1000),
+            self.movie(3, director=self.artists[0].pk),
+            {'name': 'Missing fields'},
+        ]
+        response = self.client.post('/api/movies/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = {row['index']: row['errors'] for row in response.data['details']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertIn('actors', errors[1])
+        self.assertIn('production_year', errors[2])
+        self.assertIn('director', errors[3])
+        self.assertFalse(Movies.objects.exists())
+
+    def test_update_and_delete_movies(self):
+        created = self.client.post(
+            '/api/movies/bulk/', [self.movie(0), self.movie(1)], format='json').data
+        items = [{**row, 'name': 'Renamed', 'actors': [self.artists[9].pk]}
+                 for row in created]
+        response = self.client.put('/api/movies/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['name'] for row in response.data}, {'Renamed'})
+        self.assertEqual(Movies.actors.through.objects.count(), 2)
+
+        ids = [row['id'] for row in created]
+        response = self.client.delete('/api/movies/bulk/', ids, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Movies.objects.exists())
+
+    def test_update_swaps_directors(self):
+        created = self.client.post(
+            '/api/movies/bulk/', [self.movie(0), self.movie(1)], format='json').data
+        items = [{**created[0], 'director': created[1]['director']},
+                 {**created[1], 'director': created[0]['director']}]
+        response = self.client.put('/api/movies/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(Movies.objects.values_list('pk', 'director')),
+            {created[0]['id']: self.artists[1].pk, created[1]['id']: self.artists[0].pk})
+        counts = sorted(Collaborations.objects.values_list('artist', 'collaborator', 'count'))
+        rebuild()
+        self.assertEqual(sorted(Collaborations.objects.values_list('artist', 'collaborator', 'count')),
+                         counts)
+
+    def test_size_is_capped(self):
+        with self.settings(BULK_MAX_SIZE=1):
+            response = self.client.post(
+                '/api/movies/bulk/', [self.movie(0), self.movie(1)], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch('movies.bulk.CountryValidator.codes', return_value={'US', 'FR'})
+    def test_create_artists_checks_countries(self, codes):
+        items = [
+            {'full_name': 'New', 'country': 'FR', 'dob': '1980-01-01'},
+            {'full_name': 'Other', 'country': 'XX', 'dob': '1980-01-01'},
+        ]
+        response = self.client.post('/api/artists/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details'][0]['index'], 1)
+
+        response = self.client.post('/api/artists/bulk/', items[:1], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data[0]['country'], 'FR')
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class ActorSetTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the set-based actors endpoint of a movie.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index}', country='US',
+                    dob=datetime.date(1970, 1, 1))
+            for index in range(200)
+        ])
+        cls.movie = Movies.objects.create(name='Movie', production_year=2000)
+        cls.movie.actors.set(cls.artists[:10])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/movies/{self.movie.pk}/actors/'
+
+    def cast(self):
+        return set(self.movie.actors.values_list('pk', flat=True))
+
+    def ids(self, artists):
+        return [artist.pk for artist in artists]
+
+    def test_add_and_remove(self):
+        data = {'add': self.ids(self.artists[10:20]),
+                'remove': self.ids(self.artists[:5])}
+        # Including one `updated_at` bump and one recount of the collaborations
+        # before and after each change of the actors, plus the deletion of the
+        # pairs left without a shared movie
+        with self.assertQueryBudget(16):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.cast(), set(self.ids(self.artists[5:20])))
+        self.assertEqual(sorted(response.data['actors']), self.ids(self.artists[5:20]))
+
+    def test_replace_large_cast(self):
+        data = {'replace': self.ids(self.artists[5:])}
+        # The `m2m_changed` receivers make `add()` read the existing rows first,
+        # the pairs left without a shared movie are deleted after each subtraction
+        with self.assertQueryBudget(17):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.cast(), set(self.ids(self.artists[5:])))
+
+    def test_reports_missing_ids(self):
+        response = self.client.post(
+            self.url, {'add': [self.artists[0].pk, 0, -1]}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['actor_ids'], [-1, 0])
+        self.assertEqual(self.cast(), set(self.ids(self.artists[:10])))
+
+    def test_replace_is_exclusive(self):
+        response = self.client.post(
+            self.url, {'replace': [self.artists[0].pk], 'add': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class ResponseCacheTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the response cache of the movie and artist list and retrieve endpoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index}', country='US',
+                    dob=datetime.date(1970, 1, 1))
+            for index in range(3)
+        ])
+        cls.movie = Movies.objects.create(name='Movie', production_year=2000)
+        cls.movie.actors.set(cls.artists[:2])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/movies/{self.movie.pk}/'
+        response_cache.clear()
+
+    def test_hit_runs_no_query(self):
+        first = self.client.get('/api/movies/?page_size=5&ordering=production_year')
+        stats = response_cache.stats()
+        with self.assertQueryBudget(0):
+            second = self.client.get('/api/movies/?ordering=production_year&page_size=5')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(response_cache.stats()['hits'], stats['hits'] + 1)
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get('/api/artists/?ordering=full_name')
+        response = self.client.get('/api/artists/?ordering=-full_name')
+        self.assertEqual(response.data['results'][0]['id'], self.artists[2].pk)
+
+    def test_update_invalidates(self):
+        self.client.get(self.url)
+        self.movie.name = 'Renamed'
+        self.movie.save()
+        self.assertEqual(self.client.get(self.url).data['name'], 'Renamed')
+
+    def test_commit_invalidates_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movie.name = 'Renamed'
+            self.movie.save()
+            # Stands for a concurrent request reading the rows before the commit
+            self.client.get(self.url)
+        stats = response_cache.stats()
+        self.assertEqual(self.client.get(self.url).data['name'], 'Renamed')
+        self.assertEqual(response_cache.stats()['misses'], stats['misses'] + 1)
+
+    def test_add_and_remove_actor_invalidate(self):
+        self.client.get(self.url)
+        self.client.post(f'{self.url}add_actor/', {'actor_id': self.artists[2].pk}, format='json')
+        self.assertEqual(len(self.client.get(self.url).data['actors']), 3)
+        self.client.post(f'{self.url}remove_actor/', {'actor_id': self.artists[0].pk}, format='json')
+        self.assertEqual(len(self.client.get(self.url).data['actors']), 2)
+
+    def test_artist_delete_invalidates_movies(self):
+        self.client.get(self.url)
+        self.artists[0].delete()
+        self.assertEqual(self.client.get(self.url).data['actors'], [self.artists[1].pk])
+
+    def test_bulk_invalidates(self):
+        self.client.get('/api/artists/')
+        response = self.client.delete(
+            '/api/artists/bulk/', [self.artists[2].pk], format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(self.client.get('/api/artists/').data['results']), 2)
+
+    def test_errors_are_not_cached(self):
+        self.client.get('/api/movies/0/')
+        movie = Movies.objects.create(name='New', production_year=2001)
+        Movies.objects.filter(pk=movie.pk).update(id=0)
+        self.assertEqual(self.client.get('/api/movies/0/').status_code, 200)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_disabled(self):
+        stats = response_cache.stats()
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(response_cache.stats()['hits'], stats['hits'])
+
+    def test_stats_endpoint(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        response = self.client.get('/api/cache/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['hits'], response_cache.hits)
+        self.assertTrue(response.data['enabled'])
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class ConditionalGetTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the `ETag` and `Last-Modified` validators of the movie and artist endpoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index}', country='US',
+                    dob=datetime.date(1970, 1, 1))
+            for index in range(3)
+        ])
+        cls.movie = Movies.objects.create(
+            name='Movie', production_year=2000, director=cls.artists[2])
+        cls.movie.actors.set(cls.artists[:2])
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache.clear()
+
+    def test_list_not_modified_without_serializing(self):
+        etag = self.client.get('/api/movies/').headers['ETag']
+        response_cache.clear()
+        with self.assertQueryBudget(1):
+            response = self.client.get('/api/movies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_cached_response_not_modified(self):
+        etag = self.client.get('/api/artists/').headers['ETag']
+        with self.assertQueryBudget(0):
+            response = self.client.get('/api/artists/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_retrieve_not_modified_skips_actors(self):
+        url = f'/api/movies/{self.movie.pk}/'
+        etag = self.client.get(url).headers['ETag']
+        response_cache.clear()
+        with self.assertQueryBudget(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        url = f'/api/artists/{self.artists[0].pk}/'
+        last_modified = self.client.get(url).headers['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_actor_change_modifies_movie(self):
+        url = f'/api/movies/{self.movie.pk}/'
+        etag = self.client.get(url).headers['ETag']
+        self.client.post(f'{url}add_actor/', {'actor_id': self.artists[2].pk}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_reverse_actor_change_modifies_movie(self):
+        before = Movies.objects.get(pk=self.movie.pk).updated_at
+        self.artists[0].movies_actors.clear()
+        self.assertGreater(Movies.objects.get(pk=self.movie.pk).updated_at, before)
+
+    def test_artist_delete_modifies_movies(self):
+        etag = self.client.get('/api/movies/').headers['ETag']
+        self.artists[2].delete()
+        response = self.client.get('/api/movies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['results'][0]['director'])
+
+    def test_movie_delete_modifies_list(self):
+        etag = self.client.get('/api/movies/').headers['ETag']
+        Movies.objects.create(name='Other', production_year=2001)
+        Movies.objects.filter(pk=self.movie.pk).delete()
+        response = self.client.get('/api/movies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_is_only_validated_by_etag(self):
+        newest = Movies.objects.create(name='Other', production_year=2001)
+        response = self.client.get('/api/movies/')
+        self.assertNotIn('Last-Modified', response.headers)
+        last_modified = http_date(newest.updated_at.timestamp())
+        Movies.objects.filter(pk=self.movie.pk).delete()
+        response = self.client.get('/api/movies/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [newest.pk])
+
+    def test_bulk_update_modifies_movie(self):
+        url = f'/api/movies/{self.movie.pk}/'
+        etag = self.client.get(url).headers['ETag']
+        item = {'id': self.movie.pk, 'name': 'Renamed', 'production_year': 2000,
+                'director': None, 'actors': [self.artists[0].pk]}
+        self.client.put('/api/movies/bulk/', [item], format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Renamed')
+
+
+class CountryTests(CountriesFileMixin, TestCase):
+    """
+    Tests for the country index, its validator and the countries endpoint.
+    """
+
+    countries = [('France', 'FR', 'Yes'), ('Namibia', '', 'Yes'), ('Guam', 'GU', 'No')]
+
+    def test_choices_keep_independent_countries(self):
+        self.assertEqual(Country().get_choices(), [('FR', 'France'), ('NA', 'Namibia')])
+
+    def test_validator(self):
+        validator = CountryValidator()
+        self.assertTrue(validator.is_valid(' FR '))
+        self.assertTrue(validator.is_valid('NA'))
+        self.assertFalse(validator.is_valid('GU'))
+        self.assertEqual(validator.codes(), frozenset({'FR', 'NA'}))
+
+    def test_index_is_shared_and_immutable(self):
+        self.assertIs(Country().names, Country().names)
+        with self.assertRaises(TypeError):
+            Country().names['XX'] = 'Nowhere'
+
+    def test_endpoint(self):
+        client = APIClient()
+        response = client.get('/api/countries/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[1], {'code': 'NA', 'name': 'Namibia'})
+        self.assertIn('max-age=86400', response.headers['Cache-Control'])
+
+        etag = response.headers['ETag']
+        response = client.get('/api/countries/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class InputSchemaTests(TestCase):
+    """
+    Tests for the input data schemas and their benchmark.
+    """
+
+    def setUp(self):
+        self.schema = InputSchema(required_fields=['name'], optional_fields=['year'])
+
+    def request(self, data):
+        return mock.Mock(data=data)
+
+    def test_required_and_optional_fields(self):
+        self.assertTrue(self.schema.validate(self.request({'name': 'Movie'})))
+        self.assertTrue(self.schema.validate(self.request({'name': 'Movie', 'year': 1})))
+        self.assertFalse(self.schema.validate(self.request({'year': 1})))
+        self.assertFalse(self.schema.validate(self.request({'name': 'Movie', 'other': 1})))
+
+    def test_empty_and_non_mapping_data(self):
+        self.assertTrue(InputSchema().validate(self.request({})))
+        self.assertFalse(InputSchema().validate(self.request({'name': 'Movie'})))
+        self.assertFalse(self.schema.validate(self.request({})))
+        self.assertFalse(self.schema.validate(self.request(['name'])))
+
+    def test_data_is_not_copied(self):
+        data = {'name': 'Movie'}
+        with mock.patch('copy.deepcopy') as deepcopy:
+            self.schema.validate(self.request(data))
+        deepcopy.assert_not_called()
+        self.assertEqual(data, {'name': 'Movie'})
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark', 'input_validation', number=1, repeat=1, stdout=out)
+        self.assertIn('payload=1 MB', out.getvalue())
+        self.assertIn('ops/s', out.getvalue())
+
+
+@override_settings(ROOT_URLCONF='movies.tests')
+class AsyncReadTests(TestCase):
+    """
+    Tests for the async read views, which must answer exactly like the viewsets.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'Artist {index}', country='US',
+                    dob=datetime.date(1970, 1, 1))
+            for index in range(4)
+        ])
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'Movie {index}', production_year=2000 + index,
+                   director=cls.artists[index])
+            for index in range(3)
+        ])
+        for movie in cls.movies:
+            movie.actors.set(cls.artists[:2])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.async_client = AsyncClient()
+        response_cache.clear()
+
+    async def compare(self, url, **headers):
+        expected = await sync_to_async(self.client.get)(url, **headers)
+        response_cache.clear()
+        response = await self.async_client.get(url, **headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        if expected.status_code != 304:
+            self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        return response
+
+    async def test_movies_list(self):
+        response = await self.compare('/api/movies/?page_size=2&ordering=-production_year')
+        next_url = json.loads(response.content)['next']
+        await self.compare(next_url)
+
+    async def test_movies_filter(self):
+        await self.compare('/api/movies/?actors=Artist 1&director=Artist 2')
+        await self.compare('/api/movies/?production_year=abc')
+
+    async def test_retrieve(self):
+        response = await self.compare(f'/api/movies/{self.movies[0].pk}/')
+        self.assertEqual(response.headers['Content-Type'], 'application/json')
+        await self.compare(f'/api/artists/{self.artists[0].pk}/')
+        await self.compare('/api/movies/0/')
+
+    async def test_artists_list_and_invalid_cursor(self):
+        await self.compare('/api/artists/?ordering=full_name&page_size=3')
+        await self.compare('/api/artists/?cursor=not-a-cursor')
+
+    async def test_conditional_get(self):
+        url = f'/api/movies/{self.movies[0].pk}/'
+        etag = (await self.async_client.get(url)).headers['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_viewset_policies_apply(self):
+        url = f'/api/movies/{self.movies[0].pk}/'
+        with mock.patch.object(MoviesViewSet, 'permission_classes', [IsAuthenticated]):
+            response = await self.compare(url)
+        self.assertEqual(response.status_code, 403)
+
+        class OneRequestThrottle(AnonRateThrottle):
+            rate = '1/day'
+            cache = LocMemCache('throttle', {})
+
+        with mock.patch.object(ArtistViewSet, 'throttle_classes', [OneRequestThrottle]):
+            self.assertEqual((await self.async_client.get('/api/artists/')).status_code, 200)
+            response = await self.async_client.get('/api/artists/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+
+    async def test_writes_use_the_viewset(self):
+        response = await self.async_client.delete(f'/api/movies/{self.movies[2].pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(await Movies.objects.acount(), 2)
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class ArtistPathTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the shortest chain of co-credited artists.
+
+    The graph is the chain a -(m0)- b -(m1)- c -(m2)- d, where c only directs m1,
+    plus a shortcut a -(m3)- e -(m4)- d and the isolated artist f.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        names = 'abcdef'
+        cls.artists = dict(zip(names, Artists.objects.bulk_create([
+            Artists(full_name=name, country='US', dob=datetime.date(1970, 1, 1))
+            for name in names
+        ])))
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'm{index}', production_year=2000) for index in range(5)
+        ])
+        cast = {0: 'ab', 1: 'b', 2: 'cd', 3: 'ae', 4: 'ed'}
+        for index, names in cast.items():
+            cls.movies[index].actors.set([cls.artists[name] for name in names])
+        cls.movies[1].director = cls.artists['c']
+        cls.movies[1].save()
+
+    def setUp(self):
+        self.client = APIClient()
+        graph_index.clear()
+
+    def url(self, source, target, query=''):
+        return f'/api/artists/{self.artists[source].pk}/path/{self.artists[target].pk}/{query}'
+
+    def titles(self, response):
+        return [row['title'] for row in response.data['path']]
+
+    def test_shortest_chain(self):
+        # Artists, credits index, names of the chain
+        with self.assertQueryBudget(4):
+            response = self.client.get(self.url('a', 'd'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['degrees'], 2)
+        self.assertEqual(self.titles(response), ['a', 'm3', 'e', 'm4', 'd'])
+        self.assertEqual(response.data['path'][1]['kind'], 'movie')
+
+    def test_director_links_artists(self):
+        response = self.client.get(self.url('b', 'c'))
+        self.assertEqual(self.titles(response), ['b', 'm1', 'c'])
+
+    def test_max_depth(self):
+        response = self.client.get(self.url('a', 'c', '?max_depth=2'))
+        self.assertEqual(self.titles(response), ['a', 'm0', 'b', 'm1', 'c'])
+        response = self.client.get(self.url('a', 'c', '?max_depth=1'))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.url('a', 'c', '?max_depth=0'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_unlinked_and_same_artist(self):
+        self.assertEqual(self.client.get(self.url('a', 'f')).status_code, 404)
+        response = self.client.get(self.url('a', 'a'))
+        self.assertEqual(response.data, {'degrees': 0, 'path': [
+            {'kind': 'artist', 'id': self.artists['a'].pk, 'title': 'a'}]})
+
+    def test_unknown_artist(self):
+        response = self.client.get(f'/api/artists/{self.artists["a"].pk}/path/0/')
+        self.assertEqual(response.status_code, 404)
+        for target in ('x', '²', '-1'):
+            response = self.client.get(f'/api/artists/{self.artists["a"].pk}/path/{target}/')
+            self.assertEqual(response.status_code, 404)
+
+    def test_ids_are_compared_as_integers(self):
+        response = self.client.get(f'/api/artists/{self.artists["a"].pk}/path/0{self.artists["a"].pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(response), ['a'])
+
+    def test_time_budget(self):
+        with self.settings(GRAPH_PATH_TIME_BUDGET=0):
+            response = self.client.get(self.url('a', 'd'))
+        self.assertEqual(response.status_code, 503)
+
+    def test_time_budget_is_checked_within_a_level(self):
+        search = PathSearch(6, 60)
+        search.chunk_size = 1
+        search.deadline = math.inf
+        neighbors = search.neighbors
+
+        def expire(frontier):
+            rows = neighbors(frontier)
+            search.deadline = 0
+            return rows
+
+        artists = [self.artists['a'].pk, self.artists['b'].pk]
+        with mock.patch.object(search, 'neighbors', side_effect=expire),\
+                self.assertRaises(PathSearchTimeout):
+            search.expand(artists, dict.fromkeys(artists), {})
+
+
+class GraphIndexTests(TestCase):
+    """
+    Tests for the in-memory index of the artist-movie credits.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'artist{index}', country='US', dob=datetime.date(1970, 1, 1))
+            for index in range(4)
+        ])
+        cls.artist_ids = [artist.pk for artist in cls.artists]
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'movie{index}', production_year=2000) for index in range(3)
+        ])
+        cls.movies[0].actors.set(cls.artists[:2])
+        cls.movies[1].actors.set(cls.artists[1:3])
+        cls.movies[2].director = cls.artists[3]
+        cls.movies[2].save()
+
+    def setUp(self):
+        graph_index.clear()
+
+    def credits(self):
+        artists = np.array(self.artist_ids, dtype=np.int64)
+        sources, movies = graph_index.movies_of(artists)
+        by_movie = {}
+        for artist, movie in zip(sources.tolist(), movies.tolist()):
+            by_movie.setdefault(movie, set()).add(artist)
+        return by_movie
+
+    def expected(self, *casts):
+        return {movie.pk: {artist.pk for artist in cast}
+                for movie, cast in zip(self.movies, casts) if cast}
+
+    def test_load(self):
+        with self.assertNumQueries(1):
+            credits = self.credits()
+        self.assertEqual(credits, self.expected(
+            self.artists[:2], self.artists[1:3], self.artists[3:]))
+        movie_ids, artist_ids = graph_index.artists_of(
+            np.array([self.movies[1].pk], dtype=np.int64))
+        self.assertEqual(sorted(artist_ids.tolist()), [self.artists[1].pk, self.artists[2].pk])
+        self.assertEqual(graph_index.stats()['credits'], 5)
+
+    def test_bytes_per_credit(self):
+        graph = graph_index.current()
+        # Two int32 targets per credit, the id and offset arrays are per node
+        self.assertEqual(graph.artist_movies.nbytes + graph.movie_artists.nbytes, 5 * 8)
+
+    def test_ids_beyond_32_bits(self):
+        large = 2 ** 32
+        graph = Bipartite(np.array([large + 1, 1, large + 1, 1]), np.array([5, large + 5, 5, 7]))
+        self.assertEqual(graph.artist_ids.tolist(), [1, large + 1])
+        self.assertEqual(graph.movie_ids.tolist(), [5, 7, large + 5])
+        artists, movies = graph.edges()
+        self.assertEqual(sorted(zip(artists.tolist(), movies.tolist())),
+                         [(1, 7), (1, large + 5), (large + 1, 5)])
+        _, artists = graph.artists_of(np.array([large + 5]))
+        self.assertEqual(artists.tolist(), [1])
+
+    def test_writes_are_applied(self):
+        self.credits()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movies[0].actors.remove(self.artists[0])
+            self.movies[2].actors.add(self.artists[0])
+            self.movies[1].director = self.artists[0]
+            self.movies[1].save()
+        self.assertEqual(self.credits(), self.expected(
+            self.artists[1:2], self.artists[:3], [self.artists[0], self.artists[3]]))
+        self.assertEqual(graph_index.stats()['pending_movies'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movies[1].delete()
+            self.artists[3].delete()
+        self.assertEqual(self.credits(), self.expected(
+            self.artists[1:2], [], self.artists[:1]))
+
+    def test_compaction(self):
+        self.credits()
+        with self.settings(GRAPH_INDEX_COMPACT_SIZE=2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.artists[3].movies_actors.add(self.movies[0])
+            self.assertEqual(graph_index.stats()['pending_movies'], 1)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.movies[1].actors.clear()
+            # Compacted on next read, without a query
+            with self.assertNumQueries(0):
+                credits = self.credits()
+        self.assertEqual(graph_index.stats()['pending_movies'], 0)
+        self.assertEqual(credits, self.expected(self.artists[:2] + [self.artists[3]], [], self.artists[3:]))
+        self.assertEqual(graph_index.stats()['credits'], 4)
+
+    def test_reload_after_max_age(self):
+        self.credits()
+        self.assertFalse(graph_index.components.connected(self.artists[0].pk, self.artists[3].pk))
+        # Written behind the index, as by another process
+        Movies.actors.through.objects.create(movies=self.movies[2], artists=self.artists[0])
+        self.assertNotIn(self.artists[0].pk, self.credits()[self.movies[2].pk])
+        with self.settings(GRAPH_INDEX_MAX_AGE=0), mock.patch('movies.graph.threading.Thread') as thread:
+            # The outdated arrays are used until the reload is done
+            with self.assertNumQueries(0):
+                self.assertNotIn(self.artists[0].pk, self.credits()[self.movies[2].pk])
+                self.credits()
+            thread.assert_called_once()
+            changed = thread.call_args.kwargs['args'][0]
+            # Written by this process during the reload
+            with self.captureOnCommitCallbacks(execute=True):
+                self.movies[0].actors.add(self.artists[3])
+            self.assertEqual(changed, {self.movies[0].pk})
+            graph_index.reload(changed)
+        self.assertEqual(self.credits(), self.expected(
+            self.artists[:2] + [self.artists[3]], self.artists[1:3], self.artists[:1] + [self.artists[3]]))
+        self.assertEqual(graph_index.stats()['pending_movies'], 1)
+        self.assertIsNone(graph_index.reloading)
+        # The components were labelled with the new arrays
+        self.assertIsNotNone(graph_index.components.labels)
+        self.assertTrue(graph_index.components.connected(self.artists[0].pk, self.artists[3].pk))
+
+    def test_reload_is_dropped_after_a_clear(self):
+        self.credits()
+        with self.settings(GRAPH_INDEX_MAX_AGE=0), mock.patch('movies.graph.threading.Thread') as thread:
+            self.credits()
+        graph_index.clear()
+        graph_index.reload(thread.call_args.kwargs['args'][0])
+        self.assertFalse(graph_index.loaded)
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class CollaborationsTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the collaborations table and the top collaborators endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'artist{index}', country='US', dob=datetime.date(1970, 1, 1))
+            for index in range(5)
+        ])
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'movie{index}', production_year=2000) for index in range(3)
+        ])
+        cls.movies[0].actors.set(cls.artists[:3])
+        cls.movies[1].actors.set(cls.artists[:2])
+        cls.movies[2].actors.set(cls.artists[3:4])
+        cls.movies[2].director = cls.artists[0]
+        cls.movies[2].save()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def counts(self):
+        return {(row.artist_id, row.collaborator_id): row.count
+                for row in Collaborations.objects.all()}
+
+    def assertConsistent(self):
+        counts = self.counts()
+        rebuild()
+        self.assertEqual(counts, self.counts())
+
+    def test_counts(self):
+        a = [artist.pk for artist in self.artists]
+        self.assertEqual(self.counts(), {
+            (a[0], a[1]): 2, (a[1], a[0]): 2,
+            (a[0], a[2]): 1, (a[2], a[0]): 1,
+            (a[1], a[2]): 1, (a[2], a[1]): 1,
+            (a[0], a[3]): 1, (a[3], a[0]): 1,
+        })
+        self.assertConsistent()
+
+    def test_endpoint(self):
+        url = f'/api/artists/{self.artists[0].pk}/collaborators/'
+        with self.assertQueryBudget(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['id'], row['count']) for row in response.data], [
+            (self.artists[1].pk, 2), (self.artists[2].pk, 1), (self.artists[3].pk, 1)])
+        self.assertEqual(response.data[0]['full_name'], 'artist1')
+
+        response = self.client.get(f'{url}?k=1')
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(self.client.get(f'{url}?k=0').status_code, 400)
+
+    def test_artist_without_collaborators(self):
+        response = self.client.get(f'/api/artists/{self.artists[4].pk}/collaborators/')
+        self.assertEqual((response.status_code, response.data), (200, []))
+        self.assertEqual(self.client.get('/api/artists/0/collaborators/').status_code, 404)
+
+    def test_actor_changes(self):
+        url = f'/api/movies/{self.movies[2].pk}/'
+        self.client.post(f'{url}add_actor/', {'actor_id': self.artists[4].pk}, format='json')
+        self.client.post(f'{url}remove_actor/', {'actor_id': self.artists[3].pk}, format='json')
+        counts = self.counts()
+        self.assertEqual(counts[(self.artists[0].pk, self.artists[4].pk)], 1)
+        self.assertNotIn((self.artists[0].pk, self.artists[3].pk), counts)
+        self.assertConsistent()
+
+        self.artists[1].movies_actors.clear()
+        self.assertNotIn((self.artists[0].pk, self.artists[1].pk), self.counts())
+        self.assertConsistent()
+
+    def test_update_and_destroy(self):
+        response = self.client.put(f'/api/movies/{self.movies[2].pk}/', {
+            'name': 'movie2', 'production_year': 2000,
+            'director': self.artists[1].pk, 'actors': [self.artists[3].pk, self.artists[4].pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        counts = self.counts()
+        self.assertEqual(counts[(self.artists[0].pk, self.artists[1].pk)], 2)
+        self.assertEqual(counts[(self.artists[1].pk, self.artists[4].pk)], 1)
+        self.assertNotIn((self.artists[0].pk, self.artists[3].pk), counts)
+        self.assertConsistent()
+
+        self.client.delete(f'/api/movies/{self.movies[0].pk}/')
+        self.assertEqual(self.counts()[(self.artists[0].pk, self.artists[1].pk)], 1)
+        self.assertConsistent()
+
+        self.artists[4].delete()
+        self.assertConsistent()
+
+
+    def test_director_changes(self):
+        movie = Movies.objects.get(pk=self.movies[2].pk)
+        movie.name = 'renamed'
+        with CaptureQueriesContext(connection) as queries:
+            movie.save()
+        table = Collaborations._meta.db_table
+        self.assertFalse([query for query in queries if table in query['sql']])
+
+        # The collaborations are recounted in the transaction of the save
+        counts = self.counts()
+        movie.director = self.artists[1]
+        with mock.patch('movies.signals.add_credits', side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            movie.save()
+        self.assertEqual(self.counts(), counts)
+        self.assertEqual(Movies.objects.get(pk=movie.pk).director_id, self.artists[0].pk)
+        movie.save()
+        self.assertIn((self.artists[1].pk, self.artists[3].pk), self.counts())
+        self.assertConsistent()
+
+    def test_bulk_update(self):
+        response = self.client.put('/api/movies/bulk/', [{
+            'id': self.movies[1].pk, 'name': 'movie1', 'production_year': 2000,
+            'director': None, 'actors': [self.artists[2].pk, self.artists[3].pk],
+        }], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts()[(self.artists[0].pk, self.artists[1].pk)], 1)
+        self.assertConsistent()
+
+
+class ConcurrentCollaborationsTests(TransactionTestCase):
+    """
+    Tests for the collaboration counts under concurrent transactions.
+    """
+
+    def setUp(self):
+        self.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'artist{index}', country='US', dob=datetime.date(1970, 1, 1))
+            for index in range(2)
+        ])
+        self.movies = Movies.objects.bulk_create([
+            Movies(name=f'movie{index}', production_year=2000) for index in range(2)
+        ])
+        for movie in self.movies:
+            movie.actors.set(self.artists)
+
+    def subtract(self, movie_ids):
+        try:
+            subtract_credits(movie_ids)
+        finally:
+            connection.close()
+
+    def test_overlapping_subtractions(self):
+        pair = (self.artists[0].pk, self.artists[1].pk)
+        self.assertEqual(Collaborations.objects.get(artist_id=pair[0], collaborator_id=pair[1]).count, 2)
+        with transaction.atomic():
+            subtract_credits([self.movies[0].pk])
+            # The other transaction waits for the pairs decremented by this one
+            other = threading.Thread(target=self.subtract, args=([self.movies[1].pk],))
+            other.start()
+            with connection.cursor() as cursor:
+                for _ in range(500):
+                    cursor.execute('SELECT EXISTS (SELECT FROM pg_locks WHERE NOT granted)')
+                    if cursor.fetchone()[0]:
+                        break
+                    time.sleep(0.01)
+        other.join(timeout=10)
+        self.assertFalse(Collaborations.objects.filter(artist_id__in=pair).exists())
+
+
+class InfluenceTests(TestCase):
+    """
+    Tests for the artist influence scores and the ordering by influence.
+
+    Artist 0 shares a movie with every other artist but artist 4, which has none.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'artist{index}', country='US', dob=datetime.date(1970, 1, 1))
+            for index in range(5)
+        ])
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'movie{index}', production_year=2000) for index in range(3)
+        ])
+        for movie, actor in zip(cls.movies, cls.artists[1:4]):
+            movie.actors.set([cls.artists[0], actor])
+        cls.movies[0].actors.add(cls.artists[1])
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache.clear()
+
+    def test_pagerank(self):
+        graph = CollaborationGraph.load(chunk_size=2)
+        self.assertEqual(graph.size, 5)
+        scores, iterations, change = graph.pagerank(tolerance=1e-12, max_iterations=1000)
+        self.assertLess(change, 1e-12)
+        self.assertAlmostEqual(scores.sum(), 1)
+        self.assertEqual(scores.argmax(), 0)
+        self.assertEqual(scores.argmin(), 4)
+        self.assertEqual(graph.degree().tolist(), [3, 1, 1, 1, 0])
+
+    def test_command_and_ordering(self):
+        out = io.StringIO()
+        call_command('compute_influence', stdout=out)
+        self.assertIn('PageRank converged', out.getvalue())
+        self.assertIn('Updated 5 artists', out.getvalue())
+
+        response = self.client.get('/api/artists/?ordering=-influence&page_size=2')
+        ids = [row['id'] for row in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [row['id'] for row in response.data['results']]
+        ids += [row['id'] for row in self.client.get(response.data['next']).data['results']]
+        self.assertEqual(ids[0], self.artists[0].pk)
+        self.assertEqual(ids[-1], self.artists[4].pk)
+        self.assertEqual(sorted(ids), sorted(artist.pk for artist in self.artists))
+
+        # Nothing changes when the scores are the same
+        call_command('compute_influence', stdout=out)
+        self.assertIn('Updated 0 artists', out.getvalue())
+
+    def test_degree(self):
+        call_command('compute_influence', method='degree', stdout=io.StringIO())
+        self.assertEqual(Artists.objects.get(pk=self.artists[0].pk).influence, 3)
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class NeighborhoodTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the neighborhood endpoint and the connected components.
+
+    Artist 0 directs movie 0, played by artists 1 and 2, and acts in movie 1 with
+    artists 3 to 7. Artist 2 acts in movie 2 with artist 8. Artist 9 is isolated.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'artist{index}', country='US', dob=datetime.date(1970, 1, 1))
+            for index in range(10)
+        ])
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'movie{index}', production_year=2000) for index in range(3)
+        ])
+        cls.movies[0].director = cls.artists[0]
+        cls.movies[0].save()
+        cls.movies[0].actors.set(cls.artists[1:3])
+        cls.movies[1].actors.set([cls.artists[0]] + cls.artists[3:8])
+        cls.movies[2].actors.set([cls.artists[2], cls.artists[8]])
+
+    def setUp(self):
+        self.client = APIClient()
+        graph_index.clear()
+        response_cache.clear()
+
+    def get(self, index, query=''):
+        return self.client.get(f'/api/artists/{self.artists[index].pk}/neighborhood/{query}')
+
+    def ids(self, response, kind):
+        return {node['id'] for node in response.data['nodes'] if node['kind'] == kind}
+
+    def test_neighborhood(self):
+        response = self.get(1, '?depth=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response, 'artist'), {self.artists[index].pk for index in (0, 1, 2)})
+        self.assertEqual(self.ids(response, 'movie'), {self.movies[0].pk})
+        self.assertIn({'artist': self.artists[0].pk, 'movie': self.movies[0].pk, 'kind': 'directed'},
+                      response.data['edges'])
+        self.assertIn({'artist': self.artists[1].pk, 'movie': self.movies[0].pk, 'kind': 'acted_in'},
+                      response.data['edges'])
+        self.assertEqual(len(response.data['edges']), 3)
+        self.assertFalse(response.data['truncated'])
+
+        response = self.get(1)
+        self.assertEqual(len(self.ids(response, 'artist')), 9)
+        self.assertEqual(len(self.ids(response, 'movie')), 3)
+
+    def test_truncation(self):
+        with self.settings(NEIGHBORHOOD_MAX_DEGREE=3):
+            response = self.get(0, '?depth=1')
+        # Movie 1 has six artists, artist 0 and the two lowest others are kept
+        self.assertTrue(response.data['truncated'])
+        self.assertEqual(self.ids(response, 'artist'), {self.artists[index].pk for index in (0, 1, 2, 3, 4)})
+
+        response = self.get(0, '?limit=4')
+        self.assertTrue(response.data['truncated'])
+        self.assertEqual(len(response.data['nodes']), 4)
+        self.assertEqual(self.get(0, '?limit=0').status_code, 400)
+
+    def test_cached_until_cast_changes(self):
+        self.get(2, '?depth=1')
+        with self.assertQueryBudget(0):
+            response = self.get(2, '?depth=1')
+        self.assertNotIn(self.artists[9].pk, self.ids(response, 'artist'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movies[2].actors.add(self.artists[9])
+        self.assertIn(self.artists[9].pk, self.ids(self.get(2, '?depth=1'), 'artist'))
+
+    def test_unknown_artist(self):
+        self.assertEqual(self.client.get('/api/artists/0/neighborhood/').status_code, 404)
+
+    def test_components(self):
+        components = graph_index.components
+        self.assertTrue(components.connected(self.artists[8].pk, self.artists[7].pk))
+        self.assertFalse(components.connected(self.artists[9].pk, self.artists[0].pk))
+        self.assertEqual(self.get(5).data['component'], self.get(8).data['component'])
+
+        # Added credits merge components without a rebuild
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movies[2].actors.add(self.artists[9])
+        self.assertIsNotNone(components.labels)
+        self.assertTrue(components.connected(self.artists[9].pk, self.artists[0].pk))
+
+        # Removed credits may split them, the labels are rebuilt in the background
+        with mock.patch('movies.graph.threading.Thread') as thread, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.movies[0].actors.remove(self.artists[2])
+        self.assertTrue(components.stale)
+        with mock.patch.object(Components, 'propagate') as propagate:
+            # Stale labels still tell different components apart
+            self.assertTrue(components.connected(self.artists[9].pk, self.artists[0].pk))
+            self.assertFalse(components.connected(self.artists[9].pk, self.artists[1].pk + 10 ** 6))
+            self.assertIsNone(self.get(9).data['component'])
+        propagate.assert_not_called()
+
+        components.rebuild(thread.call_args.kwargs['args'][0])
+        self.assertFalse(components.stale)
+        self.assertFalse(components.connected(self.artists[8].pk, self.artists[0].pk))
+        self.assertTrue(components.connected(self.artists[9].pk, self.artists[8].pk))
+        self.assertEqual(self.get(9).data['component'], self.get(2).data['component'])
+
+        # Changes made during a rebuild are applied to the new labels
+        propagate = Components.propagate
+
+        def add_during_rebuild(graph):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.movies[1].actors.add(self.artists[9])
+            return propagate(graph)
+
+        with mock.patch('movies.graph.threading.Thread') as thread:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.movies[0].actors.remove(self.artists[1])
+            with mock.patch.object(Components, 'propagate', side_effect=add_during_rebuild):
+                components.rebuild(thread.call_args.kwargs['args'][0])
+        self.assertFalse(components.stale)
+        self.assertTrue(components.connected(self.artists[8].pk, self.artists[0].pk))
+        self.assertFalse(components.connected(self.artists[1].pk, self.artists[0].pk))
+
+    def test_unconnected_path_without_search(self):
+        url = f'/api/artists/{self.artists[0].pk}/path/{self.artists[9].pk}/'
+        with mock.patch.object(PathSearch, 'find') as find:
+            self.assertEqual(self.client.get(url).status_code, 404)
+        find.assert_not_called()
+
+
+@modify_settings(MIDDLEWARE={'remove': 'tools.middlewares.EndpointCallCountMiddleware'})
+class SimilarMoviesTests(QueryBudgetMixin, TestCase):
+    """
+    Tests for the MinHash index of the casts and the similar movies endpoint.
+
+    Movies 1 and 2 share most of the cast of movie 0, movie 3 shares none.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artists = Artists.objects.bulk_create([
+            Artists(full_name=f'artist{index}', country='US', dob=datetime.date(1970, 1, 1))
+            for index in range(30)
+        ])
+        cls.movies = Movies.objects.bulk_create([
+            Movies(name=f'movie{index}', production_year=2000) for index in range(5)
+        ])
+        casts = [range(0, 10), range(0, 9), range(1, 11), range(20, 30), []]
+        for movie, cast in zip(cls.movies, casts):
+            movie.actors.set([cls.artists[index] for index in cast])
+        call_command('rebuild_cast_index', stdout=io.StringIO())
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def similar(self, index, query=''):
+        return self.client.get(f'/api/movies/{self.movies[index].pk}/similar/{query}')
+
+    def test_similar(self):
+        # Cast, candidates with their casts, names
+        with self.assertQueryBudget(3):
+            response = self.similar(0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [self.movies[1].pk, self.movies[2].pk])
+        self.assertEqual(response.data[0]['similarity'], 0.9)
+        self.assertAlmostEqual(response.data[1]['similarity'], 9 / 11)
+        self.assertEqual(response.data[0]['name'], 'movie1')
+
+        self.assertEqual(len(self.similar(0, '?k=1').data), 1)
+        self.assertEqual(self.similar(0, '?k=0').status_code, 400)
+        self.assertEqual(self.similar(3).data, [])
+
+    @override_settings(SIMILAR_MOVIES_MAX_CANDIDATES=1)
+    def test_candidates_sharing_the_most_buckets_are_kept(self):
+        # Movie 1 shares one bucket with movie 0, movie 2 shares all of them
+        buckets = list(CastBuckets.objects.filter(movie=self.movies[0]).values_list('bucket', flat=True))
+        CastBuckets.objects.filter(movie__in=self.movies[1:3]).delete()
+        CastBuckets.objects.bulk_create(
+            [CastBuckets(movie=self.movies[1], bucket=buckets[0])] +
+            [CastBuckets(movie=self.movies[2], bucket=bucket) for bucket in buckets])
+        self.assertEqual([row['id'] for row in self.similar(0).data], [self.movies[2].pk])
+
+    def test_movie_without_actors(self):
+        self.assertEqual(self.similar(4).data, [])
+        self.assertEqual(self.client.get('/api/movies/0/similar/').status_code, 404)
+
+    def test_buckets(self):
+        minhash = MinHash.from_settings()
+        buckets = minhash.cast_buckets({1: {1, 2, 3}, 2: {3, 2, 1}, 3: {4}})
+        self.assertEqual(buckets[1], buckets[2])
+        self.assertEqual(len(buckets[1]), settings.SIMILAR_MOVIES_BANDS)
+        self.assertFalse(set(buckets[1]) & set(buckets[3]))
+        self.assertEqual(CastBuckets.objects.filter(movie=self.movies[0]).count(),
+                         settings.SIMILAR_MOVIES_BANDS)
+
+    def test_updated_with_the_actors(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movies[4].actors.set(self.artists[20:30])
+        self.assertEqual([row['id'] for row in self.similar(4).data], [self.movies[3].pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movies[3].actors.clear()
+        self.assertEqual(self.similar(4).data, [])
+        self.assertFalse(CastBuckets.objects.filter(movie=self.movies[3]).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put('/api/movies/bulk/', [{
+                'id': self.movies[3].pk, 'name': 'movie3', 'production_year': 2000,
+                'director': None, 'actors': [artist.pk for artist in self.artists[20:29]],
+            }], format='json')
+        self.assertEqual([row['id'] for row in self.similar(4).data], [self.movies[3].pk])
+
+
+class SeedGraphTests(CountriesFileMixin, TransactionTestCase):
+    """
+    Tests for the synthetic dataset generator and its `COPY` loader.
+    """
+
+    countries = [('France', 'FR', 'Yes'), ('Japan', 'JP', 'Yes'), ('Guam', 'GU', 'No')]
+
+    def seed(self, *args):
+        call_command('seed_graph', '--artists', '300', '--movies', '0.2k', '--avg-cast', '6',
+                     '--seed', '7', *args, stdout=io.StringIO())
+
+    def snapshot(self):
+        return (
+            list(Artists.objects.order_by('id').values_list('id', 'full_name', 'country', 'dob')),
+            list(Movies.objects.order_by('id').values_list(
+                'id', 'name', 'production_year', 'director')),
+            sorted(Movies.actors.through.objects.values_list('movies_id', 'artists_id')),
+        )
+
+    def test_loads_a_plausible_dataset(self):
+        self.seed()
+        self.assertEqual(Artists.objects.count(), 300)
+        self.assertEqual(Movies.objects.count(), 200)
+        self.assertEqual(set(Artists.objects.values_list('country', flat=True)), {'FR', 'JP'})
+        self.assertFalse(Artists.objects.filter(dob__year__lt=1900).exists())
+        self.assertFalse(Movies.objects.filter(production_year__lt=1888).exists())
+        self.assertFalse(Movies.objects.filter(
+            production_year__gt=datetime.date.today().year).exists())
+        # The search vectors are filled by the triggers
+        self.assertFalse(Artists.objects.filter(search_vector=None).exists())
+
+        casts = Movies.objects.annotate(size=Count('actors')).values_list('size', flat=True)
+        self.assertAlmostEqual(sum(casts) / len(casts), 6, delta=2)
+        self.assertGreater(max(casts), 12)
+        director_ids = Movies.objects.exclude(director=None).values_list('director', flat=True)
+        self.assertGreater(len(director_ids), 150)
+
+        # The derived tables match the loaded credits
+        collaborations = sorted(Collaborations.objects.values_list('artist', 'collaborator', 'count'))
+        self.assertTrue(collaborations)
+        self.assertTrue(CastBuckets.objects.exists())
+        rebuild()
+        self.assertEqual(
+            sorted(Collaborations.objects.values_list('artist', 'collaborator', 'count')),
+            collaborations)
+
+    def test_is_deterministic(self):
+        self.seed('--flush')
+        first = self.snapshot()
+        self.seed('--flush')
+        self.assertEqual(self.snapshot(), first)
+
+    def constraints(self):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+                WHERE conrelid = ANY(%s::regclass[]) ORDER BY 1
+            """, [[Artists._meta.db_table, Movies._meta.db_table,
+                   Movies.actors.through._meta.db_table]])
+            return cursor.fetchall()
+
+    def test_appends_after_existing_rows(self):
+        artist = Artists.objects.create(full_name='Existing', country='FR', dob='1970-01-01')
+        constraints = self.constraints()
+        self.seed()
+        self.assertEqual(Artists.objects.order_by('id')[1].id, artist.id + 1)
+        self.assertEqual(Artists.objects.count(), 301)
+        # The sequences continue after the loaded rows
+        self.assertEqual(Artists.objects.create(
+            full_name='New', country='FR', dob='1970-01-01').id, artist.id + 301)
+        # The dropped constraints are created again
+        self.assertEqual(self.constraints(), constraints)
+
+
+class ImportTests(CountriesFileMixin, TestCase):
+    """
+    Tests for the catalogue import command and endpoint.
+    """
+
+    countries = [('France', 'FR', 'Yes'), ('Japan', 'JP', 'Yes')]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def run_import(self, kind, path, *args):
+        stdout = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_catalogue', kind, path, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def import_artists(self):
+        self.run_import('artists', self.write('artists.csv', (
+            'id,full_name,country,dob\n'
+            'nm1,Ann Lee,FR,1970-01-01\n'
+            'nm2,Bo Kim,JP,1980-02-02\n'
+            'nm3,Cy Dahl, FR ,1990-03-03\n'
+            'nm4,Di Ray,XX,1990-03-03\n'
+            'nm5,Ed Moe,FR,not a date\n'
+        )))
+
+    def test_imports_artists_and_updates_them(self):
+        self.import_artists()
+        self.assertEqual(
+            list(Artists.objects.order_by('external_id').values_list('external_id', 'full_name', 'country')),
+            [('nm1', 'Ann Lee', 'FR'), ('nm2', 'Bo Kim', 'JP'), ('nm3', 'Cy Dahl', 'FR')])
+        pk = Artists.objects.get(external_id='nm1').pk
+
+        output = self.run_import('artists', self.write('update.jsonl', (
+            '{"id": "nm1", "full_name": "Ann Lee-Park", "country": "JP", "dob": "1970-01-01"}\n'
+            '\n'
+            '{"id": "nm6", "full_name": "Fay Wu", "country": "FR", "dob": "2000-01-01"}\n'
+        )))
+        self.assertIn('Imported 1 new and 1 updated artists, rejected 0 records.', output)
+        artist = Artists.objects.get(external_id='nm1')
+        self.assertEqual((artist.pk, artist.full_name, artist.country), (pk, 'Ann Lee-Park', 'JP'))
+        self.assertEqual(Artists.objects.count(), 4)
+
+    def test_imports_movies_with_casts(self):
+        self.import_artists()
+        path = self.write('movies.jsonl', '\n'.join(json.dumps(movie) for movie in [
+            {'id': 'tt1', 'name': 'One', 'production_year': 2000, 'director': 'Ann Lee',
+             'actors': ['Bo Kim', 'Cy Dahl']},
+            {'id': 'tt2', 'name': 'Two', 'production_year': 2001, 'director': None,
+             'actors': ['Ann Lee', 'Bo Kim', 'Bo Kim']},
+            {'id': 'tt3', 'name': 'Three', 'production_year': 2002, 'director': 'Ann Lee',
+             'actors': ['Bo Kim']},
+            {'id': 'tt4', 'name': 'Four', 'production_year': 1500, 'director': None,
+             'actors': ['Bo Kim']},
+            {'id': 'tt5', 'name': 'Five', 'production_year': 2003, 'director': None,
+             'actors': ['Nobody']},
+        ]) + '\nnot json\n')
+        self.run_import('movies', path, '--chunk-size', '2', '--errors', path + '.errors')
+
+        names = dict(Artists.objects.values_list('full_name', 'pk'))
+        one, two = Movies.objects.get(external_id='tt1'), Movies.objects.get(external_id='tt2')
+        self.assertEqual(Movies.objects.count(), 2)
+        self.assertEqual((one.name, one.director_id), ('One', names['Ann Lee']))
+        self.assertEqual(set(one.actors.values_list('pk', flat=True)),
+                         {names['Bo Kim'], names['Cy Dahl']})
+        self.assertEqual(set(two.actors.values_list('pk', flat=True)),
+                         {names['Ann Lee'], names['Bo Kim']})
+        self.assertEqual(CastBuckets.objects.values('movie').distinct().count(), 2)
+
+        with open(path + '.errors') as file:
+            errors = sorted((error['line'], list(error['errors'])) for error in map(json.loads, file))
+        self.assertEqual(errors, [(3, ['director']), (4, ['production_year']), (5, ['actors']),
+                                  (6, ['non_field_errors'])])
+
+        # Importing again replaces the casts and keeps the collaborations consistent
+        self.run_import('movies', self.write('update.csv', (
+            'id,name,production_year,director,actors\n'
+            'tt1,One,2000,,Ann Lee|Cy Dahl\n'
+        )))
+        one.refresh_from_db()
+        self.assertIsNone(one.director_id)
+        self.assertEqual(set(one.actors.values_list('pk', flat=True)),
+                         {names['Ann Lee'], names['Cy Dahl']})
+        counts = sorted(Collaborations.objects.values_list('artist', 'collaborator', 'count'))
+        rebuild()
+        self.assertEqual(sorted(Collaborations.objects.values_list('artist', 'collaborator', 'count')),
+                         counts)
+
+    def test_resumes_from_checkpoint(self):
+        self.import_artists()
+        path = self.write('movies.csv', (
+            'id,name,production_year,director,actors\n'
+            'tt1,One,2000,,Ann Lee\n'
+            'tt2,Two,2000,,Bo Kim\n'
+            'tt3,Three,2000,,Cy Dahl\n'
+        ))
+        # An interrupted run which imported the first record
+        with open(path + '.checkpoint', 'w') as file:
+            json.dump({'stats': {'processed': 1, 'created': 1, 'updated': 0, 'rejected': 0,
+                                 'errors': []}}, file)
+        with self.assertRaises(CommandError):
+            self.run_import('movies', path)
+
+        output = self.run_import('movies', path, '--resume', '--chunk-size', '1', '--skip-derived')
+        self.assertIn('Imported 3 new and 0 updated movies', output)
+        self.assertEqual(list(Movies.objects.values_list('external_id', flat=True)), ['tt2', 'tt3'])
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+        # Left to the rebuild commands
+        self.assertFalse(CastBuckets.objects.exists())
+
+    def test_stops_at_undecodable_bytes(self):
+        self.import_artists()
+        path = os.path.join(self.directory.name, 'movies.csv')
+        with open(path, 'wb') as file:
+            file.write(b'id,name,production_year,director,actors\n')
+            # Text is decoded by blocks, the first chunks are read before the invalid byte
+            file.write(b''.join(b'tt%d,Movie,2000,,Ann Lee\n' % index for index in range(1000)))
+            file.write(b'tt1000,Caf\xe9,2000,,Bo Kim\n')
+        with self.assertRaisesMessage(CommandError, 'Could not read') as raised:
+            self.run_import('movies', path, '--chunk-size', '100')
+        imported = Movies.objects.count()
+        self.assertGreater(imported, 0)
+        self.assertIn(f'{imported} records were processed, {imported} created', str(raised.exception))
+        # The checkpoint allows resuming once the file is fixed
+        self.assertTrue(os.path.exists(path + '.checkpoint'))
+
+        client = APIClient()
+        with open(path, 'rb') as upload, self.settings(IMPORT_CHUNK_SIZE=100):
+            response = client.post('/api/import/', {'kind': 'movies', 'file': upload},
+                                   format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['stats']['processed'], imported)
+        self.assertEqual(response.data['stats']['updated'], imported)
+        self.assertGreater(response.data['line'], imported)
+
+    def test_endpoint(self):
+        self.import_artists()
+        client = APIClient()
+        upload = io.BytesIO('\n'.join(json.dumps(movie) for movie in [
+            {'id': 'tt1', 'name': 'One', 'production_year': 2000, 'director': None,
+             'actors': ['Ann Lee']},
+            {'id': 'tt1', 'name': 'Again', 'production_year': 2000, 'director': None,
+             'actors': ['Bo Kim']},
+        ]).encode())
+        upload.name = 'movies.ndjson'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/import/', {'kind': 'movies', 'file': upload},
+                                   format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['rejected']), (1, 1))
+        self.assertEqual(response.data['errors'][0]['line'], 2)
+        self.assertEqual(Movies.objects.get().name, 'One')
+
+        upload = io.BytesIO(b'id\n')
+        upload.name = 'movies.xml'
+        response = client.post('/api/import/', {'kind': 'movies', 'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        response = client.post('/api/import/', {'kind': 'countries'}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+
+class BenchmarkTests(CountriesFileMixin, TestCase):
+    """
+    Tests for the benchmark suite, its saved results and the baseline comparison.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'results.json')
+
+    def benchmark(self, *args):
+        out = io.StringIO()
+        call_command('benchmark', *args, '--number', '1', '--repeat', '1', stdout=out)
+        return out.getvalue()
+
+    def test_requires_movies(self):
+        with self.assertRaises(CommandError):
+            self.benchmark('serializers')
+
+    def test_saves_and_compares_results(self):
+        artists = Artists.objects.bulk_create([
+            Artists(full_name=f'artist{index}', country='FR', dob=datetime.date(1970, 1, 1))
+            for index in range(12)
+        ])
+        Movies.objects.create(name='Movie', production_year=2000).actors.set(artists)
+
+        output = self.benchmark('validators', 'serializers', 'movies_filter', 'middleware',
+                                '--save', self.path)
+        self.assertIn('serializer=MovieSerializer  page=100', output)
+        self.assertIn('names=10', output)
+        self.assertIn('handler=middleware', output)
+        with open(self.path) as file:
+            saved = json.load(file)
+        self.assertEqual(saved['dataset'], {'artists': 12, 'movies': 1})
+        self.assertIn('movies_filter/names=5/query', saved['results'])
+
+        # A baseline ten times faster than the results
+        for measure in saved['results'].values():
+            measure['best'] /= 10
+        with open(self.path, 'w') as file:
+            json.dump(saved, file)
+        with self.assertRaisesMessage(CommandError, 'regressed by more than 10%'):
+            self.benchmark('validators', '--compare', self.path)
+        output = self.benchmark('validators', '--compare', self.path, '--threshold', '100000')
+        self.assertIn('No measure regressed', output)
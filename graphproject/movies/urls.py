@@ -1,12 +1,48 @@
-from django.urls import include, path
+from django.conf import settings
+from django.urls import include, path, re_path
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
 
-from .views import ArtistViewSet, MoviesViewSet
+from .async_views import AsyncReadView
+from .views import (ArtistViewSet, CountriesAPIView, ImportAPIView, MoviesViewSet,
+                    ResponseCacheStatsAPIView, SearchViewSet)
 
 router = DefaultRouter()
 router.register(r'movies', MoviesViewSet, basename='movie')
 router.register(r'artists', ArtistViewSet, basename='artist')
+router.register(r'search', SearchViewSet, basename='search')
 
-urlpatterns = [
-    path('api/', include(router.urls))
+
+def async_read_view(viewset, actions, **initkwargs):
+    """
+    Route the reads of a viewset url to an async view, and its writes to the viewset.
+    """
+    viewset_view = viewset.as_view(actions, **initkwargs)
+    return csrf_exempt(AsyncReadView.as_view(viewset_view=viewset_view))
+
+
+# Same urls and writes as the router, with the list and retrieve actions served
+# by the async ORM. Enabled by `settings.ASYNC_READ_VIEWS`.
+async_read_urlpatterns = [
+    re_path(r'^api/movies/$', async_read_view(
+        MoviesViewSet, {'get': 'list', 'post': 'create'},
+        basename='movie', detail=False)),
+    re_path(r'^api/movies/(?P<pk>[^/.]+)/$', async_read_view(
+        MoviesViewSet,
+        {'get': 'retrieve', 'put': 'update', 'delete': 'destroy'},
+        basename='movie', detail=True)),
+    re_path(r'^api/artists/$', async_read_view(
+        ArtistViewSet, {'get': 'list', 'post': 'create'},
+        basename='artist', detail=False)),
+    re_path(r'^api/artists/(?P<pk>[^/.]+)/$', async_read_view(
+        ArtistViewSet,
+        {'get': 'retrieve', 'put': 'update', 'delete': 'destroy'},
+        basename='artist', detail=True)),
+]
+
+urlpatterns = (async_read_urlpatterns if settings.ASYNC_READ_VIEWS else []) + [
+    path('api/', include(router.urls)),
+    path('api/cache/stats', ResponseCacheStatsAPIView.as_view()),
+    path('api/countries/', CountriesAPIView.as_view()),
+    path('api/import/', ImportAPIView.as_view()),
 ]
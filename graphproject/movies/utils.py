@@ -1,8 +1,9 @@
-import pandas as pd
-from django.conf import settings
+import csv
+import functools
+import hashlib
+from types import MappingProxyType
 
-countries = None
-countries_choices = None
+from django.conf import settings
 
 
 class Country:
@@ -10,51 +11,29 @@ class Country:
     A class to handle country data, including loading country information from a CSV file
     and providing country choices for use in forms or other applications.
 
+    The file is parsed once per process with the stdlib `csv` module, every instance
+    shares the same immutable index.
+
     Attributes
     ----------
-    countries_df : pd.DataFrame
-        A DataFrame containing the country data.
-    IsoAlpha2List : list
-        A list of ISO Alpha-2 country codes.
-    countries_choices : list
-        A list of tuples containing ISO Alpha-2 codes and country names.
+    names : types.MappingProxyType
+        A read-only mapping of ISO Alpha-2 country codes to country names.
+    codes : frozenset
+        The ISO Alpha-2 country codes, for O(1) membership tests.
+    etag : str
+        A digest of the country choices, changing only when the file does.
 
     Methods
     -------
-    load_countries_lazy() -> pd.DataFrame
-        Loads the country data from a CSV file if not already loaded.
     get_choices() -> list
         Returns a list of tuples containing ISO Alpha-2 codes and country names.
     """
 
     def __init__(self) -> None:
         """
-        Initializes the Country instance by loading country data and preparing
-        the ISO Alpha-2 code list.
-        """
-        self.countries_df: pd.DataFrame = self.load_countries_lazy()
-        self.IsoAlpha2List = self.countries_df['IsoAlpha2'].to_list()
-
-    def load_countries_lazy(self):
-        """
-        Loads country data from a CSV file if it is not already loaded.
-
-        The CSV file is located in the 'assets' directory of the Django project.
-        The method filters the DataFrame to include only independent countries and
-        adjusts specific country codes (e.g., Namibia).
-
-        Returns
-        -------
-        pd.DataFrame
-            A DataFrame containing the filtered country data with columns 'Name' and 'IsoAlpha2'.
+        Initializes the Country instance from the index of `settings.COUNTRIES_FILE`.
         """
-        global countries
-        if not isinstance(countries, pd.DataFrame):
-            df = pd.read_csv(f'{settings.BASE_DIR}/assets/country_data.csv')
-            df = df[df['isIndependent'] == 'Yes'][['Name', "IsoAlpha2"]]
-            df.loc[df['Name'] == 'Namibia', 'IsoAlpha2'] = 'NA'
-            countries = df
-        return countries
+        self.names, self.codes, self.etag = load_countries(str(settings.COUNTRIES_FILE))
 
     def get_choices(self):
         """
@@ -65,8 +44,34 @@ class Country:
         list
             A list of tuples where each tuple contains an ISO Alpha-2 code and the corresponding country name.
         """
-        global countries_choices
-        if not countries_choices:
-            countries_choices = [(row['IsoAlpha2'], row['Name'])
-                                 for _, row in self.countries_df.iterrows()]
-        return countries_choices
+        return list(self.names.items())
+
+
+@functools.lru_cache(maxsize=None)
+def load_countries(path: str):
+    """
+    Loads the independent countries of a CSV file into an immutable index.
+
+    The file must contain the 'Name', 'IsoAlpha2' and 'isIndependent' columns.
+    The code of Namibia is set to 'NA', which CSV readers commonly turn into a
+    missing value.
+
+    Parameters
+    ----------
+    path : str
+        The path of the CSV file.
+
+    Returns
+    -------
+    tuple
+        The code to name mapping, the set of codes and the digest of the choices.
+    """
+    names = {}
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            if row['isIndependent'] != 'Yes':
+                continue
+            code = 'NA' if row['Name'] == 'Namibia' else row['IsoAlpha2']
+            names[code] = row['Name']
+    etag = hashlib.sha1(repr(list(names.items())).encode()).hexdigest()
+    return MappingProxyType(names), frozenset(names), etag
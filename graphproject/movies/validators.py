@@ -1,79 +1,115 @@
-import copy
 import datetime
+import functools
+from collections.abc import Mapping
 
 from django.core.validators import MaxValueValidator
-from django.http.request import QueryDict
 
 from .utils import Country
 
 
-class InputDataValidator:
+class InputSchema:
     """
-    Validator for checking required and optional fields in API input data.
+    Schema of the keys accepted in the input data of an API action.
 
-    This class validates whether the input data in a request contains all the required fields 
-    and optionally checks for optional fields. It is used to validate the input data in API requests.
+    A schema is built once, usually at import time, and checks the keys of the
+    request data with set operations. The data is neither copied nor modified.
 
     Attributes
     ----------
-    request_data : dict
-        The data from the request to validate.
-    required_fields : list
-        A list of required field names that must be present in the request data.
-    optional_fields : list
-        A list of optional field names that should be present in the request data.
-    data : dict
-        A dictionary to store the validated data.
+    required_fields : frozenset
+        The field names that must be present in the request data.
+    optional_fields : frozenset
+        The field names that may be present in the request data.
+    allowed_fields : frozenset
+        Every field name accepted in the request data.
+
+    Methods
+    -------
+    validate(request) -> bool
+        Returns True if the keys of the request data match the schema, False otherwise.
     """
 
-    def __init__(self, request,  required_fields: list = None, optional_fields: list = None) -> None:
+    def __init__(self, required_fields: list = None, optional_fields: list = None) -> None:
         """
-        Initialize the InputDataValidator with request data, required fields, and optional fields.
+        Compile the schema from the required and optional fields.
 
         Parameters
         ----------
-        request : django.http.request.HttpRequest
-            The HTTP request object containing the input data.
         required_fields : list, optional
             A list of required field names that must be present in the request data.
         optional_fields : list, optional
-            A list of optional field names that should be present in the request data.
+            A list of optional field names that may be present in the request data.
         """
-        self.request = request
-        self.request_data: dict = copy.deepcopy(request.data)
-        self.required_fields = required_fields
-        self.optional_fields = optional_fields
-        self.data = dict()
+        self.required_fields = frozenset(required_fields or ())
+        self.optional_fields = frozenset(optional_fields or ())
+        self.allowed_fields = self.required_fields | self.optional_fields
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def compile(cls, required_fields: tuple = (), optional_fields: tuple = ()):
+        """
+        Get the shared schema of the given fields, building it on first use.
+        """
+        return cls(required_fields, optional_fields)
 
-    def check_required_fields(self):
+    def validate(self, request) -> bool:
         """
-        Check if the request data contains all the required fields.
+        Validate the keys of the request data.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            The HTTP request object containing the input data.
 
         Returns
         -------
         bool
-            Returns True if all required fields are present in the request data, False otherwise.
+            Returns True if the request data contains every required field and no
+            field outside the required and optional ones, False otherwise.
         """
-        for field in self.required_fields:
-            if field not in self.request_data:
-                return False
-            self.data[field] = self.request_data[field]
-            self.request_data.pop(field)
+        data = request.data
+        if not data:
+            # Requests without a body, e.g. every GET request
+            return not self.required_fields
+        if not isinstance(data, Mapping):
+            return False
+        keys = data.keys()
+        return self.required_fields <= keys and keys <= self.allowed_fields
+
+
+class InputDataValidator:
+    """
+    Validator for checking required and optional fields in API input data.
+
+    This class validates whether the input data in a request contains all the required fields 
+    and optionally checks for optional fields. It is used to validate the input data in API requests.
+    The fields are checked with the `InputSchema` compiled for them, prefer declaring
+    the schema once next to the action.
 
-    def check_optional_fields(self):
+    Attributes
+    ----------
+    request : rest_framework.request.Request
+        The HTTP request to validate.
+    schema : InputSchema
+        The schema of the required and optional fields.
+    """
+
+    def __init__(self, request,  required_fields: list = None, optional_fields: list = None) -> None:
         """
-        Check if the request data contains all the optional fields.
+        Initialize the InputDataValidator with request data, required fields, and optional fields.
 
-        Returns
-        -------
-        bool
-            Returns True if all optional fields are present in the request data, False otherwise.
+        Parameters
+        ----------
+        request : django.http.request.HttpRequest
+            The HTTP request object containing the input data.
+        required_fields : list, optional
+            A list of required field names that must be present in the request data.
+        optional_fields : list, optional
+            A list of optional field names that should be present in the request data.
         """
-        for field in self.request.data:
-            if field not in self.optional_fields:
-                return False
-            self.data[field] = self.request_data[field]
-            self.request_data.pop(field)
+        self.request = request
+        self.schema = InputSchema.compile(
+            tuple(required_fields or ()), tuple(optional_fields or ()))
 
     def validate(self):
         """
@@ -84,13 +120,7 @@ class InputDataValidator:
         bool
             Returns True if the input data contains all the required and optional fields, False otherwise.
         """
-        if self.required_fields:
-            self.check_required_fields()
-        if self.optional_fields:
-            self.check_optional_fields()
-        if self.request.data != self.data:  # If no input data accepted, the self.data will be empty just as expected
-            return False
-        return True
+        return self.schema.validate(self.request)
 
 
 class YearValidator:
@@ -137,7 +167,7 @@ class CountryValidator:
     """
     Validator for checking if a given country code is valid.
 
-    This validator checks if a given country code is present in the list of ISO Alpha-2 country codes.
+    This validator checks if a given country code is present in the set of ISO Alpha-2 country codes.
     """
 
     def is_valid(self, value):
@@ -154,4 +184,15 @@ class CountryValidator:
         bool
             Returns True if the country code is valid, False otherwise.
         """
-        return str(value).strip() in Country().IsoAlpha2List
+        return str(value).strip() in Country().codes
+
+    def codes(self):
+        """
+        Get every valid country code, to check many values with set membership.
+
+        Returns
+        -------
+        frozenset
+            The ISO Alpha-2 country codes.
+        """
+        return Country().codes
@@ -16,12 +16,57 @@ PRODUCTION_YEAR = "production_year"
 FULL_NAME = "full_name"
 DOB = "dob"
 ACTOR_ID = "actor_id"
+ACTOR_IDS = "actor_ids"
+ADD = "add"
+REMOVE = "remove"
+REPLACE = "replace"
+DIRECTOR_ID = "director_id"
 DETAILS = "details"
+ID = "id"
+INDEX = "index"
+ERRORS = "errors"
+CURSOR = "cursor"
+PAGE_SIZE = "page_size"
+ORDERING = "ordering"
+QUERY = "q"
+BACKEND = "backend"
+MAX_DEPTH = "max_depth"
+DEGREES = "degrees"
+PATH = "path"
+KIND = "kind"
+TITLE = "title"
+CODE = "code"
+ENABLED = "enabled"
+K = "k"
+INFLUENCE = "influence"
+DEPTH = "depth"
+LIMIT = "limit"
+COMPONENT = "component"
+NODES = "nodes"
+EDGES = "edges"
+TRUNCATED = "truncated"
+ARTIST = "artist"
+MOVIE = "movie"
+SIMILARITY = "similarity"
+COUNT = "count"
+FILE = "file"
+LINE = "line"
+STATS = "stats"
 
 MOVIES_DIRECTOR_RELATED_NAME = "movies_director"
 MOVIES_ACTORS_RELATED_NAME = "movies_actors"
+COLLABORATIONS_RELATED_NAME = "collaborations"
+
+# Text search configuration of the `search_vector` columns, names are not stemmed
+SEARCH_CONFIG = "simple"
+SEARCH_KIND_MOVIE = "movie"
+SEARCH_KIND_ARTIST = "artist"
+# Kinds of the credits of the neighborhood graph
+CREDIT_KIND_ACTED = "acted_in"
+CREDIT_KIND_DIRECTED = "directed"
 
 GET = "GET"
+HEAD = "HEAD"
 PUT = "PUT"
 PATCH = "PATCH"
 POST = "POST"
@@ -30,3 +75,17 @@ DELETE = "DELETE"
 INVALID_INPUT_DATA = _("Invalid input data")
 MOVIE_NOT_FOUND = _("Movie not found.")
 ARTIST_NOT_FOUND = _("Artist not found.")
+INVALID_CURSOR = _("Invalid cursor.")
+SEARCH_QUERY_REQUIRED = _("The search query is required.")
+INVALID_COUNTRY = _("Invalid country code.")
+BULK_TOO_LARGE = _("Too many items in the bulk request.")
+DUPLICATE_ID = _("The id appears more than once in the request.")
+DIRECTOR_ALREADY_ASSIGNED = _("The artist already directs another movie.")
+REPLACE_IS_EXCLUSIVE = _("`replace` can not be combined with `add` or `remove`.")
+ADD_AND_REMOVE_OVERLAP = _("An actor can not be both added and removed.")
+PATH_NOT_FOUND = _("The artists are not linked within the maximum depth.")
+PATH_SEARCH_TIMEOUT = _("The path search exceeded its time budget.")
+INVALID_IMPORT_KIND = _("The kind must be `artists` or `movies`.")
+UNSUPPORTED_FORMAT = _("The file must be a .csv, .jsonl or .ndjson file.")
+FILE_REQUIRED = _("The file is required.")
+UNREADABLE_FILE = _("The file could not be read, the records before the line were imported.")
@@ -1,29 +1,348 @@
-from rest_framework import mixins, status, viewsets
+import hashlib
+import io
+
+from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import transaction
+from django.db.models import (OuterRef, Prefetch, aprefetch_related_objects,
+                              prefetch_related_objects)
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework import mixins, status, views, viewsets
 from rest_framework.decorators import action
+from rest_framework.pagination import _positive_int
 from rest_framework.response import Response
 
 import movies.variables as variables
 
+from .bulk import ArtistsBulkOperation, MoviesBulkOperation
+from .cache import response_cache
+from .conditional import Validators
 from .filters import MoviesFilter
-from .serializers import (ArtistSerializer, EditActorsOfMovieSerializer,
-                          MovieSerializer)
-from .validators import CountryValidator, InputDataValidator
+from .graph import Neighborhood, PathSearch, PathSearchTimeout, graph_index
+from .imports import IMPORTS, UnreadableCatalogue, file_format
+from .models import Artists, Collaborations, Movies
+from .pagination import ArtistsPagination, MoviesPagination, SearchPagination
+from .renderers import CSVRenderer, NDJSONRenderer
+from .search import search_querysets
+from .serializers import (ArtistSerializer, EditActorSetOfMovieSerializer,
+                          EditActorsOfMovieSerializer, MovieSerializer,
+                          SearchResultSerializer)
+from .similarity import similar_movies
+from .utils import Country
+from .validators import CountryValidator, InputSchema
+
+
+# Input schemas of the actions
+MOVIE_FIELDS = [variables.NAME, variables.PRODUCTION_YEAR,
+                variables.DIRECTOR, variables.ACTORS]
+ARTIST_FIELDS = [variables.FULL_NAME, variables.COUNTRY, variables.DOB]
+
+NO_INPUT = InputSchema()
+MOVIE_INPUT = InputSchema(required_fields=MOVIE_FIELDS)
+MOVIE_PARTIAL_INPUT = InputSchema(optional_fields=MOVIE_FIELDS)
+ACTOR_INPUT = InputSchema(required_fields=[variables.ACTOR_ID])
+ACTOR_SET_INPUT = InputSchema(
+    optional_fields=[variables.ADD, variables.REMOVE, variables.REPLACE])
+ARTIST_INPUT = InputSchema(required_fields=ARTIST_FIELDS)
+ARTIST_PARTIAL_INPUT = InputSchema(optional_fields=ARTIST_FIELDS)
+
+
+def export_response(request, queryset, fields, filename):
+    """
+    Stream the rows of a `values()` queryset in the format negotiated for the request.
+
+    Rows are read through a server-side cursor, `settings.EXPORT_CHUNK_SIZE` at a
+    time, and encoded one by one, so memory use does not depend on the number of rows.
+
+    Parameters
+    ----------
+    request : Request
+        The HTTP request object, its accepted renderer selects the format.
+    queryset : django.db.models.query.QuerySet
+        A `values()` queryset containing `fields`.
+    fields : list
+        The exported columns, in order.
+    filename : str
+        The name of the downloaded file, without extension.
+
+    Returns
+    -------
+    StreamingHttpResponse
+        The streamed export.
+    """
+    renderer = request.accepted_renderer
+    rows = queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        renderer.stream(rows, fields),
+        content_type=f'{renderer.media_type}; charset={renderer.charset}'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{renderer.format}"'
+    return response
+
+
+def cached_response(request, cache_key):
+    """
+    Answer a request from the response cache.
+
+    Parameters
+    ----------
+    request : Request
+        The HTTP request object.
+    cache_key : str
+        The cache key of the request, see `ResponseCache.key`.
+
+    Returns
+    -------
+    Response
+        The cached response, a `304 Not Modified` response if the client copy is
+        current, or None on a cache miss.
+    """
+    return answer_cached(request, response_cache.get(cache_key))
 
 
-class MoviesViewSet(viewsets.GenericViewSet):
+async def acached_response(request, cache_key):
+    """
+    Asynchronous version of `cached_response`.
+    """
+    return answer_cached(request, await response_cache.aget(cache_key))
+
+
+def answer_cached(request, cached):
+    if cached is None:
+        return None
+    data, validators = cached
+    return validators.not_modified(request) or validators.apply(
+        Response(data=data, status=status.HTTP_200_OK))
+
+
+class CachedReadMixin:
+    """
+    Steps of the cached `list` and `retrieve` actions of a viewset.
+
+    The sync actions and their asynchronous versions, served by
+    `async_views.AsyncReadView`, run the same steps and only differ in how they
+    query the database: check the input, serve from cache, answer conditional
+    requests, then paginate or serialize and cache the response.
+
+    Attributes
+    ----------
+    cache_models : list
+        The models the responses are built from, see `ResponseCache.key`.
+    not_found_message : str
+        The detail of the response to an unknown primary key.
+
+    Methods
+    -------
+    read_page(request) -> Response
+        Answers a `list` request.
+    read_instance(request, pk) -> Response
+        Answers a `retrieve` request.
+    aread_page(request), aread_instance(request, pk)
+        Asynchronous versions of `read_page` and `read_instance`.
+    """
+    cache_models = []
+    not_found_message = None
+
+    def list_queryset(self, request):
+        """
+        Get the rows to list, or the response to an invalid request.
+
+        Returns
+        -------
+        tuple
+            The queryset, or None, and the error response, or None.
+        """
+        return self.get_queryset(), None
+
+    def instance_prefetches(self) -> list:
+        """
+        Get the lookups prefetched once a retrieved instance is known to be sent.
+        """
+        return []
+
+    def read_cache(self, request):
+        """
+        Check a read request has no input, and look its response up in the cache.
+
+        Returns
+        -------
+        tuple
+            The response to send at once, or None, and the cache key of the request.
+        """
+        if not NO_INPUT.validate(request):
+            return self.invalid_input(), None
+        cache_key = response_cache.key(request, self.cache_models)
+        return cached_response(request, cache_key), cache_key
+
+    async def aread_cache(self, request):
+        """
+        Asynchronous version of `read_cache`.
+        """
+        if not NO_INPUT.validate(request):
+            return self.invalid_input(), None
+        cache_key = await response_cache.akey(request, self.cache_models)
+        return await acached_response(request, cache_key), cache_key
+
+    @staticmethod
+    def invalid_input():
+        return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+
+    def not_found(self):
+        return Response(
+            data={variables.DETAILS: self.not_found_message},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    def page_response(self, page):
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def instance_response(self, instance):
+        serializer = self.get_serializer(instance)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+    def store(self, cache_key, response, validators):
+        """
+        Cache the data of a response, and set its validators.
+        """
+        response_cache.set(cache_key, (response.data, validators))
+        return validators.apply(response)
+
+    async def astore(self, cache_key, response, validators):
+        """
+        Asynchronous version of `store`.
+        """
+        await response_cache.aset(cache_key, (response.data, validators))
+        return validators.apply(response)
+
+    def read_page(self, request):
+        # Check input data, serve from cache
+        response, cache_key = self.read_cache(request)
+        if response is not None:
+            return response
+        queryset, response = self.list_queryset(request)
+        if response is not None:
+            return response
+
+        # Answer conditional requests
+        validators = Validators.of_queryset(queryset)
+        response = validators.not_modified(request)
+        if response is not None:
+            return response
+
+        # Paginate and send data to serializer
+        page = self.paginate_queryset(queryset)
+        return self.store(cache_key, self.page_response(page), validators)
+
+    async def aread_page(self, request):
+        # Check input data, serve from cache
+        response, cache_key = await self.aread_cache(request)
+        if response is not None:
+            return response
+        queryset, response = self.list_queryset(request)
+        if response is not None:
+            return response
+
+        # Answer conditional requests
+        validators = await Validators.aof_queryset(queryset)
+        response = validators.not_modified(request)
+        if response is not None:
+            return response
+
+        # Paginate and send data to serializer
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        return await self.astore(cache_key, self.page_response(page), validators)
+
+    def read_instance(self, request, pk):
+        # Check input data, serve from cache
+        response, cache_key = self.read_cache(request)
+        if response is not None:
+            return response
+        instance = self.get_queryset().filter(pk=pk).first()
+        if not instance:
+            return self.not_found()
+
+        # Answer conditional requests before the prefetches
+        validators = Validators.of_instance(instance)
+        response = validators.not_modified(request)
+        if response is not None:
+            return response
+
+        # Send data to serializer
+        prefetch_related_objects([instance], *self.instance_prefetches())
+        return self.store(cache_key, self.instance_response(instance), validators)
+
+    async def aread_instance(self, request, pk):
+        # Check input data, serve from cache
+        response, cache_key = await self.aread_cache(request)
+        if response is not None:
+            return response
+        instance = await self.get_queryset().filter(pk=pk).afirst()
+        if not instance:
+            return self.not_found()
+
+        # Answer conditional requests before the prefetches
+        validators = Validators.of_instance(instance)
+        response = validators.not_modified(request)
+        if response is not None:
+            return response
+
+        # Send data to serializer
+        await aprefetch_related_objects([instance], *self.instance_prefetches())
+        return await self.astore(cache_key, self.instance_response(instance), validators)
+
+
+class MoviesViewSet(CachedReadMixin, viewsets.GenericViewSet):
     """
     API endpoint that allows operations on Movies.
 
     This viewset provides `list`, `retrieve`, and `show_preview` actions for Movies objects.
     """
     queryset = MovieSerializer.get_queryset()
+    pagination_class = MoviesPagination
+    # Movies are filtered by artist names, and deleting an artist deletes its
+    # actor rows without a `m2m_changed` signal
+    cache_models = [Movies, Artists]
+    not_found_message = variables.MOVIE_NOT_FOUND
 
     def get_serializer_class(self):
         if self.action in ['remove_actor', 'add_actor']:
             return EditActorsOfMovieSerializer
+        elif self.action == 'actors':
+            return EditActorSetOfMovieSerializer
         else:
             return MovieSerializer
 
+    def get_queryset(self):
+        """
+        Build the queryset of the current action.
+
+        Actions which serialize existing movies prefetch the actor ids with one
+        extra query, instead of one query per movie. The director is rendered from
+        the `director_id` column, so it does not need a join.
+        """
+        queryset = super().get_queryset()
+        if self.action in ['list', 'bulk']:
+            queryset = queryset.prefetch_related(self.actors_prefetch())
+        return queryset
+
+    @staticmethod
+    def actors_prefetch():
+        # Ordered, so the actors of a movie are always listed the same way
+        return Prefetch(variables.ACTORS, queryset=Artists.objects.only('pk').order_by('pk'))
+
+    def instance_prefetches(self) -> list:
+        return [self.actors_prefetch()]
+
+    def list_queryset(self, request):
+        # Apply filtering
+        filterset = MoviesFilter(request.GET, queryset=self.get_queryset())
+        if not filterset.is_valid():
+            return None, Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        return filterset.qs, None
+
     def create(self, request, *args, **kwargs):
         """
         Create a new movie instance.
@@ -42,9 +361,7 @@ class MoviesViewSet(viewsets.GenericViewSet):
         """
 
         # Check input data
-        required_fields = [
-            variables.NAME, variables.PRODUCTION_YEAR, variables.DIRECTOR, variables.ACTORS]
-        if not InputDataValidator(request, required_fields=required_fields).validate():
+        if not MOVIE_INPUT.validate(request):
             return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
 
         # Send data to serializer
@@ -65,9 +382,11 @@ class MoviesViewSet(viewsets.GenericViewSet):
 
     def list(self, request, *args, **kwargs):
         """
-        Retrieve a list of all movies.
+        Retrieve a page of movies.
 
-        This action returns a list of all movies available in the system.
+        This action returns the movies available in the system, one page at a time.
+        Pages are addressed by the opaque `cursor` query param, the page length by
+        `page_size` and the order by `ordering` (`production_year` or `-production_year`).
 
         Parameters
         ----------
@@ -79,25 +398,13 @@ class MoviesViewSet(viewsets.GenericViewSet):
         BaseResponse
             A response object containing the list of movies, HTTP status code, and business status code.
         """
-        # Check input data
-        if not InputDataValidator(request).validate():
-            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
-
-        # Apply filtering
-        filterset = MoviesFilter(request.GET, queryset=self.get_queryset())
-        if not filterset.is_valid():
-            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        return self.read_page(request)
 
-        # Send filterd data to serializer
-        queryset = filterset.qs
-        serializer = self.get_serializer(queryset, many=True)
-
-        # Return movies list
-        return Response(
-            data=serializer.data,
-            exception=False,
-            status=status.HTTP_200_OK,
-        )
+    async def alist(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `list`.
+        """
+        return await self.aread_page(request)
 
     def retrieve(self, request, pk=None, *args, **kwargs):
         """
@@ -117,24 +424,13 @@ class MoviesViewSet(viewsets.GenericViewSet):
         BaseResponse
             A response object containing the movie details, HTTP status code, and business status code.
         """
-        # Check input data
-        if not InputDataValidator(request).validate():
-            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
-
-        # Send data to serializer
-        instance = self.get_queryset().filter(pk=pk).first()
-        if not instance:
-            return Response(
-                data={variables.DETAILS: variables.MOVIE_NOT_FOUND},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        serializer = self.get_serializer(instance)
+        return self.read_instance(request, pk)
 
-        # Retrieve
-        return Response(
-            data=serializer.data,
-            status=status.HTTP_200_OK
-        )
+    async def aretrieve(self, request, pk=None, *args, **kwargs):
+        """
+        Asynchronous version of `retrieve`.
+        """
+        return await self.aread_instance(request, pk)
 
     def update(self, request, pk=None, *args, **kwargs):
         """
@@ -155,16 +451,10 @@ class MoviesViewSet(viewsets.GenericViewSet):
             A response object containing the updated movie details, HTTP status code, and business status code.
         """
         # Check input data
-        fields = [variables.NAME, variables.PRODUCTION_YEAR,
-                  variables.DIRECTOR, variables.ACTORS]
-
         partial = request.method == variables.PATCH
-        if partial:
-            if not InputDataValidator(request=request, optional_fields=fields).validate():
-                return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
-        else:
-            if not InputDataValidator(request=request, required_fields=fields).validate():
-                return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+        schema = MOVIE_PARTIAL_INPUT if partial else MOVIE_INPUT
+        if not schema.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
 
         # Send data to serializer
         instance = self.get_queryset().filter(pk=pk).first()
@@ -208,7 +498,7 @@ class MoviesViewSet(viewsets.GenericViewSet):
             A response object indicating success or failure, HTTP status code, and business status code.
         """
         # Check input data
-        if not InputDataValidator(request).validate():
+        if not NO_INPUT.validate(request):
             return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
 
         # Delete movie
@@ -242,10 +532,7 @@ class MoviesViewSet(viewsets.GenericViewSet):
             A response object indicating success or failure, HTTP status code.
         """
         # Check input data
-        required_fields = [variables.ACTOR_ID]
-        validator = InputDataValidator(
-            request, required_fields=required_fields)
-        if not validator.validate():
+        if not ACTOR_INPUT.validate(request):
             return Response(status=status.HTTP_400_BAD_REQUEST, data=variables.INVALID_INPUT_DATA)
 
         # Add actor
@@ -265,7 +552,6 @@ class MoviesViewSet(viewsets.GenericViewSet):
             )
 
         movie.actors.add(actor)
-        movie.save()
         return Response(
             data={variables.DETAILS: "Actor added successfully."},
             status=status.HTTP_200_OK
@@ -289,10 +575,7 @@ class MoviesViewSet(viewsets.GenericViewSet):
             A response object indicating success or failure, HTTP status code.
         """
         # Check input data
-        required_fields = [variables.ACTOR_ID]
-        validator = InputDataValidator(
-            request, required_fields=required_fields)
-        if not validator.validate():
+        if not ACTOR_INPUT.validate(request):
             return Response(status=status.HTTP_400_BAD_REQUEST, data=variables.INVALID_INPUT_DATA)
 
         # Remove actor
@@ -319,14 +602,213 @@ class MoviesViewSet(viewsets.GenericViewSet):
             )
 
         movie.actors.remove(actor)
-        movie.save()
         return Response(
             data={variables.DETAILS: "Actor removed successfully."},
             status=status.HTTP_200_OK
         )
 
+    @action(detail=True, methods=[variables.POST])
+    def actors(self, request, pk=None):
+        """
+        Add, remove or replace many actors of a specific movie at once.
+
+        The body contains lists of actor ids under `add` and/or `remove`, or under
+        `replace` to set the whole cast. All the ids are resolved with one query and
+        the changes are applied with one insert and/or one delete on the actors
+        through table.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+        pk : int, optional
+            The primary key of the movie.
+
+        Returns
+        -------
+        Response
+            A response object containing the updated movie details or the missing
+            actor ids, HTTP status code.
+        """
+        # Check input data
+        if not ACTOR_SET_INPUT.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=variables.INVALID_INPUT_DATA)
+
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                data={variables.DETAILS: serializer.errors},
+                exception=True,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        changes = serializer.validated_data
+
+        movie = self.get_queryset().filter(pk=pk).first()
+        if not movie:
+            return Response(
+                data={variables.DETAILS: variables.MOVIE_NOT_FOUND},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Resolve all the actor ids at once
+        actor_ids = set().union(*changes.values())
+        found = set(Artists.objects.filter(
+            pk__in=actor_ids).values_list('pk', flat=True))
+        missing = sorted(actor_ids - found)
+        if missing:
+            return Response(
+                data={variables.DETAILS: variables.ARTIST_NOT_FOUND,
+                      variables.ACTOR_IDS: missing},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Apply changes
+        with transaction.atomic():
+            if variables.REPLACE in changes:
+                movie.actors.set(changes[variables.REPLACE])
+            if changes.get(variables.REMOVE):
+                movie.actors.remove(*changes[variables.REMOVE])
+            if changes.get(variables.ADD):
+                movie.actors.add(*changes[variables.ADD])
+
+        return Response(
+            data=MovieSerializer(movie).data,
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=[variables.GET])
+    def similar(self, request, pk=None):
+        """
+        Get the movies with the most similar cast.
+
+        Candidates are the movies sharing a MinHash bucket with the movie, they are
+        ranked by the Jaccard similarity of their actors. The `k` most similar
+        (`settings.SIMILAR_MOVIES_DEFAULT_K` by default, at most
+        `settings.SIMILAR_MOVIES_MAX_K`) are returned.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+        pk : int, optional
+            The primary key of the movie.
+
+        Returns
+        -------
+        Response
+            A response object containing the similar movies and their similarity,
+            most similar first, HTTP status code.
+        """
+        # Check input data
+        if not NO_INPUT.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+        try:
+            k = _positive_int(
+                request.query_params.get(variables.K, settings.SIMILAR_MOVIES_DEFAULT_K),
+                strict=True, cutoff=settings.SIMILAR_MOVIES_MAX_K)
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+
+        scores = similar_movies(int(pk), k) if str(pk).isdigit() else None
+        # A movie without actors is similar to none
+        if scores is None and not (str(pk).isdigit() and Movies.objects.filter(pk=pk).exists()):
+            return Response(
+                data={variables.DETAILS: variables.MOVIE_NOT_FOUND},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        movies = Movies.objects.only(variables.NAME).in_bulk([movie_id for movie_id, _ in scores or ()])
+        return Response(
+            data=[{variables.ID: movie_id, variables.NAME: movies[movie_id].name,
+                   variables.SIMILARITY: similarity}
+                  for movie_id, similarity in scores or () if movie_id in movies],
+            status=status.HTTP_200_OK
+        )
 
-class ArtistViewSet(viewsets.GenericViewSet):
+    @action(detail=False, methods=[variables.GET], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        """
+        Export all the movies matching the `MoviesFilter` query params.
+
+        The rows are streamed as NDJSON (`?format=ndjson`, the default) or CSV
+        (`?format=csv`). The actor ids of every movie are read with a correlated
+        array subquery, so the export runs a single query.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+
+        Returns
+        -------
+        StreamingHttpResponse
+            A streamed response containing the exported movies.
+        """
+        # Check input data
+        if not NO_INPUT.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+
+        # Apply filtering
+        filterset = MoviesFilter(request.GET, queryset=self.get_queryset())
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Stream movies
+        fields = ['id', variables.NAME, variables.PRODUCTION_YEAR,
+                  variables.DIRECTOR_ID, variables.ACTOR_IDS]
+        actor_ids = Movies.actors.through.objects.filter(
+            movies_id=OuterRef('pk')).order_by('artists_id').values('artists_id')
+        queryset = filterset.qs.order_by('pk').annotate(
+            **{variables.ACTOR_IDS: ArraySubquery(actor_ids)}).values(*fields)
+        return export_response(request, queryset, fields, 'movies')
+
+    @action(detail=False, methods=[variables.POST, variables.PUT, variables.DELETE])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create, update or delete many movies at once.
+
+        `POST` takes a list of movies to create, `PUT` a list of movies with their
+        `id` to update and `DELETE` a list of ids to delete. Every item is validated
+        before anything is written, and all the writes run in one transaction.
+        Errors are reported per item index.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+
+        Returns
+        -------
+        Response
+            A response object containing the written movies or the errors, HTTP status code.
+        """
+        # Check input data
+        operation = MoviesBulkOperation(request.data)
+        if not operation.check_size():
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.BULK_TOO_LARGE)
+        if not operation.is_valid(request.method):
+            return Response(
+                data={variables.DETAILS: operation.error_list},
+                exception=True,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Write
+        pks = operation.save()
+        if request.method == variables.DELETE:
+            return Response(
+                data={variables.DETAILS: f"{len(pks)} movies deleted successfully"},
+                status=status.HTTP_204_NO_CONTENT
+            )
+        instances = self.get_queryset().in_bulk(pks)
+        serializer = self.get_serializer([instances[pk] for pk in pks], many=True)
+        return Response(
+            data=serializer.data,
+            status=status.HTTP_201_CREATED if request.method == variables.POST else status.HTTP_200_OK
+        )
+
+
+class ArtistViewSet(CachedReadMixin, viewsets.GenericViewSet):
     """
     API endpoint that allows operations on Artists.
 
@@ -334,12 +816,18 @@ class ArtistViewSet(viewsets.GenericViewSet):
     """
     queryset = ArtistSerializer().get_queryset()
     serializer_class = ArtistSerializer
+    pagination_class = ArtistsPagination
+    cache_models = [Artists]
+    not_found_message = variables.ARTIST_NOT_FOUND
 
     def list(self, request, *args, **kwargs):
         """
-        Retrieve a list of all artists.
+        Retrieve a page of artists.
 
-        This action returns a list of all artists available in the system.
+        This action returns the artists available in the system, one page at a time.
+        Pages are addressed by the opaque `cursor` query param, the page length by
+        `page_size` and the order by `ordering` (`full_name`, `influence`, or the
+        same prefixed with `-` for descending order).
 
         Parameters
         ----------
@@ -351,19 +839,13 @@ class ArtistViewSet(viewsets.GenericViewSet):
         Response
             A response object containing the list of artists, HTTP status code.
         """
-        # Check input data
-        if not InputDataValidator(request).validate():
-            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+        return self.read_page(request)
 
-        # Send data to serializer
-        queryset = self.get_queryset()
-        serializer = self.get_serializer_class()(queryset, many=True)
-
-        # Return Artists List
-        return Response(
-            data=serializer.data,
-            status=status.HTTP_200_OK
-        )
+    async def alist(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `list`.
+        """
+        return await self.aread_page(request)
 
     def retrieve(self, request, pk=None, *args, **kwargs):
         """
@@ -383,24 +865,13 @@ class ArtistViewSet(viewsets.GenericViewSet):
         Response
             A response object containing the artist details, HTTP status code.
         """
-        # Check input data
-        if not InputDataValidator(request).validate():
-            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+        return self.read_instance(request, pk)
 
-        # Send data to serializer
-        instance = self.get_queryset().filter(pk=pk).first()
-        if not instance:
-            return Response(
-                data={variables.DETAILS: "Artist not found."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        serializer = self.get_serializer(instance)
-
-        # Retrieve artist
-        return Response(
-            data=serializer.data,
-            status=status.HTTP_200_OK
-        )
+    async def aretrieve(self, request, pk=None, *args, **kwargs):
+        """
+        Asynchronous version of `retrieve`.
+        """
+        return await self.aread_instance(request, pk)
 
     def create(self, request, *args, **kwargs):
         """
@@ -419,14 +890,11 @@ class ArtistViewSet(viewsets.GenericViewSet):
             A response object containing the created artist details, HTTP status code.
         """
         # Check input data
-        required_fields = [variables.FULL_NAME,
-                           variables.COUNTRY, variables.DOB]
-
         if variables.COUNTRY in request.data:
             if not CountryValidator().is_valid(request.data[variables.COUNTRY]):
                 return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
 
-        if not InputDataValidator(request=request, required_fields=required_fields).validate():
+        if not ARTIST_INPUT.validate(request):
             return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
 
         # Send data to serializer
@@ -465,24 +933,20 @@ class ArtistViewSet(viewsets.GenericViewSet):
             A response object containing the updated artist details, HTTP status code.
         """
         # Check input data
-        fields = [variables.FULL_NAME, variables.COUNTRY, variables.DOB]
         if variables.COUNTRY in request.data:
             if not CountryValidator().is_valid(request.data[variables.COUNTRY]):
                 return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
 
         partial = request.method == variables.PATCH
-        if partial:
-            if not InputDataValidator(request=request, optional_fields=fields).validate():
-                return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
-        else:
-            if not InputDataValidator(request=request, required_fields=fields).validate():
-                return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+        schema = ARTIST_PARTIAL_INPUT if partial else ARTIST_INPUT
+        if not schema.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
 
         # Send data to serializer
         instance = self.get_queryset().filter(pk=pk).first()
         if not instance:
             return Response(
-                data={variables.DETAILS: "Artist not found."},
+                data={variables.DETAILS: variables.ARTIST_NOT_FOUND},
                 status=status.HTTP_404_NOT_FOUND
             )
         serializer = self.get_serializer(
@@ -520,14 +984,14 @@ class ArtistViewSet(viewsets.GenericViewSet):
             A response object indicating success or failure, HTTP status code.
         """
         # Check input data
-        if not InputDataValidator(request).validate():
+        if not NO_INPUT.validate(request):
             return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
 
         # Delete Artist
         instance = self.get_queryset().filter(pk=pk).first()
         if not instance:
             return Response(
-                data={variables.DETAILS: "Artist not found."},
+                data={variables.DETAILS: variables.ARTIST_NOT_FOUND},
                 status=status.HTTP_404_NOT_FOUND
             )
         instance.delete()
@@ -535,3 +999,457 @@ class ArtistViewSet(viewsets.GenericViewSet):
             data={variables.DETAILS: "Artist deleted successfully"},
             status=status.HTTP_204_NO_CONTENT
         )
+
+    @action(detail=True, methods=[variables.GET], url_path=r'path/(?P<target>[^/.]+)')
+    def path(self, request, pk=None, target=None):
+        """
+        Find the shortest chain of co-credited artists between two artists.
+
+        Two artists are linked by a movie they both acted in or directed. The chain
+        has at most `max_depth` movies (`settings.GRAPH_PATH_MAX_DEPTH` by default
+        and at most), and the search gives up after `settings.GRAPH_PATH_TIME_BUDGET`
+        seconds.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+        pk : int, optional
+            The primary key of the first artist.
+        target : int, optional
+            The primary key of the last artist.
+
+        Returns
+        -------
+        Response
+            A response object containing the number of movies of the chain and the
+            chain itself as alternating artists and movies, HTTP status code.
+        """
+        # Check input data
+        if not NO_INPUT.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+        try:
+            max_depth = _positive_int(
+                request.query_params.get(variables.MAX_DEPTH, settings.GRAPH_PATH_MAX_DEPTH),
+                strict=True, cutoff=settings.GRAPH_PATH_MAX_DEPTH)
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+
+        try:
+            source, target = _positive_int(pk, strict=True), _positive_int(target, strict=True)
+        except ValueError:
+            return Response(
+                data={variables.DETAILS: variables.ARTIST_NOT_FOUND},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        ids = {source, target}
+        artists = self.get_queryset().only(variables.FULL_NAME).in_bulk(ids)
+        if len(artists) != len(ids):
+            return Response(
+                data={variables.DETAILS: variables.ARTIST_NOT_FOUND},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Artists of different components are never linked
+        if not graph_index.components.connected(source, target):
+            return Response(
+                data={variables.DETAILS: variables.PATH_NOT_FOUND},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Search
+        search = PathSearch(max_depth, settings.GRAPH_PATH_TIME_BUDGET)
+        try:
+            chain = search.find(source, target)
+        except PathSearchTimeout:
+            return Response(
+                data={variables.DETAILS: variables.PATH_SEARCH_TIMEOUT},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        if chain is None:
+            return Response(
+                data={variables.DETAILS: variables.PATH_NOT_FOUND},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Name the artists and movies of the chain
+        artists.update(self.get_queryset().only(variables.FULL_NAME).in_bulk(chain[2:-1:2]))
+        movies = Movies.objects.only(variables.NAME).in_bulk(chain[1::2])
+        path = [
+            {variables.KIND: variables.SEARCH_KIND_ARTIST, variables.ID: value,
+             variables.TITLE: artists[value].full_name}
+            if index % 2 == 0 else
+            {variables.KIND: variables.SEARCH_KIND_MOVIE, variables.ID: value,
+             variables.TITLE: movies[value].name}
+            for index, value in enumerate(chain)
+        ]
+        return Response(
+            data={variables.DEGREES: len(chain) // 2, variables.PATH: path},
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=[variables.GET])
+    def neighborhood(self, request, pk=None):
+        """
+        Get the graph of the artists and movies around an artist.
+
+        The graph holds the artists within `depth` movies of the artist and the
+        movies linking them, at most `limit` nodes. Prolific artists and large casts
+        are truncated to `settings.NEIGHBORHOOD_MAX_DEGREE` credits each, and
+        `truncated` tells whether anything was left out. Responses are cached until
+        the movies or artists change.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+        pk : int, optional
+            The primary key of the artist.
+
+        Returns
+        -------
+        Response
+            A response object containing the component of the artist (null while
+            the components are rebuilt), the nodes and the credits between them,
+            HTTP status code.
+        """
+        # Check input data
+        if not NO_INPUT.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+        try:
+            depth = _positive_int(
+                request.query_params.get(variables.DEPTH, settings.NEIGHBORHOOD_DEFAULT_DEPTH),
+                strict=True, cutoff=settings.NEIGHBORHOOD_MAX_DEPTH)
+            limit = _positive_int(
+                request.query_params.get(variables.LIMIT, settings.NEIGHBORHOOD_DEFAULT_LIMIT),
+                strict=True, cutoff=settings.NEIGHBORHOOD_MAX_LIMIT)
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+
+        # Serve from cache
+        cache_key = response_cache.key(request, [Movies, Artists])
+        response = cached_response(request, cache_key)
+        if response is not None:
+            return response
+
+        artist_ids, movie_ids, credits, truncated = [], [], [], False
+        if str(pk).isdigit():
+            neighborhood = Neighborhood(depth, limit, settings.NEIGHBORHOOD_MAX_DEGREE)
+            artist_ids, movie_ids, credits, truncated = neighborhood.collect(int(pk))
+        artists = self.get_queryset().only(variables.FULL_NAME).in_bulk(artist_ids)
+        if not artists or artist_ids[0] not in artists:
+            return Response(
+                data={variables.DETAILS: variables.ARTIST_NOT_FOUND},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        movies = Movies.objects.only(variables.NAME, variables.DIRECTOR).in_bulk(movie_ids)
+        # Rows deleted by other processes may still be in the graph index
+        artist_ids = [artist_id for artist_id in artist_ids if artist_id in artists]
+        movie_ids = [movie_id for movie_id in movie_ids if movie_id in movies]
+        credits = [(artist_id, movie_id) for artist_id, movie_id in credits
+                   if artist_id in artists and movie_id in movies]
+
+        nodes = [
+            {variables.KIND: variables.SEARCH_KIND_ARTIST, variables.ID: artist_id,
+             variables.TITLE: artists[artist_id].full_name}
+            for artist_id in artist_ids
+        ] + [
+            {variables.KIND: variables.SEARCH_KIND_MOVIE, variables.ID: movie_id,
+             variables.TITLE: movies[movie_id].name}
+            for movie_id in movie_ids
+        ]
+        edges = [
+            {variables.ARTIST: artist_id, variables.MOVIE: movie_id,
+             variables.KIND: variables.CREDIT_KIND_DIRECTED
+             if movies[movie_id].director_id == artist_id else variables.CREDIT_KIND_ACTED}
+            for artist_id, movie_id in credits
+        ]
+        data = {
+            variables.COMPONENT: graph_index.components.component(int(pk)),
+            variables.NODES: nodes,
+            variables.EDGES: edges,
+            variables.TRUNCATED: truncated,
+        }
+        validators = Validators(hashlib.sha1(repr(data).encode()).hexdigest(), None)
+        # The component is unknown while its labels are rebuilt, it is not cached
+        if data[variables.COMPONENT] is not None:
+            response_cache.set(cache_key, (data, validators))
+        return validators.apply(Response(data=data, status=status.HTTP_200_OK))
+
+    @action(detail=True, methods=[variables.GET])
+    def collaborators(self, request, pk=None):
+        """
+        Get the artists sharing the most movies with an artist.
+
+        The `k` artists (`settings.COLLABORATORS_DEFAULT_K` by default, at most
+        `settings.COLLABORATORS_MAX_K`) are read from the collaborations table
+        with one index range scan.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+        pk : int, optional
+            The primary key of the artist.
+
+        Returns
+        -------
+        Response
+            A response object containing the collaborators and the number of
+            movies they share with the artist, most first, HTTP status code.
+        """
+        # Check input data
+        if not NO_INPUT.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+        try:
+            k = _positive_int(
+                request.query_params.get(variables.K, settings.COLLABORATORS_DEFAULT_K),
+                strict=True, cutoff=settings.COLLABORATORS_MAX_K)
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+
+        rows = []
+        if str(pk).isdigit():
+            rows = list(Collaborations.objects.filter(artist=pk).order_by(
+                '-count', 'collaborator').values_list(
+                'collaborator', 'collaborator__full_name', 'count')[:k])
+        # An artist without collaborators has no rows
+        if not rows and not (str(pk).isdigit() and self.get_queryset().filter(pk=pk).exists()):
+            return Response(
+                data={variables.DETAILS: variables.ARTIST_NOT_FOUND},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            data=[{variables.ID: collaborator, variables.FULL_NAME: full_name, variables.COUNT: count}
+                  for collaborator, full_name, count in rows],
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=[variables.GET], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        """
+        Export all the artists.
+
+        The rows are streamed as NDJSON (`?format=ndjson`, the default) or CSV
+        (`?format=csv`).
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+
+        Returns
+        -------
+        StreamingHttpResponse
+            A streamed response containing the exported artists.
+        """
+        # Check input data
+        if not NO_INPUT.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+
+        # Stream artists
+        fields = ['id', variables.FULL_NAME, variables.COUNTRY, variables.DOB]
+        queryset = self.get_queryset().order_by('pk').values(*fields)
+        return export_response(request, queryset, fields, 'artists')
+
+    @action(detail=False, methods=[variables.POST, variables.PUT, variables.DELETE])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create, update or delete many artists at once.
+
+        `POST` takes a list of artists to create, `PUT` a list of artists with their
+        `id` to update and `DELETE` a list of ids to delete. Every item is validated
+        before anything is written, and all the writes run in one transaction.
+        Errors are reported per item index.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+
+        Returns
+        -------
+        Response
+            A response object containing the written artists or the errors, HTTP status code.
+        """
+        # Check input data
+        operation = ArtistsBulkOperation(request.data)
+        if not operation.check_size():
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.BULK_TOO_LARGE)
+        if not operation.is_valid(request.method):
+            return Response(
+                data={variables.DETAILS: operation.error_list},
+                exception=True,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Write
+        pks = operation.save()
+        if request.method == variables.DELETE:
+            return Response(
+                data={variables.DETAILS: f"{len(pks)} artists deleted successfully"},
+                status=status.HTTP_204_NO_CONTENT
+            )
+        instances = self.get_queryset().in_bulk(pks)
+        serializer = self.get_serializer([instances[pk] for pk in pks], many=True)
+        return Response(
+            data=serializer.data,
+            status=status.HTTP_201_CREATED if request.method == variables.POST else status.HTTP_200_OK
+        )
+
+
+class SearchViewSet(viewsets.GenericViewSet):
+    """
+    API endpoint for the full-text search of movies and artists.
+
+    This viewset provides the `list` action, which returns movies and artists
+    matching the `q` query param, best matches first.
+    """
+    serializer_class = SearchResultSerializer
+    pagination_class = SearchPagination
+
+    def list(self, request, *args, **kwargs):
+        """
+        Search movies by name and artists by full name.
+
+        The query is matched against the indexed `search_vector` columns and the
+        results are ranked with `ts_rank`. Pages are addressed by the opaque
+        `cursor` query param and their length by `page_size`.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object.
+
+        Returns
+        -------
+        Response
+            A response object containing a page of search results, HTTP status code.
+        """
+        # Check input data
+        if not NO_INPUT.validate(request):
+            return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=variables.INVALID_INPUT_DATA)
+
+        text = request.query_params.get(variables.QUERY, '').strip()
+        if not text:
+            return Response(
+                data={variables.DETAILS: variables.SEARCH_QUERY_REQUIRED},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Paginate and send results to serializer
+        page = self.paginate_queryset(search_querysets(text))
+        serializer = self.get_serializer(page, many=True)
+
+        # Return search results
+        return self.get_paginated_response(serializer.data)
+
+
+class ResponseCacheStatsAPIView(views.APIView):
+    """
+    API endpoint exposing the counters of the response cache.
+
+    The counters are those of the process serving the request.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Retrieve the hit, miss and invalidation counters of the response cache.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            The HTTP request object.
+
+        Returns
+        -------
+        Response
+            A response object containing the counters and the cache backend, HTTP status code.
+        """
+        data = response_cache.stats()
+        data[variables.BACKEND] = settings.CACHES[settings.RESPONSE_CACHE_ALIAS]['BACKEND']
+        data[variables.ENABLED] = response_cache.enabled
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class CountriesAPIView(views.APIView):
+    """
+    API endpoint listing the country codes accepted for artists.
+
+    The list is served from the in-memory country index with long-lived cache headers.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Retrieve the ISO Alpha-2 codes and names of the countries.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            The HTTP request object.
+
+        Returns
+        -------
+        Response
+            A response object containing the list of countries, HTTP status code.
+        """
+        country = Country()
+        etag = quote_etag(country.etag)
+        response = get_conditional_response(request, etag=etag) or Response(
+            data=[{variables.CODE: code, variables.NAME: name}
+                  for code, name in country.get_choices()],
+            status=status.HTTP_200_OK
+        )
+        response.headers['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.COUNTRIES_MAX_AGE)
+        return response
+
+
+class ImportAPIView(views.APIView):
+    """
+    API endpoint importing a catalogue of artists or movies, see `movies.imports`.
+
+    The file is streamed from the upload in chunks. Larger catalogues are better
+    imported with the resumable `import_catalogue` command.
+    """
+
+    def post(self, request, *args, **kwargs):
+        """
+        Import the records of an uploaded CSV or JSON lines file.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            The multipart HTTP request, with the `kind` of the records and the `file`.
+
+        Returns
+        -------
+        Response
+            A response object containing the import statistics, HTTP status code.
+        """
+        # Check input data
+        kind = request.data.get(variables.KIND)
+        if kind not in IMPORTS:
+            return Response(data={variables.DETAILS: variables.INVALID_IMPORT_KIND},
+                            status=status.HTTP_400_BAD_REQUEST)
+        upload = request.FILES.get(variables.FILE)
+        if upload is None:
+            return Response(data={variables.DETAILS: variables.FILE_REQUIRED},
+                            status=status.HTTP_400_BAD_REQUEST)
+        catalogue_format = file_format(upload.name)
+        if catalogue_format is None:
+            return Response(data={variables.DETAILS: variables.UNSUPPORTED_FORMAT},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Import the records
+        file = io.TextIOWrapper(upload, encoding='utf-8', newline='')
+        try:
+            stats = IMPORTS[kind]().run(file, catalogue_format)
+        except UnreadableCatalogue as error:
+            return Response(
+                data={variables.DETAILS: variables.UNREADABLE_FILE, variables.LINE: error.line,
+                      variables.STATS: error.stats},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(data=stats, status=status.HTTP_200_OK)
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ToolsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tools'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_recorder
+
+        # Time the queries of every connection, including the ones already open
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
@@ -0,0 +1,152 @@
+import math
+import statistics
+import timeit
+import tracemalloc
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+# Measured values compared with a baseline, the lower the better, with the
+# smallest increase flagged whatever the threshold
+COMPARED = {'best': 0, 'peak_bytes': 1024}
+
+
+def allocations(func) -> tuple:
+    """
+    Trace the memory allocated by one call of a callable.
+
+    `tracemalloc` only follows the blocks which are alive, so the count is that of
+    the blocks allocated by the call and still alive at its end, the result and
+    the caches it filled. The peak is the most memory the call held at once.
+
+    Returns
+    -------
+    tuple
+        The number of allocated blocks, and the peak of the traced memory in bytes.
+    """
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        del result
+    finally:
+        if not started:
+            tracemalloc.stop()
+    blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(snapshot, 'lineno'))
+    return blocks, max(peak - before, 0)
+
+
+def measure(func, number: int = None, repeat: int = 5) -> dict:
+    """
+    Time a callable, in seconds per call, and trace the memory of one call.
+
+    Parameters
+    ----------
+    func : callable
+        The code to time, called without arguments.
+    number : int, optional
+        The number of calls per run. By default it is chosen so a run lasts at
+        least 0.2 seconds.
+    repeat : int, optional
+        The number of runs.
+
+    Returns
+    -------
+    dict
+        The number of calls per run, the best and median time per call, the calls
+        per second of the best run, and the blocks and peak bytes of one call,
+        see `allocations`.
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    times = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    blocks, peak = allocations(func)
+    return {
+        'number': number,
+        'best': min(times),
+        'median': statistics.median(times),
+        'ops': 1 / min(times) if min(times) else float('inf'),
+        'allocations': blocks,
+        'peak_bytes': peak,
+    }
+
+
+def flatten(name: str, rows: list) -> dict:
+    """
+    Key the measures of a benchmark by its name, the labels of their row and their column.
+
+    For example `input_validation/payload=small/validate`.
+    """
+    measures = {}
+    for row in rows:
+        labels = '/'.join(f'{key}={value}' for key, value in row.items() if not isinstance(value, dict))
+        for key, value in row.items():
+            if isinstance(value, dict):
+                measures['/'.join(part for part in (name, labels, key) if part)] = value
+    return measures
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Find the measures which regressed from a baseline.
+
+    Parameters
+    ----------
+    results, baseline : dict
+        Measures keyed as by `flatten`. Measures missing from either are ignored.
+    threshold : float
+        The tolerated increase, in percent, of the best time and the peak memory.
+
+    Returns
+    -------
+    list
+        The key, value, baseline value and increase in percent of every regression.
+    """
+    regressions = []
+    for key, measure in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for value, minimum in COMPARED.items():
+            if not reference.get(value) or value not in measure:
+                continue
+            increase = (measure[value] / reference[value] - 1) * 100
+            if increase > threshold and measure[value] - reference[value] > minimum:
+                regressions.append((f'{key}/{value}', measure[value], reference[value], increase))
+    return regressions
+
+
+def middleware_overhead(number: int = None, repeat: int = 5) -> list:
+    """
+    Time the endpoint call count middleware around a view returning at once.
+
+    The bare view is timed as reference. Requests resolve to the movies list
+    route. The middleware counts into buffers of its own which are never
+    flushed, so the metrics tables are not written: the amortized cost of the
+    flushes is not part of the measure.
+    """
+    from .buffers import CallCountBuffer, LatencyBuffer
+    from .middlewares import EndpointCallCountMiddleware
+
+    request = RequestFactory().get('/api/movies/')
+    request.resolver_match = resolve('/api/movies/')
+    response = HttpResponse()
+
+    def view(request):
+        return response
+
+    middleware = EndpointCallCountMiddleware(view)
+    middleware.call_count_buffer = CallCountBuffer(flush_size=math.inf, flush_interval=math.inf)
+    middleware.latency_buffer = LatencyBuffer(flush_size=math.inf, flush_interval=math.inf)
+    return [
+        {'handler': 'view', 'call': measure(lambda: view(request), number, repeat)},
+        {'handler': 'middleware', 'call': measure(lambda: middleware(request), number, repeat)},
+    ]
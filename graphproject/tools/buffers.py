@@ -0,0 +1,400 @@
+import abc
+import atexit
+import datetime
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from .metrics import Histogram, write_histograms
+from .models import EndpointCallCount, EndpointLatency
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer(abc.ABC):
+    """
+    In-process write-behind buffer of request metrics.
+
+    Values are aggregated in memory per key and written with a single statement
+    once `flush_size` values were buffered or `flush_interval` seconds passed since
+    the last flush. A timer thread flushes an idle buffer after `flush_interval`
+    seconds too, see `settings.ENDPOINT_CALL_COUNT_FLUSH_TIMER`. Buffers are
+    flushed at process exit as well, so at most `flush_size` values are lost if
+    the process dies abruptly. Subclasses define how values are aggregated
+    (`empty`, `merge`, `size`, `age`) and written (`write`).
+
+    When a write fails, the values are put back and the next flush waits
+    `flush_interval` seconds, so requests do not pay for a failed write each.
+    Meanwhile the buffer keeps at most `flush_size` values, the oldest keys are
+    dropped beyond.
+
+    Attributes
+    ----------
+    flush_size : int
+        The number of buffered values which triggers a flush, and the most values
+        kept while writes fail.
+    flush_interval : float
+        The number of seconds after which buffered values are flushed.
+    dropped : int
+        The number of values dropped while writes failed.
+
+    Methods
+    -------
+    put(key, value) -> dict
+        Buffers a value, returns the buffered values to write if a threshold is reached.
+    flush()
+        Writes the buffered values to the database.
+    flush_due()
+        Writes the buffered values if the interval elapsed, run by the timer.
+    """
+
+    def __init__(self, flush_size: int, flush_interval: float, timer: bool = False) -> None:
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.items = self.empty()
+        # Values buffered since the last flush, and values put back after a failed write
+        self.pending = self.restored = 0
+        self.dropped = 0
+        self.last_flush = time.monotonic()
+        self.retry_at = 0.0
+        self.timer = timer
+        self.lock = threading.Lock()
+
+    def empty(self):
+        return {}
+
+    @abc.abstractmethod
+    def merge(self, items, key, value) -> None:
+        """
+        Aggregate a value, or values taken out of the buffer, into the values of a key.
+        """
+
+    @abc.abstractmethod
+    def size(self, value) -> int:
+        """
+        Get the number of values aggregated into a buffered value.
+        """
+
+    def age(self, key):
+        """
+        Sort key of the buffered keys, the oldest first, dropped first. By insertion order by default.
+        """
+        return 0
+
+    def drop(self, key, excess: int) -> int:
+        """
+        Drop up to `excess` values of a key, the whole key by default. Returns the number of values dropped.
+        """
+        return self.size(self.items.pop(key))
+
+    @abc.abstractmethod
+    def write(self, items) -> None:
+        """
+        Write values taken out of the buffer, and `restore` them if that fails.
+        """
+
+    def put(self, key, value):
+        """
+        Buffer a value, and take the buffered values out if a threshold is reached.
+
+        Returns
+        -------
+        dict
+            The values to write, or None if the buffer does not need a flush.
+        """
+        with self.lock:
+            self.merge(self.items, key, value)
+            self.pending += 1
+            if self.timer is True:
+                self.start_timer()
+            now = time.monotonic()
+            if now < self.retry_at:
+                self.trim()
+                return None
+            if (self.pending < self.flush_size and
+                    now - self.last_flush < self.flush_interval):
+                return None
+            return self.swap()
+
+    def flush(self) -> None:
+        """
+        Write every buffered value to the database.
+        """
+        with self.lock:
+            items = self.swap()
+        self.write(items)
+
+    def flush_due(self) -> None:
+        """
+        Write the buffered values if `flush_interval` seconds passed since the last flush.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if not self.items or now < self.retry_at or now - self.last_flush < self.flush_interval:
+                return
+            items = self.swap()
+        self.write(items)
+
+    def swap(self):
+        # Must be called with the lock held
+        items, self.items = self.items, self.empty()
+        self.pending = self.restored = 0
+        self.last_flush = time.monotonic()
+        return items
+
+    def restore(self, items) -> None:
+        """
+        Put values which could not be written back into the buffer, and delay the next flush.
+        """
+        with self.lock:
+            for key, value in items.items():
+                self.merge(self.items, key, value)
+                self.restored += self.size(value)
+            self.retry_at = time.monotonic() + self.flush_interval
+            self.trim()
+
+    def trim(self) -> None:
+        # Must be called with the lock held. Drops the oldest keys beyond `flush_size` values.
+        excess = self.pending + self.restored - self.flush_size
+        if excess <= 0:
+            return
+        dropped = 0
+        for key in sorted(self.items, key=self.age):
+            if dropped >= excess:
+                break
+            dropped += self.drop(key, excess - dropped)
+        restored = min(dropped, self.restored)
+        self.restored -= restored
+        self.pending = max(self.pending - (dropped - restored), 0)
+        self.dropped += dropped
+
+    def start_timer(self) -> None:
+        # Must be called with the lock held, starts the timer on first use
+        if math.isfinite(self.flush_interval):
+            self.timer = threading.Thread(target=self.tick, daemon=True)
+            self.timer.start()
+
+    def tick(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            if settings.ENDPOINT_CALL_COUNT_FLUSH_TIMER:
+                # The thread keeps its own connection between flushes
+                connection.close_if_unusable_or_obsolete()
+                self.flush_due()
+
+
+class CallCountBuffer(WriteBehindBuffer):
+    """
+    In-process write-behind buffer for endpoint call counts.
+
+    Calls are aggregated in memory per (endpoint, method) and written with a single
+    `INSERT ... ON CONFLICT DO UPDATE` statement, see `WriteBehindBuffer`.
+
+    Attributes
+    ----------
+    counts : collections.Counter
+        The buffered call counts keyed by (endpoint, method).
+
+    Methods
+    -------
+    add(endpoint, method)
+        Counts a call and flushes the buffer if a threshold is reached.
+    aadd(endpoint, method)
+        Asynchronous version of `add`.
+    flush()
+        Writes the buffered counts to the database.
+    """
+
+    @property
+    def counts(self) -> Counter:
+        return self.items
+
+    def empty(self) -> Counter:
+        return Counter()
+
+    def merge(self, items, key, value) -> None:
+        items[key] += value
+
+    def size(self, value) -> int:
+        return value
+
+    def drop(self, key, excess: int) -> int:
+        dropped = min(excess, self.items[key])
+        self.items[key] -= dropped
+        if not self.items[key]:
+            del self.items[key]
+        return dropped
+
+    def add(self, endpoint: str, method: str) -> None:
+        """
+        Count a call of an endpoint.
+
+        Parameters
+        ----------
+        endpoint : str
+            The normalized path of the endpoint.
+        method : str
+            The HTTP method of the call.
+        """
+        counts = self.count(endpoint, method)
+        if counts:
+            self.write(counts)
+
+    async def aadd(self, endpoint: str, method: str) -> None:
+        """
+        Asynchronous version of `add`, the flush runs in a worker thread.
+        """
+        counts = self.count(endpoint, method)
+        if counts:
+            await sync_to_async(self.write)(counts)
+
+    def count(self, endpoint: str, method: str):
+        """
+        Buffer a call, and take the buffered counts out if a threshold is reached.
+
+        Returns
+        -------
+        collections.Counter
+            The counts to write, or None if the buffer does not need a flush.
+        """
+        return self.put((endpoint, method), 1)
+
+    def write(self, counts: Counter) -> None:
+        """
+        Upsert the given counts with one statement.
+
+        Rows are written in key order, so concurrent flushes of several workers
+        lock them in the same order. If the write fails, the counts are put back
+        into the buffer for a later flush and the error is logged: it runs in the
+        request path, a metrics failure must not fail the request.
+        """
+        if not counts:
+            return
+        table = connection.ops.quote_name(EndpointCallCount._meta.db_table)
+        rows = sorted(counts.items())
+        values = ', '.join(['(%s, %s, %s)'] * len(rows))
+        params = [value for (endpoint, method), count in rows
+                  for value in (endpoint, method, count)]
+        query = f"""
+            INSERT INTO {table} (endpoint, method, call_count)
+            VALUES {values}
+            ON CONFLICT (endpoint, method)
+            DO UPDATE SET call_count = {table}.call_count + EXCLUDED.call_count
+        """
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+        except Exception:
+            self.restore(counts)
+            logger.exception("Could not write %d endpoint call counts, they are kept for a later flush.",
+                             len(counts))
+
+
+class LatencyBuffer(WriteBehindBuffer):
+    """
+    In-process write-behind buffer for endpoint latency histograms.
+
+    Requests are aggregated in memory per (endpoint, method, minute) into
+    `metrics.Histogram`s, and written into the minute and lifetime rows of
+    `EndpointLatency` with one statement, see `WriteBehindBuffer`.
+
+    Methods
+    -------
+    add(endpoint, method, wall_time, db_time, queries)
+        Records a request and flushes the buffer if a threshold is reached.
+    aadd(endpoint, method, wall_time, db_time, queries)
+        Asynchronous version of `add`.
+    flush()
+        Writes the buffered histograms to the database.
+    """
+
+    def merge(self, items, key, value) -> None:
+        histogram = items.get(key)
+        if histogram is None:
+            histogram = items[key] = Histogram()
+        if isinstance(value, Histogram):
+            histogram.merge(value)
+        else:
+            histogram.observe(*value)
+
+    def size(self, value) -> int:
+        return value.count
+
+    def age(self, key):
+        return key[2]
+
+    def add(self, endpoint: str, method: str, wall_time: float, db_time: float, queries: int) -> None:
+        """
+        Record a request of an endpoint.
+
+        Parameters
+        ----------
+        endpoint : str
+            The normalized path of the endpoint.
+        method : str
+            The HTTP method of the request.
+        wall_time : float
+            The number of seconds the request took.
+        db_time : float
+            The number of seconds spent running queries.
+        queries : int
+            The number of queries.
+        """
+        histograms = self.record(endpoint, method, wall_time, db_time, queries)
+        if histograms:
+            self.write(histograms)
+
+    async def aadd(self, endpoint: str, method: str, wall_time: float, db_time: float, queries: int) -> None:
+        """
+        Asynchronous version of `add`, the flush runs in a worker thread.
+        """
+        histograms = self.record(endpoint, method, wall_time, db_time, queries)
+        if histograms:
+            await sync_to_async(self.write)(histograms)
+
+    def record(self, endpoint, method, wall_time, db_time, queries):
+        minute = int(time.time()) // 60
+        return self.put((endpoint, method, minute), (wall_time, db_time, queries))
+
+    def write(self, histograms: dict) -> None:
+        """
+        Add the given histograms to their minute and lifetime rows with one statement.
+
+        If the write fails, the histograms are put back into the buffer for a
+        later flush and the error is logged, as for `CallCountBuffer.write`.
+        """
+        if not histograms:
+            return
+        rows = {}
+        for (endpoint, method, minute), histogram in histograms.items():
+            period = datetime.datetime.fromtimestamp(minute * 60, datetime.timezone.utc)
+            for key in ((endpoint, method, EndpointLatency.Resolution.MINUTE, period),
+                        (endpoint, method, EndpointLatency.Resolution.TOTAL, EndpointLatency.TOTAL_PERIOD)):
+                rows.setdefault(key, Histogram()).merge(histogram)
+        try:
+            write_histograms(rows)
+        except Exception:
+            self.restore(histograms)
+            logger.exception("Could not write %d endpoint latency histograms, they are kept for a later flush.",
+                             len(histograms))
+
+
+call_count_buffer = CallCountBuffer(
+    flush_size=settings.ENDPOINT_CALL_COUNT_FLUSH_SIZE,
+    flush_interval=settings.ENDPOINT_CALL_COUNT_FLUSH_INTERVAL,
+    timer=True,
+)
+atexit.register(call_count_buffer.flush)
+
+latency_buffer = LatencyBuffer(
+    flush_size=settings.ENDPOINT_CALL_COUNT_FLUSH_SIZE,
+    flush_interval=settings.ENDPOINT_CALL_COUNT_FLUSH_INTERVAL,
+    timer=True,
+)
+atexit.register(latency_buffer.flush)
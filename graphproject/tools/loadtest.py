@@ -0,0 +1,139 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class LoadTest:
+    """
+    HTTP load generator built on asyncio streams.
+
+    Every connection is a keep-alive HTTP/1.1 connection sending one `GET` after
+    the other, so `concurrency` connections keep as many requests in flight.
+    Connections which fail are reopened and the failure is counted as an error.
+
+    Attributes
+    ----------
+    url : str
+        The url requested by every connection.
+    concurrency : int
+        The number of concurrent connections.
+    requests : int
+        The total number of requests to send.
+    timeout : float
+        The number of seconds after which a request counts as failed.
+
+    Methods
+    -------
+    run() -> dict
+        Sends the requests and returns the throughput and the latency percentiles.
+    """
+
+    def __init__(self, url: str, concurrency: int, requests: int, timeout: float = 30) -> None:
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self.concurrency = concurrency
+        self.requests = requests
+        self.timeout = timeout
+
+    def run(self) -> dict:
+        return asyncio.run(self.arun())
+
+    async def arun(self) -> dict:
+        self.remaining = self.requests
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+        start = time.perf_counter()
+        await asyncio.gather(*(self.connection() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(self.latencies)
+        return {
+            'concurrency': self.concurrency,
+            'requests': self.requests,
+            'errors': self.errors,
+            'statuses': self.statuses,
+            'seconds': elapsed,
+            'throughput': len(latencies) / elapsed if elapsed else 0.0,
+            'p50': self.percentile(latencies, 50),
+            'p99': self.percentile(latencies, 99),
+            'mean': statistics.fmean(latencies) if latencies else None,
+        }
+
+    async def connection(self) -> None:
+        request = (f'GET {self.target} HTTP/1.1\r\n'
+                   f'Host: {self.host}:{self.port}\r\n'
+                   'Accept: application/json\r\n\r\n').encode()
+        reader = writer = None
+        while self.remaining > 0:
+            self.remaining -= 1
+            start = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port), self.timeout)
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(self.read_response(reader), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                self.errors += 1
+                writer = await self.close(writer)
+                continue
+            self.latencies.append(time.perf_counter() - start)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if not keep_alive:
+                writer = await self.close(writer)
+        await self.close(writer)
+
+    @staticmethod
+    async def read_response(reader):
+        """
+        Read one response, its body is discarded.
+
+        Returns
+        -------
+        tuple
+            The status code, and whether the connection can be reused.
+        """
+        head = await reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        elif status not in (204, 304):
+            # The body ends with the connection
+            await reader.read()
+            return status, False
+        return status, headers.get('connection') != 'close'
+
+    @staticmethod
+    async def close(writer):
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        return None
+
+    @staticmethod
+    def percentile(values, percent):
+        if not values:
+            return None
+        index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+        return values[index]
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tools.loadtest import LoadTest
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of running servers at several concurrency levels. "
+        "For example, with the same database and `ASYNC_READ_VIEWS = True`:\n"
+        "  gunicorn graphproject.wsgi -w 4 -b 127.0.0.1:8000\n"
+        "  uvicorn graphproject.asgi:application --port 8001\n"
+        "  python manage.py loadtest wsgi=http://127.0.0.1:8000/api/movies/ "
+        "asgi=http://127.0.0.1:8001/api/movies/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', metavar='label=url', help="Servers to compare.")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[100, 500, 1000],
+                            help="Numbers of concurrent connections.")
+        parser.add_argument('--requests', type=int, default=5000,
+                            help="Requests per server and concurrency level.")
+        parser.add_argument('--timeout', type=float, default=30, help="Seconds before a request fails.")
+        parser.add_argument('--json', dest='output', help="Write the results to this file.")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['targets']:
+            label, separator, url = target.partition('=')
+            if not separator or not url.startswith('http://'):
+                raise CommandError(f"Expected label=http://host:port/path, got {target!r}")
+            targets.append((label, url))
+
+        results = []
+        for concurrency in options['concurrency']:
+            for label, url in targets:
+                result = LoadTest(url, concurrency, max(options['requests'], concurrency),
+                                  timeout=options['timeout']).run()
+                result.update(label=label, url=url)
+                results.append(result)
+                self.stdout.write(
+                    f"{label:>8}  c={concurrency:<5} {result['throughput']:9.1f} req/s  "
+                    f"p50={self.ms(result['p50'])}  p99={self.ms(result['p99'])}  "
+                    f"errors={result['errors']}  statuses={result['statuses']}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+
+    @staticmethod
+    def ms(seconds):
+        return '-' if seconds is None else f'{seconds * 1000:.1f}ms'
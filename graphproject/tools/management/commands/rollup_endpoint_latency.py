@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tools.metrics import rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll the endpoint latency rows past their retention up into coarser periods, "
+        "and delete the expired days. Run it periodically, e.g. hourly from cron."
+    )
+
+    def handle(self, *args, **options):
+        done = rollup()
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f"{count} {resolution} rows" for resolution, count in done.items())
+            + " rolled up or deleted."))
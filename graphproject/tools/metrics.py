@@ -0,0 +1,282 @@
+import datetime
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from itertools import zip_longest
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import EndpointCallCount, EndpointLatency
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of request latencies, with the totals of the requests.
+
+    Bucket `i` counts the requests which took at most `bounds[i]` seconds and more
+    than `bounds[i - 1]`, the last bucket the requests slower than every bound.
+
+    Attributes
+    ----------
+    bounds : tuple
+        The upper bounds of the buckets in seconds, `settings.ENDPOINT_LATENCY_BUCKETS`.
+    buckets : list
+        The number of requests per bucket.
+    count : int
+        The number of requests.
+    wall_time, db_time : float
+        The total time of the requests, and the part spent running queries.
+    queries : int
+        The total number of queries.
+
+    Methods
+    -------
+    observe(wall_time, db_time, queries)
+        Records one request.
+    merge(other)
+        Adds the requests of another histogram.
+    percentile(percent) -> float
+        Returns an estimate of a percentile of the latency.
+    """
+
+    def __init__(self, buckets=None) -> None:
+        self.bounds = settings.ENDPOINT_LATENCY_BUCKETS
+        self.buckets = list(buckets) if buckets else [0] * (len(self.bounds) + 1)
+        self.count = sum(self.buckets)
+        self.wall_time = self.db_time = 0.0
+        self.queries = 0
+
+    @classmethod
+    def of_row(cls, row):
+        histogram = cls(row.buckets)
+        histogram.count = row.count
+        histogram.wall_time, histogram.db_time = row.wall_time, row.db_time
+        histogram.queries = row.queries
+        return histogram
+
+    def observe(self, wall_time: float, db_time: float, queries: int) -> None:
+        self.buckets[bisect_left(self.bounds, wall_time)] += 1
+        self.count += 1
+        self.wall_time += wall_time
+        self.db_time += db_time
+        self.queries += queries
+
+    def merge(self, other) -> None:
+        self.buckets = [mine + theirs for mine, theirs in
+                        zip_longest(self.buckets, other.buckets, fillvalue=0)]
+        self.count += other.count
+        self.wall_time += other.wall_time
+        self.db_time += other.db_time
+        self.queries += other.queries
+
+    def percentile(self, percent: float):
+        """
+        Estimate a percentile of the latency, in seconds.
+
+        The requests of a bucket are assumed evenly spread between its bounds. The
+        percentiles falling in the last bucket are reported as its lower bound.
+
+        Returns
+        -------
+        float
+            The estimate, or None if there is no request.
+        """
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class QueryMetrics:
+    """
+    Number of queries of a request and time spent running them.
+    """
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Metrics of the current request, copied into the threads running its sync code
+query_metrics = ContextVar('query_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper timing the queries of the current request.
+    """
+    metrics = query_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    """
+    Add `record_query` to the execute wrappers of a connection, see `apps.ToolsConfig`.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def write_histograms(histograms: dict) -> None:
+    """
+    Add histograms to their rows with one `INSERT ... ON CONFLICT DO UPDATE` statement.
+
+    Parameters
+    ----------
+    histograms : dict
+        The histograms keyed by (endpoint, method, resolution, period start).
+    """
+    if not histograms:
+        return
+    table = connection.ops.quote_name(EndpointLatency._meta.db_table)
+    rows = sorted(histograms.items())
+    values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s::bigint[])'] * len(rows))
+    params = [value for (endpoint, method, resolution, period), histogram in rows
+              for value in (endpoint, method, resolution, period, histogram.count,
+                            histogram.wall_time, histogram.db_time, histogram.queries,
+                            histogram.buckets)]
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {table} AS latency (endpoint, method, resolution, period_start,
+                                            count, wall_time, db_time, queries, buckets)
+            VALUES {values}
+            ON CONFLICT (endpoint, method, resolution, period_start) DO UPDATE SET
+                count = latency.count + EXCLUDED.count,
+                wall_time = latency.wall_time + EXCLUDED.wall_time,
+                db_time = latency.db_time + EXCLUDED.db_time,
+                queries = latency.queries + EXCLUDED.queries,
+                buckets = ARRAY(
+                    SELECT COALESCE(mine, 0) + COALESCE(theirs, 0)
+                    FROM unnest(latency.buckets, EXCLUDED.buckets)
+                        WITH ORDINALITY AS added (mine, theirs, position)
+                    ORDER BY position
+                )
+        """, params)
+
+
+def recent_histograms(seconds: int) -> dict:
+    """
+    Merge the histograms of the last seconds per (endpoint, method), with one query.
+
+    Only the periods starting in the window are read, so a window of a few hours
+    reads minute rows, and longer windows get the rolled up hours and days.
+    """
+    since = timezone.now() - datetime.timedelta(seconds=seconds)
+    histograms = {}
+    for row in EndpointLatency.objects.filter(
+            resolution__in=ROLLUP_RESOLUTIONS, period_start__gte=since):
+        histogram = histograms.setdefault((row.endpoint, row.method), Histogram())
+        histogram.merge(Histogram.of_row(row))
+    return histograms
+
+
+# Rows of a resolution are rolled up into the next one after their retention
+ROLLUP_RESOLUTIONS = [EndpointLatency.Resolution.MINUTE, EndpointLatency.Resolution.HOUR,
+                      EndpointLatency.Resolution.DAY]
+
+
+def truncate(period: datetime.datetime, resolution: str) -> datetime.datetime:
+    period = period.replace(minute=0, second=0, microsecond=0)
+    if resolution == EndpointLatency.Resolution.DAY:
+        period = period.replace(hour=0)
+    return period
+
+
+def rollup(now=None) -> dict:
+    """
+    Roll minute rows up into hours and hour rows up into days, and drop old days.
+
+    Minute rows older than `settings.ENDPOINT_LATENCY_MINUTE_RETENTION` seconds are
+    added to their hour, hour rows older than `settings.ENDPOINT_LATENCY_HOUR_RETENTION`
+    to their day, and day rows older than `settings.ENDPOINT_LATENCY_DAY_RETENTION`
+    are deleted. Lifetime rows are kept.
+
+    Returns
+    -------
+    dict
+        The number of rows rolled up or deleted per resolution.
+    """
+    now = now or timezone.now()
+    retentions = [settings.ENDPOINT_LATENCY_MINUTE_RETENTION,
+                  settings.ENDPOINT_LATENCY_HOUR_RETENTION,
+                  settings.ENDPOINT_LATENCY_DAY_RETENTION]
+    done = {}
+    with transaction.atomic():
+        for index, (resolution, retention) in enumerate(zip(ROLLUP_RESOLUTIONS, retentions)):
+            rows = EndpointLatency.objects.select_for_update().filter(
+                resolution=resolution, period_start__lt=now - datetime.timedelta(seconds=retention))
+            if index + 1 < len(ROLLUP_RESOLUTIONS):
+                target = ROLLUP_RESOLUTIONS[index + 1]
+                histograms = {}
+                rows = list(rows)
+                for row in rows:
+                    key = (row.endpoint, row.method, target, truncate(row.period_start, target))
+                    histograms.setdefault(key, Histogram()).merge(Histogram.of_row(row))
+                write_histograms(histograms)
+                EndpointLatency.objects.filter(pk__in=[row.pk for row in rows]).delete()
+                done[resolution] = len(rows)
+            else:
+                done[resolution] = rows.delete()[0]
+    return done
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text() -> str:
+    """
+    Render the lifetime metrics of every endpoint in the Prometheus text format.
+
+    Returns
+    -------
+    str
+        The `http_request_duration_seconds` histograms, the database time and query
+        counters, and the call counters.
+    """
+    lines = [
+        '# HELP http_request_duration_seconds Time to build the responses.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    db_time = ['# HELP http_request_db_seconds_total Time spent running queries.',
+               '# TYPE http_request_db_seconds_total counter']
+    queries = ['# HELP http_request_db_queries_total Number of queries.',
+               '# TYPE http_request_db_queries_total counter']
+    rows = EndpointLatency.objects.filter(
+        resolution=EndpointLatency.Resolution.TOTAL).order_by('endpoint', 'method')
+    for row in rows:
+        labels = f'endpoint="{escape(row.endpoint)}",method="{escape(row.method)}"'
+        cumulative = 0
+        bounds = [repr(float(bound)) for bound in settings.ENDPOINT_LATENCY_BUCKETS] + ['+Inf']
+        for bound, count in zip(bounds, row.buckets):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{{labels}}} {row.wall_time!r}')
+        lines.append(f'http_request_duration_seconds_count{{{labels}}} {row.count}')
+        db_time.append(f'http_request_db_seconds_total{{{labels}}} {row.db_time!r}')
+        queries.append(f'http_request_db_queries_total{{{labels}}} {row.queries}')
+
+    calls = ['# HELP http_requests_total Number of calls.',
+             '# TYPE http_requests_total counter']
+    for row in EndpointCallCount.objects.order_by('endpoint', 'method'):
+        labels = f'endpoint="{escape(row.endpoint)}",method="{escape(row.method)}"'
+        calls.append(f'http_requests_total{{{labels}}} {row.call_count}')
+    return '\n'.join(lines + db_time + queries + calls) + '\n'
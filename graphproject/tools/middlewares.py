@@ -1,25 +1,97 @@
-from django.db.models import F
-from django.utils.deprecation import MiddlewareMixin
+import re
+import time
+from functools import lru_cache
 
-from .models import EndpointCallCount
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 
+from .buffers import call_count_buffer, latency_buffer
+from .metrics import QueryMetrics, query_metrics
 
-class EndpointCallCountMiddleware(MiddlewareMixin):
-    def process_response(self, request, response):
-        path = self.normalize_path(request.path)
-        method = request.method
+# Endpoint of the requests which did not match a route, or returned 404
+NOT_FOUND_ENDPOINT = '<not found>'
 
-        if path:
-            endpoint_call, created = EndpointCallCount.objects.get_or_create(
-                endpoint=path, method=method)
-            endpoint_call.call_count = F('call_count') + 1
-            endpoint_call.save()
+# Parameters of `path()` and `re_path()` routes, e.g. `<int:pk>` and `(?P<pk>[^/.]+)`
+ROUTE_PARAMETER = re.compile(r'<(?:\w+:)?(\w+)>|\(\?P<(\w+)>[^()]*\)')
 
+
+@lru_cache(maxsize=settings.ENDPOINT_ROUTE_CACHE_SIZE)
+def route_template(route: str) -> str:
+    """
+    Turn the route of a resolved request into a readable path template.
+
+    `api/movies/(?P<pk>[^/.]+)/add_actor/$` becomes `/api/movies/{pk}/add_actor/`.
+    Routes are few, so the templates are computed once per route and process.
+    """
+    template = ROUTE_PARAMETER.sub(lambda match: '{%s}' % (match[1] or match[2]), route)
+    template = template.lstrip('^').removesuffix('$').removesuffix('/?')
+    template = re.sub(r'\\(.)', r'\1', template)
+    return ('/' + template)[:255]
+
+
+class EndpointCallCountMiddleware:
+    """
+    Count the calls of every endpoint, and record their latency.
+
+    Endpoints are the route templates of the requests, e.g. `/api/movies/{pk}/`, so
+    the metrics tables hold one row per route and method whatever the ids in the
+    urls. Requests which match no route or return 404 are counted together as
+    `NOT_FOUND_ENDPOINT`.
+
+    Calls are aggregated in memory by `call_count_buffer` and written to the
+    `EndpointCallCount` table in batches, so counting adds no query to the request.
+    The wall time, number of queries and database time of every request go the
+    same way into the latency histograms of `latency_buffer`. Queries are timed
+    by `metrics.record_query`, through the `query_metrics` context variable, which
+    follows the request into the threads running its sync code.
+
+    The middleware runs natively in both modes: under ASGI it does not switch to
+    a worker thread, except for the occasional flush.
+    """
+    sync_capable = True
+    async_capable = True
+    # The buffers of the process, replaced by the benchmarks
+    call_count_buffer = call_count_buffer
+    latency_buffer = latency_buffer
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = QueryMetrics()
+        token = query_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            wall_time = time.perf_counter() - start
+            query_metrics.reset(token)
+        endpoint = self.endpoint(request, response)
+        self.call_count_buffer.add(endpoint, request.method)
+        self.latency_buffer.add(endpoint, request.method, wall_time, metrics.db_time, metrics.queries)
+        return response
+
+    async def __acall__(self, request):
+        metrics = QueryMetrics()
+        token = query_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            wall_time = time.perf_counter() - start
+            query_metrics.reset(token)
+        endpoint = self.endpoint(request, response)
+        await self.call_count_buffer.aadd(endpoint, request.method)
+        await self.latency_buffer.aadd(endpoint, request.method, wall_time, metrics.db_time, metrics.queries)
         return response
 
-    def normalize_path(self, path):
-        segments = path.strip('/').split('/')
-        if segments and segments[-1].isdigit():
-            segments.pop()
-        normalized_path = '/' + '/'.join(segments) + '/'
-        return normalized_path
+    @staticmethod
+    def endpoint(request, response) -> str:
+        match = getattr(request, 'resolver_match', None)
+        if match is None or response.status_code == 404:
+            return NOT_FOUND_ENDPOINT
+        return route_template(match.route)
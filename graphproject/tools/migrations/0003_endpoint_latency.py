@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-16 23:05
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0002_endpointcallcount_method_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndpointLatency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=255)),
+                ('method', models.CharField(max_length=10)),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day'), ('total', 'Total')], max_length=6)),
+                ('period_start', models.DateTimeField()),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('wall_time', models.FloatField(default=0)),
+                ('db_time', models.FloatField(default=0)),
+                ('queries', models.PositiveBigIntegerField(default=0)),
+                ('buckets', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveBigIntegerField(), size=None)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolution', 'period_start'], name='tools_endpo_resolut_5f6060_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='endpointlatency',
+            constraint=models.UniqueConstraint(fields=('endpoint', 'method', 'resolution', 'period_start'), name='endpoint_latency_period'),
+        ),
+    ]
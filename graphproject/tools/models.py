@@ -1,3 +1,6 @@
+import datetime
+
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 
 
@@ -11,3 +14,45 @@ class EndpointCallCount(models.Model):
 
     def __str__(self):
         return f"{self.endpoint}: {self.call_count}"
+
+
+class EndpointLatency(models.Model):
+    """
+    Latency histogram and database totals of the requests of an endpoint in a period.
+
+    Rows are written per minute by `tools.buffers.latency_buffer`, rolled up into
+    hours and days by the `rollup_endpoint_latency` command, and added to the
+    lifetime row of the endpoint, whose `period_start` is `TOTAL_PERIOD`.
+    """
+
+    class Resolution(models.TextChoices):
+        MINUTE = 'minute'
+        HOUR = 'hour'
+        DAY = 'day'
+        TOTAL = 'total'
+
+    TOTAL_PERIOD = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+    endpoint = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    resolution = models.CharField(max_length=6, choices=Resolution.choices)
+    period_start = models.DateTimeField()
+    count = models.PositiveBigIntegerField(default=0)
+    # Sums over the requests, in seconds
+    wall_time = models.FloatField(default=0)
+    db_time = models.FloatField(default=0)
+    queries = models.PositiveBigIntegerField(default=0)
+    # Number of requests per `settings.ENDPOINT_LATENCY_BUCKETS` bucket, then above the last
+    buckets = ArrayField(models.PositiveBigIntegerField())
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['endpoint', 'method', 'resolution', 'period_start'],
+                                    name='endpoint_latency_period'),
+        ]
+        indexes = [
+            models.Index(fields=['resolution', 'period_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.method} {self.resolution} {self.period_start}: {self.count}"
@@ -4,6 +4,48 @@ from .models import EndpointCallCount
 
 
 class EndpointCallCountSerializer(serializers.ModelSerializer):
+    """
+    Serializer of the endpoint call counts, with the latency of the recent requests.
+
+    The latency fields are read from the `histograms` of the serializer context,
+    the `metrics.Histogram`s of the endpoints keyed by (endpoint, method), and are
+    None when the endpoint has no recent request.
+    """
+    requests = serializers.SerializerMethodField()
+    p50 = serializers.SerializerMethodField()
+    p95 = serializers.SerializerMethodField()
+    p99 = serializers.SerializerMethodField()
+    mean_db_time = serializers.SerializerMethodField()
+    mean_queries = serializers.SerializerMethodField()
+
     class Meta:
         model = EndpointCallCount
-        fields = ['endpoint', 'call_count', 'method']
+        fields = ['endpoint', 'call_count', 'method', 'requests', 'p50', 'p95', 'p99',
+                  'mean_db_time', 'mean_queries']
+
+    def histogram(self, obj):
+        return self.context.get('histograms', {}).get((obj.endpoint, obj.method))
+
+    def get_requests(self, obj):
+        histogram = self.histogram(obj)
+        return histogram.count if histogram else 0
+
+    def get_p50(self, obj):
+        histogram = self.histogram(obj)
+        return histogram.percentile(50) if histogram else None
+
+    def get_p95(self, obj):
+        histogram = self.histogram(obj)
+        return histogram.percentile(95) if histogram else None
+
+    def get_p99(self, obj):
+        histogram = self.histogram(obj)
+        return histogram.percentile(99) if histogram else None
+
+    def get_mean_db_time(self, obj):
+        histogram = self.histogram(obj)
+        return histogram.db_time / histogram.count if histogram and histogram.count else None
+
+    def get_mean_queries(self, obj):
+        histogram = self.histogram(obj)
+        return histogram.queries / histogram.count if histogram and histogram.count else None
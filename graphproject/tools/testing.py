@@ -0,0 +1,87 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner disabling the flush timer of the metric buffers, see `settings.ENDPOINT_CALL_COUNT_FLUSH_TIMER`.
+
+    The timer writes with its own connection, outside the transaction of the
+    running test, so tests flush the buffers explicitly.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.ENDPOINT_CALL_COUNT_FLUSH_TIMER = False
+
+
+class QueryBudgetMixin:
+    """
+    Test case mixin to pin the number of database queries of a code path.
+
+    Methods
+    -------
+    assertQueryBudget(budget, using='default')
+        Context manager failing when the wrapped block runs more than `budget` queries.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int, using: str = DEFAULT_DB_ALIAS):
+        """
+        Assert the wrapped block runs at most `budget` queries.
+
+        Parameters
+        ----------
+        budget : int
+            The maximum number of queries allowed.
+        using : str, optional
+            The database alias to capture the queries of.
+
+        Raises
+        ------
+        AssertionError
+            If more queries than the budget were executed. The message lists them.
+        """
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{index}. {query["sql"]}'
+                for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f'{executed} queries executed, the budget is {budget}:\n{queries}')
+
+
+class CountriesFileMixin:
+    """
+    Test case mixin reading the countries from a temporary file, see `settings.COUNTRIES_FILE`.
+
+    The file is written and the setting overridden for the whole test case, so
+    the test data and every test see the same countries.
+
+    Attributes
+    ----------
+    countries : list
+        The (name, alpha-2 code, independent) rows of the file.
+    """
+    countries = [('France', 'FR', 'Yes')]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        with file:
+            file.write('Name,IsoAlpha2,isIndependent\n')
+            file.writelines(','.join(row) + '\n' for row in cls.countries)
+        cls.addClassCleanup(os.unlink, file.name)
+        override = override_settings(COUNTRIES_FILE=file.name)
+        override.enable()
+        cls.addClassCleanup(override.disable)
@@ -1,3 +1,406 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .benchmarks import allocations, compare, flatten, measure, middleware_overhead
+from .buffers import CallCountBuffer, LatencyBuffer, call_count_buffer, latency_buffer
+from .loadtest import LoadTest
+from .middlewares import NOT_FOUND_ENDPOINT, route_template
+from .metrics import Histogram, QueryMetrics, query_metrics, rollup, write_histograms
+from .models import EndpointCallCount, EndpointLatency
+
+
+class CallCountBufferTests(TestCase):
+    """
+    Tests for the write-behind buffer of endpoint call counts.
+    """
+
+    def counts(self):
+        return {(row.endpoint, row.method): row.call_count
+                for row in EndpointCallCount.objects.all()}
+
+    def test_aggregates_calls_in_memory(self):
+        buffer = CallCountBuffer(flush_size=100, flush_interval=60)
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                buffer.add('/api/movies/', 'GET')
+            buffer.add('/api/movies/', 'POST')
+        self.assertEqual(self.counts(), {})
+
+        with self.assertNumQueries(1):
+            buffer.flush()
+        self.assertEqual(self.counts(), {
+            ('/api/movies/', 'GET'): 3,
+            ('/api/movies/', 'POST'): 1,
+        })
+
+    def test_flush_increments_existing_rows(self):
+        EndpointCallCount.objects.create(
+            endpoint='/api/movies/', method='GET', call_count=5)
+        buffer = CallCountBuffer(flush_size=100, flush_interval=60)
+        buffer.add('/api/movies/', 'GET')
+        buffer.add('/api/artists/', 'GET')
+        buffer.flush()
+        self.assertEqual(self.counts(), {
+            ('/api/movies/', 'GET'): 6,
+            ('/api/artists/', 'GET'): 1,
+        })
+
+    def test_flushes_when_size_is_reached(self):
+        buffer = CallCountBuffer(flush_size=2, flush_interval=60)
+        buffer.add('/api/movies/', 'GET')
+        self.assertEqual(self.counts(), {})
+        buffer.add('/api/movies/', 'GET')
+        self.assertEqual(self.counts(), {('/api/movies/', 'GET'): 2})
+        self.assertEqual(buffer.pending, 0)
+
+    def test_flushes_when_interval_elapsed(self):
+        buffer = CallCountBuffer(flush_size=100, flush_interval=0)
+        buffer.add('/api/movies/', 'GET')
+        self.assertEqual(self.counts(), {('/api/movies/', 'GET'): 1})
+
+    def test_failed_write_keeps_counts(self):
+        buffer = CallCountBuffer(flush_size=2, flush_interval=60)
+        buffer.add('/api/movies/', 'GET')
+        with mock.patch.object(connection, 'cursor', side_effect=DatabaseError),\
+                self.assertLogs('tools.buffers', 'ERROR'):
+            buffer.add('/api/movies/', 'GET')
+        self.assertEqual(buffer.counts, {('/api/movies/', 'GET'): 2})
+        self.assertEqual((buffer.pending, buffer.restored), (0, 2))
+        buffer.flush()
+        self.assertEqual(self.counts(), {('/api/movies/', 'GET'): 2})
+
+    def test_failed_write_backs_off(self):
+        buffer = CallCountBuffer(flush_size=2, flush_interval=60)
+        with mock.patch.object(connection, 'cursor', side_effect=DatabaseError) as cursor,\
+                self.assertLogs('tools.buffers', 'ERROR'):
+            for _ in range(3):
+                buffer.add('/api/movies/', 'GET')
+        # The write is not retried by every later call
+        self.assertEqual(cursor.call_count, 1)
+        # At most flush_size calls are kept meanwhile
+        self.assertEqual((buffer.counts, buffer.dropped), ({('/api/movies/', 'GET'): 2}, 1))
+        with mock.patch('tools.buffers.time.monotonic', return_value=buffer.retry_at):
+            buffer.add('/api/movies/', 'GET')
+        self.assertEqual(self.counts(), {('/api/movies/', 'GET'): 3})
+
+    def test_failed_writes_keep_the_newest_values(self):
+        buffer = CallCountBuffer(flush_size=3, flush_interval=60)
+        with mock.patch.object(connection, 'cursor', side_effect=DatabaseError),\
+                self.assertLogs('tools.buffers', 'ERROR'):
+            buffer.add('/api/movies/', 'GET')
+            buffer.add('/api/movies/', 'GET')
+            buffer.add('/api/artists/', 'GET')
+        for _ in range(2):
+            buffer.add('/api/genres/', 'GET')
+        self.assertEqual(buffer.counts, {('/api/artists/', 'GET'): 1, ('/api/genres/', 'GET'): 2})
+        self.assertEqual(buffer.dropped, 2)
+
+    def test_timer_flushes_idle_buffers(self):
+        buffer = CallCountBuffer(flush_size=100, flush_interval=60, timer=True)
+        with mock.patch('tools.buffers.threading.Thread') as thread:
+            buffer.add('/api/movies/', 'GET')
+            buffer.add('/api/movies/', 'GET')
+        thread.assert_called_once_with(target=buffer.tick, daemon=True)
+        buffer.flush_due()
+        self.assertEqual(self.counts(), {})
+        with mock.patch('tools.buffers.time.monotonic', return_value=buffer.last_flush + 60):
+            buffer.flush_due()
+        self.assertEqual(self.counts(), {('/api/movies/', 'GET'): 2})
+
+    def test_middleware_counts_requests(self):
+        call_count_buffer.flush()
+        before = self.counts().get(('/api/movies/', 'GET'), 0)
+        self.client.get('/api/movies/')
+        self.client.get('/api/movies/')
+        call_count_buffer.flush()
+        self.assertEqual(self.counts()[('/api/movies/', 'GET')], before + 2)
+
+    def test_middleware_counts_requests_per_route(self):
+        call_count_buffer.flush()
+        EndpointCallCount.objects.all().delete()
+        # Invalid requests are still counted under their route
+        self.client.get('/api/movies/2/similar/?k=0')
+        self.client.get('/api/movies/3/similar/?k=0')
+        self.client.get('/tools/api/endpoints/')
+        self.client.get('/no/such/path/')
+        self.client.get('/api/movies/1/')
+        call_count_buffer.flush()
+        counts = self.counts()
+        self.assertEqual(counts[('/api/movies/{pk}/similar/', 'GET')], 2)
+        self.assertEqual(counts[('/tools/api/endpoints/', 'GET')], 1)
+        # The movie does not exist
+        self.assertEqual(counts[(NOT_FOUND_ENDPOINT, 'GET')], 2)
+        self.assertEqual(len(counts), 3)
+
+    def test_route_template(self):
+        self.assertEqual(route_template('api/movies/(?P<pk>[^/.]+)/add_actor/$'),
+                         '/api/movies/{pk}/add_actor/')
+        self.assertEqual(route_template('api/movies\\.(?P<format>[a-z0-9]+)/?$'),
+                         '/api/movies.{format}')
+        self.assertEqual(route_template('admin/<path:object_id>/'), '/admin/{object_id}/')
+
+    async def test_middleware_counts_async_requests(self):
+        await sync_to_async(call_count_buffer.flush)()
+        counts = await sync_to_async(self.counts)()
+        before = counts.get(('/api/artists/', 'GET'), 0)
+        await self.async_client.get('/api/artists/')
+        await sync_to_async(call_count_buffer.flush)()
+        counts = await sync_to_async(self.counts)()
+        self.assertEqual(counts[('/api/artists/', 'GET')], before + 1)
+
+    def test_async_add_flushes_in_a_thread(self):
+        buffer = CallCountBuffer(flush_size=1, flush_interval=60)
+        async_to_sync(buffer.aadd)('/api/movies/', 'GET')
+        self.assertEqual(self.counts(), {('/api/movies/', 'GET'): 1})
+
+
+@override_settings(ENDPOINT_LATENCY_BUCKETS=(0.1, 0.2, 0.4))
+class LatencyTests(TestCase):
+    """
+    Tests for the latency histograms, their buffer, rollup and exposition.
+    """
+
+    def histogram(self, *wall_times):
+        histogram = Histogram()
+        for wall_time in wall_times:
+            histogram.observe(wall_time, wall_time / 2, 3)
+        return histogram
+
+    def row(self, resolution, period, endpoint='/api/movies/'):
+        return EndpointLatency.objects.get(
+            endpoint=endpoint, method='GET', resolution=resolution, period_start=period)
+
+    def test_percentiles_interpolate_within_buckets(self):
+        histogram = self.histogram(*[0.05] * 50, *[0.15] * 40, *[0.3] * 10)
+        self.assertEqual(histogram.buckets, [50, 40, 10, 0])
+        self.assertAlmostEqual(histogram.percentile(50), 0.1)
+        self.assertAlmostEqual(histogram.percentile(70), 0.15)
+        self.assertAlmostEqual(histogram.percentile(95), 0.3)
+        self.assertEqual(histogram.queries, 300)
+        self.assertIsNone(Histogram().percentile(50))
+        # Requests slower than every bound are reported at the last bound
+        self.assertEqual(self.histogram(5).percentile(99), 0.4)
+
+    def test_flush_adds_histograms_to_minute_and_total_rows(self):
+        buffer = LatencyBuffer(flush_size=100, flush_interval=60)
+        with self.assertNumQueries(0):
+            buffer.add('/api/movies/', 'GET', 0.05, 0.01, 2)
+            buffer.add('/api/movies/', 'GET', 0.3, 0.1, 4)
+        with self.assertNumQueries(1):
+            buffer.flush()
+        buffer.add('/api/movies/', 'GET', 1, 0.5, 1)
+        buffer.flush()
+
+        total = self.row(EndpointLatency.Resolution.TOTAL, EndpointLatency.TOTAL_PERIOD)
+        self.assertEqual(total.buckets, [1, 0, 1, 1])
+        self.assertEqual((total.count, total.queries), (3, 7))
+        self.assertAlmostEqual(total.db_time, 0.61)
+        minutes = EndpointLatency.objects.filter(resolution=EndpointLatency.Resolution.MINUTE)
+        self.assertEqual(sum(row.count for row in minutes), 3)
+
+    def test_failed_write_does_not_fail_the_request(self):
+        latency_buffer.flush()
+        EndpointLatency.objects.all().delete()
+        with mock.patch('tools.buffers.write_histograms', side_effect=DatabaseError),\
+                mock.patch.object(latency_buffer, 'flush_size', 1),\
+                self.assertLogs('tools.buffers', 'ERROR'):
+            response = self.client.get('/tools/api/endpoints/')
+        self.assertEqual(response.status_code, 200)
+        latency_buffer.flush()
+        total = self.row(EndpointLatency.Resolution.TOTAL, EndpointLatency.TOTAL_PERIOD,
+                         endpoint='/tools/api/endpoints/')
+        self.assertEqual(total.count, 1)
+
+    def test_failed_writes_drop_the_oldest_minutes(self):
+        buffer = LatencyBuffer(flush_size=2, flush_interval=60)
+        with mock.patch('tools.buffers.write_histograms', side_effect=DatabaseError),\
+                self.assertLogs('tools.buffers', 'ERROR'):
+            for minute in range(3):
+                with mock.patch('tools.buffers.time.time', return_value=minute * 60):
+                    buffer.add('/api/movies/', 'GET', 0.05, 0.01, 2)
+        self.assertEqual([key[2] for key in buffer.items], [1, 2])
+        self.assertEqual(buffer.dropped, 1)
+
+    def test_middleware_records_queries(self):
+        latency_buffer.flush()
+        EndpointLatency.objects.all().delete()
+        self.client.get('/tools/api/endpoints/')
+        latency_buffer.flush()
+        total = self.row(EndpointLatency.Resolution.TOTAL, EndpointLatency.TOTAL_PERIOD,
+                         endpoint='/tools/api/endpoints/')
+        self.assertEqual(total.count, 1)
+        self.assertGreater(total.queries, 0)
+        self.assertGreater(total.db_time, 0)
+        self.assertLessEqual(total.db_time, total.wall_time)
+
+    def test_queries_are_only_timed_within_requests(self):
+        metrics = QueryMetrics()
+        token = query_metrics.set(metrics)
+        try:
+            EndpointLatency.objects.count()
+        finally:
+            query_metrics.reset(token)
+        EndpointLatency.objects.count()
+        self.assertEqual(metrics.queries, 1)
+
+    def test_rollup_merges_old_rows_and_drops_expired_days(self):
+        now = datetime.datetime(2024, 6, 10, 12, 30, tzinfo=datetime.timezone.utc)
+        minute = EndpointLatency.Resolution.MINUTE
+        hour = EndpointLatency.Resolution.HOUR
+        day = EndpointLatency.Resolution.DAY
+        old = now - datetime.timedelta(days=2)
+        rows = {
+            ('/api/movies/', 'GET', minute, old): self.histogram(0.05),
+            ('/api/movies/', 'GET', minute, old + datetime.timedelta(minutes=1)): self.histogram(0.3),
+            ('/api/movies/', 'GET', minute, now): self.histogram(0.05),
+            ('/api/movies/', 'GET', hour, now - datetime.timedelta(days=40)): self.histogram(0.15),
+            ('/api/movies/', 'GET', day, now - datetime.timedelta(days=400)): self.histogram(0.15),
+        }
+        write_histograms(rows)
+
+        self.assertEqual(rollup(now), {minute: 2, hour: 1, day: 1})
+        self.assertEqual(self.row(hour, old.replace(minute=0)).buckets, [1, 0, 1, 0])
+        rolled_day = (now - datetime.timedelta(days=40)).replace(hour=0, minute=0)
+        self.assertEqual(self.row(day, rolled_day).count, 1)
+        self.assertEqual(self.row(minute, now).count, 1)
+        self.assertEqual(EndpointLatency.objects.count(), 3)
+
+    def test_viewset_exposes_percentiles(self):
+        EndpointCallCount.objects.create(endpoint='/api/movies/', method='GET', call_count=10)
+        EndpointCallCount.objects.create(endpoint='/api/artists/', method='GET', call_count=1)
+        buffer = LatencyBuffer(flush_size=100, flush_interval=60)
+        for wall_time in [0.05] * 9 + [0.3]:
+            buffer.add('/api/movies/', 'GET', wall_time, 0.02, 2)
+        buffer.flush()
+
+        response = self.client.get('/tools/api/endpoints/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['endpoint']: row for row in response.json()}
+        movies = rows['/api/movies/']
+        self.assertEqual(movies['requests'], 10)
+        self.assertAlmostEqual(movies['p50'], 0.1 * 5 / 9)
+        self.assertAlmostEqual(movies['p99'], 0.2 + 0.2 * 0.9)
+        self.assertAlmostEqual(movies['mean_queries'], 2)
+        self.assertIsNone(rows['/api/artists/']['p95'])
+
+        self.assertEqual(self.client.get('/tools/api/endpoints/?window=0').status_code, 400)
+
+    def test_prometheus_text_format(self):
+        EndpointCallCount.objects.create(endpoint='/api/movies/', method='GET', call_count=2)
+        buffer = LatencyBuffer(flush_size=100, flush_interval=60)
+        buffer.add('/api/movies/', 'GET', 0.05, 0.01, 1)
+        buffer.add('/api/movies/', 'GET', 0.3, 0.02, 1)
+        buffer.flush()
+
+        response = self.client.get('/tools/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        lines = response.content.decode().splitlines()
+        labels = 'endpoint="/api/movies/",method="GET"'
+        for line in [
+            '# TYPE http_request_duration_seconds histogram',
+            f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1',
+            f'http_request_duration_seconds_bucket{{{labels},le="0.2"}} 1',
+            f'http_request_duration_seconds_bucket{{{labels},le="0.4"}} 2',
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2',
+            f'http_request_duration_seconds_count{{{labels}}} 2',
+            f'http_request_db_queries_total{{{labels}}} 2',
+            f'http_requests_total{{{labels}}} 2',
+        ]:
+            self.assertIn(line, lines)
+
+
+class LoadTestTests(TestCase):
+    """
+    Tests for the HTTP load generator, against a local threaded server.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body = b'{"ok": true}'
+            self.send_response(200 if self.path == '/ok/' else 404)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), cls.Handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    def test_counts_every_request(self):
+        result = LoadTest(f'{self.url}/ok/', concurrency=5, requests=50).run()
+        self.assertEqual(result['statuses'], {200: 50})
+        self.assertEqual(result['errors'], 0)
+        self.assertLessEqual(result['p50'], result['p99'])
+
+    def test_command_writes_json(self):
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command('loadtest', f'local={self.url}/missing/', concurrency=[2],
+                         requests=4, output=path, stdout=out)
+            with open(path) as file:
+                results = json.load(file)
+        self.assertEqual(results[0]['statuses'], {'404': 4})
+        self.assertIn('local', out.getvalue())
+
+
+class BenchmarkTests(SimpleTestCase):
+    """
+    Tests for the measures of the benchmarks and their comparison with a baseline.
+    """
+
+    def test_measure(self):
+        result = measure(lambda: [object() for _ in range(1000)], number=2, repeat=2)
+        self.assertEqual(result['number'], 2)
+        self.assertLessEqual(result['best'], result['median'])
+        self.assertAlmostEqual(result['ops'], 1 / result['best'])
+        self.assertGreaterEqual(result['allocations'], 1000)
+        self.assertGreater(result['peak_bytes'], 16000)
+
+    def test_allocations_count_transient_memory_in_the_peak(self):
+        blocks, peak = allocations(lambda: len([0] * 100000))
+        self.assertLess(blocks, 100)
+        self.assertGreaterEqual(peak, 800000)
+
+    def test_middleware_overhead_writes_no_metrics(self):
+        pending = call_count_buffer.pending, latency_buffer.pending
+        # A flush would fail as well, the test case allows no query
+        rows = middleware_overhead(number=3, repeat=2)
+        self.assertEqual([row['handler'] for row in rows], ['view', 'middleware'])
+        self.assertEqual((call_count_buffer.pending, latency_buffer.pending), pending)
+
+    def test_flatten_and_compare(self):
+        rows = [{'payload': 'small', 'validate': {'best': 1.0, 'peak_bytes': 100}}]
+        baseline = flatten('input', rows)
+        self.assertEqual(list(baseline), ['input/payload=small/validate'])
+
+        results = flatten('input', [{'payload': 'small', 'validate': {'best': 1.05, 'peak_bytes': 900}},
+                                    {'payload': 'new', 'validate': {'best': 9.0, 'peak_bytes': 0}}])
+        # Within the threshold, and memory increases under 1 KiB are ignored
+        self.assertEqual(compare(results, baseline, 10), [])
+        regressions = compare(results, baseline, 2)
+        self.assertEqual([key for key, *_ in regressions], ['input/payload=small/validate/best'])
+        self.assertAlmostEqual(regressions[0][3], 5)
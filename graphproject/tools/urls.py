@@ -1,12 +1,14 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import EndpointCallCountViewSet, PostgresqlExtensionAPIView
+from .views import (EndpointCallCountViewSet, PostgresqlExtensionAPIView,
+                    prometheus_metrics)
 
 router = DefaultRouter()
 router.register('endpoints', EndpointCallCountViewSet)
 
 urlpatterns = [
     path('api/', include(router.urls)),
-    path('api/postgresql_extentions', PostgresqlExtensionAPIView.as_view())
+    path('api/postgresql_extentions', PostgresqlExtensionAPIView.as_view()),
+    path('metrics', prometheus_metrics),
 ]
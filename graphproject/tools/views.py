@@ -1,7 +1,12 @@
+from django.conf import settings
 from django.db import connection
+from django.http import HttpResponse
 from rest_framework import views, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import _positive_int
 from rest_framework.response import Response
 
+from .metrics import prometheus_text, recent_histograms
 from .models import EndpointCallCount
 from .serializers import EndpointCallCountSerializer
 
@@ -70,7 +75,10 @@ class EndpointCallCountViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API viewset for retrieving endpoint call count records.
 
-    Provides read-only operations to list and retrieve records of endpoint call counts.
+    Provides read-only operations to list and retrieve records of endpoint call counts,
+    with the number of requests, the p50, p95 and p99 latency in seconds, and the mean
+    database time and query count of every endpoint over the last `?window=` seconds,
+    `settings.ENDPOINT_LATENCY_WINDOW` by default.
 
     Attributes
     ----------
@@ -81,3 +89,30 @@ class EndpointCallCountViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = EndpointCallCount.objects.all()
     serializer_class = EndpointCallCountSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        try:
+            window = _positive_int(
+                self.request.query_params.get('window', settings.ENDPOINT_LATENCY_WINDOW), strict=True)
+        except ValueError:
+            raise ValidationError({'window': 'A positive number of seconds is required.'})
+        context['histograms'] = recent_histograms(window)
+        return context
+
+
+def prometheus_metrics(request):
+    """
+    Expose the lifetime latency histograms and call counts of the endpoints.
+
+    Parameters
+    ----------
+    request : django.http.HttpRequest
+        The HTTP request object.
+
+    Returns
+    -------
+    HttpResponse
+        The metrics in the Prometheus text exposition format.
+    """
+    return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')